@@ -1,3 +1,5 @@
+import time
+
 from flask import Flask, g
 from flask_restful import Api
 from flask import request
@@ -5,11 +7,19 @@ from flask import request
 from flocx_market.api.offer_contract_relationship \
     import OfferContractRelationship
 
+from flocx_market.api.change import Change
 from flocx_market.api.contract import Contract
+from flocx_market.api.contract import ContractWatch
+from flocx_market.api.metrics import Metrics
 from flocx_market.api.offer import Offer
 from flocx_market.api.root import Root
 from flocx_market.api.bid import Bid
+from flocx_market.api.bid import BidWatch
+from flocx_market.common import metrics
 from flocx_market.db.orm import orm
+from flocx_market.db.sqlalchemy import query_counter
+from flocx_market.resource_objects import dummy_node
+from flocx_market.resource_objects import resource_object_factory
 import flocx_market.conf
 
 from keystonemiddleware import auth_token
@@ -19,6 +29,21 @@ from oslo_context import context as ctx
 CONF = flocx_market.conf.CONF
 
 
+class Unauthenticated(object):
+    """Serve requests for paths straight from app, all others through
+    authed, the app wrapped in the auth middleware."""
+
+    def __init__(self, app, authed, paths):
+        self.app = app
+        self.authed = authed
+        self.paths = frozenset(paths)
+
+    def __call__(self, environ, start_response):
+        if environ.get('PATH_INFO') in self.paths:
+            return self.app(environ, start_response)
+        return self.authed(environ, start_response)
+
+
 def create_app(app_name):
     app = Flask(app_name)
     app.config['SQLALCHEMY_DATABASE_URI'] = CONF.database.connection
@@ -39,21 +64,69 @@ def create_app(app_name):
                      '/contract',
                      '/contract/',
                      '/contract/<string:contract_id>')
+    api.add_resource(BidWatch, '/bid/<string:bid_id>/watch')
+    api.add_resource(ContractWatch, '/contract/<string:contract_id>/watch')
     api.add_resource(
         OfferContractRelationship,
         '/offer_contract_relationship',
         '/offer_contract_relationship/',
         '/offer_contract_relationship'
         '/<string:offer_contract_relationship_id>')
+    api.add_resource(Change, '/changes')
     api.add_resource(Root, '/')
+    if CONF.metrics.enabled:
+        api.add_resource(Metrics, '/metrics')
 
     orm.init_app(app)
 
+    resource_object_factory.load_drivers()
+    if CONF.dummy_node.preload:
+        dummy_node.preload()
+
     @app.before_request
     def before_request():
         g.context = ctx.RequestContext.from_environ(request.environ)
+        g.request_start = time.monotonic()
+
+    if CONF.metrics.enabled:
+        @app.after_request
+        def after_request(response):
+            # label by route pattern rather than path to bound cardinality
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            metrics.API_REQUEST_LATENCY.labels(
+                method=request.method,
+                route=route,
+                status=response.status_code).observe(
+                    time.monotonic() - g.request_start)
+            return response
+
+    if CONF.profiling.count_queries:
+        query_counter.install()
+
+        @app.before_request
+        def start_query_recorder():
+            g.query_recorder = query_counter.QueryRecorder(
+                '%s %s' % (request.method, request.path)).start()
+
+        @app.after_request
+        def report_queries(response):
+            recorder = g.query_recorder
+            recorder.stop()
+            response.headers['X-Query-Count'] = str(recorder.count)
+            response.headers['X-Query-Time'] = '%.6f' % recorder.duration
+            recorder.report()
+            return response
+
+        @app.teardown_request
+        def stop_query_recorder(exc):
+            if 'query_recorder' in g:
+                g.query_recorder.stop()
 
     if CONF.api.auth_enable:
-        app = auth_token.AuthProtocol(app, dict(CONF.keystone_authtoken))
+        authed = auth_token.AuthProtocol(app, dict(CONF.keystone_authtoken))
+        if CONF.metrics.enabled:
+            # Prometheus scrapers carry no keystone token
+            return Unauthenticated(app, authed, ['/metrics'])
+        app = authed
 
     return app
@@ -1,10 +1,17 @@
 from flask_restful import Resource
 from flask import request, g
 import json
+from oslo_utils import strutils
 
+from flocx_market.api import utils
+from flocx_market.api import watch
 from flocx_market.objects import bid
 from flocx_market.common import exception
 from flocx_market.common import policy
+from flocx_market.common import statuses
+import flocx_market.conf
+
+CONF = flocx_market.conf.CONF
 
 
 class Bid(Resource):
@@ -15,7 +22,10 @@ class Bid(Resource):
 
         if bid_id is None:
             policy.authorize('flocx_market:bid:get_all', cdict, cdict)
-            return [x.to_dict() for x in bid.Bid.get_all(g.context)]
+            bids = bid.Bid.get_all(g.context)
+            if strutils.bool_from_string(request.args.get('history')):
+                bids = bids + bid.Bid.get_all_archived(g.context)
+            return [x.to_dict() for x in bids]
         try:
             policy.authorize('flocx_market:bid:get', cdict, cdict)
             return bid.Bid.get(bid_id, g.context).to_dict()
@@ -60,3 +70,29 @@ class Bid(Resource):
             return b.to_dict()
         except exception.MarketplaceException as e:
             return json.dumps(e.message), e.code
+
+
+class BidWatch(Resource):
+
+    @classmethod
+    def get(cls, bid_id):
+        """Wait until the bid's status is other than ?status=, or the
+        status it has now, for up to ?timeout= seconds.
+
+        Returns the bid once it changes, 204 if it didn't in time.
+        """
+        cdict = g.context.to_policy_values()
+        policy.authorize('flocx_market:bid:get', cdict, cdict)
+
+        try:
+            changed = watch.watch(
+                statuses.BID, bid_id,
+                lambda: bid.Bid.get(bid_id, g.context),
+                status=request.args.get('status'),
+                timeout=utils.int_arg('timeout',
+                                      CONF.api.watch_max_timeout))
+        except exception.MarketplaceException as e:
+            return json.dumps(e.message), e.code
+        if changed is None:
+            return '', 204
+        return changed.to_dict()
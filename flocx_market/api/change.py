@@ -0,0 +1,33 @@
+from flask_restful import Resource
+from flask import g
+import json
+
+from flocx_market.api import utils
+from flocx_market.objects import change
+from flocx_market.common import exception
+from flocx_market.common import policy
+import flocx_market.conf
+
+CONF = flocx_market.conf.CONF
+
+
+class Change(Resource):
+
+    @classmethod
+    def get(cls):
+        """List the change log entries after ?since=<seq>, oldest first.
+
+        'next' is the seq to pass as since to read on from this page.
+        """
+        cdict = g.context.to_policy_values()
+        policy.authorize('flocx_market:change:get_all', cdict, cdict)
+
+        try:
+            since = utils.int_arg('since', 0)
+            limit = min(utils.int_arg('limit', CONF.api.max_limit),
+                        CONF.api.max_limit)
+            changes = change.Change.get_since(g.context, since, limit)
+        except exception.MarketplaceException as e:
+            return json.dumps(e.message), e.code
+        return {'changes': [x.to_dict() for x in changes],
+                'next': changes[-1].seq if changes else since}
@@ -1,10 +1,17 @@
 from flask_restful import Resource
 from flask import request, g
 import json
+from oslo_utils import strutils
 
+from flocx_market.api import utils
+from flocx_market.api import watch
 from flocx_market.objects import contract
 from flocx_market.common import exception
 from flocx_market.common import policy
+from flocx_market.common import statuses
+import flocx_market.conf
+
+CONF = flocx_market.conf.CONF
 
 
 class Contract(Resource):
@@ -15,7 +22,11 @@ class Contract(Resource):
 
         if contract_id is None:
             policy.authorize('flocx_market:contract:get_all', cdict, cdict)
-            return [x.to_dict() for x in contract.Contract.get_all(g.context)]
+            contracts = contract.Contract.get_all(g.context)
+            if strutils.bool_from_string(request.args.get('history')):
+                contracts = contracts + contract.Contract.get_all_archived(
+                    g.context)
+            return [x.to_dict() for x in contracts]
         try:
             policy.authorize('flocx_market:contract:get', cdict, cdict)
             return contract.Contract.get(contract_id, g.context).to_dict()
@@ -60,3 +71,29 @@ class Contract(Resource):
             return c.to_dict()
         except exception.MarketplaceException as e:
             return json.dumps(e.message), e.code
+
+
+class ContractWatch(Resource):
+
+    @classmethod
+    def get(cls, contract_id):
+        """Wait until the contract's status is other than ?status=, or the
+        status it has now, for up to ?timeout= seconds.
+
+        Returns the contract once it changes, 204 if it didn't in time.
+        """
+        cdict = g.context.to_policy_values()
+        policy.authorize('flocx_market:contract:get', cdict, cdict)
+
+        try:
+            changed = watch.watch(
+                statuses.CONTRACT, contract_id,
+                lambda: contract.Contract.get(contract_id, g.context),
+                status=request.args.get('status'),
+                timeout=utils.int_arg('timeout',
+                                      CONF.api.watch_max_timeout))
+        except exception.MarketplaceException as e:
+            return json.dumps(e.message), e.code
+        if changed is None:
+            return '', 204
+        return changed.to_dict()
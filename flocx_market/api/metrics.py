@@ -0,0 +1,12 @@
+from flask import make_response
+from flask_restful import Resource
+
+from flocx_market.common import metrics
+
+
+class Metrics(Resource):
+    @classmethod
+    def get(cls):
+        response = make_response(metrics.generate_latest())
+        response.headers['Content-Type'] = metrics.CONTENT_TYPE
+        return response
@@ -1,6 +1,7 @@
 from flask_restful import Resource
 from flask import request, g
 import json
+from oslo_utils import strutils
 
 from flocx_market.objects import offer
 from flocx_market.common import exception
@@ -15,7 +16,10 @@ class Offer(Resource):
 
         if offer_id is None:
             policy.authorize('flocx_market:offer:get_all', cdict, cdict)
-            return [x.to_dict() for x in offer.Offer.get_all(g.context)]
+            offers = offer.Offer.get_all(g.context)
+            if strutils.bool_from_string(request.args.get('history')):
+                offers = offers + offer.Offer.get_all_archived(g.context)
+            return [x.to_dict() for x in offers]
         try:
             policy.authorize('flocx_market:offer:get', cdict, cdict)
             return offer.Offer.get(offer_id, g.context).to_dict()
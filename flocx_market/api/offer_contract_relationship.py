@@ -1,6 +1,7 @@
 from flask_restful import Resource
 from flask import request, g
 import json
+from oslo_utils import strutils
 
 from flocx_market.objects import offer_contract_relationship as ocr
 from flocx_market.common import exception
@@ -40,6 +41,9 @@ class OfferContractRelationship(Resource):
                     filters[key] = value
 
             ocrs = ocr.OfferContractRelationship.get_all(g.context, filters)
+            if strutils.bool_from_string(request.args.get('history')):
+                ocrs = ocrs + ocr.OfferContractRelationship \
+                    .get_all_archived(g.context, filters)
             if ocrs is None:
                 return {'message': 'OfferContractRelationship not found'}, 404
 
@@ -14,6 +14,7 @@ from oslo_concurrency import processutils
 from oslo_service import service
 from oslo_service import wsgi
 from flocx_market.api import app
+from flocx_market.common import metrics
 import flocx_market.conf
 
 
@@ -42,6 +43,7 @@ class WSGIService(service.ServiceBase):
 
     def stop(self):
         self.server.stop()
+        metrics.mark_process_dead()
 
     def wait(self):
         self.server.wait()
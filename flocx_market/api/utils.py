@@ -0,0 +1,15 @@
+from flask import request
+
+from flocx_market.common import exception
+
+
+def int_arg(name, default):
+    """Return query argument name as a non-negative int."""
+    value = request.args.get(name, default)
+    try:
+        value = int(value)
+    except ValueError:
+        raise exception.InvalidParameter(value=value, name=name)
+    if value < 0:
+        raise exception.InvalidParameter(value=value, name=name)
+    return value
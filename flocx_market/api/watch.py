@@ -0,0 +1,136 @@
+"""Long-poll watches on the status of contracts and bids.
+
+Each API process has one ChangeHub. While any request is watching, the
+hub's thread reads the change log (see objects/change.py) every
+[api]watch_poll_interval seconds and wakes the requests watching the
+records that changed. The requests only read their own record, when
+they start and when woken, so the database load of watching doesn't
+grow with the number of watchers or how long they wait.
+"""
+
+import contextlib
+import os
+import threading
+import time
+
+from oslo_context import context as ctx
+from oslo_log import log as logging
+
+from flocx_market.common import exception
+from flocx_market.common import metrics
+from flocx_market.common import statuses
+from flocx_market.objects import change
+import flocx_market.conf
+
+CONF = flocx_market.conf.CONF
+LOG = logging.getLogger(__name__)
+
+
+class ChangeHub(object):
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._cursor = change.ChangeCursor()
+        self._cursor_lock = threading.Lock()
+        self._context = ctx.RequestContext(is_admin=True, overwrite=False)
+        self._waiters = {}
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._pid = None
+
+    def _start(self):
+        # forked API workers each start their own thread
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            thread = threading.Thread(target=self._run,
+                                      name='flocx-market-change-hub')
+            thread.daemon = True
+            thread.start()
+
+    def _run(self):
+        while True:
+            self._active.wait()
+            try:
+                self.poll()
+            except Exception:
+                LOG.exception("Could not read the change log")
+            time.sleep(self.interval)
+
+    def poll(self):
+        """Wake the watchers of every record changed since the last
+        poll."""
+        with self._cursor_lock:
+            for entry in self._cursor.read_all(self._context):
+                self.notify(entry.resource_type, entry.resource_id)
+
+    def notify(self, resource_type, resource_id):
+        with self._lock:
+            for event in self._waiters.get((resource_type, resource_id),
+                                           ()):
+                event.set()
+
+    @contextlib.contextmanager
+    def watching(self, resource_type, resource_id):
+        """Yield an event that is set whenever the record changes.
+
+        Read the record only once inside the block, so that no change
+        falls between the read and the registration.
+        """
+        key = (resource_type, resource_id)
+        event = threading.Event()
+        with self._lock:
+            self._start()
+            resume = not self._waiters
+            self._waiters.setdefault(key, set()).add(event)
+        metrics.API_WATCHERS.inc()
+        try:
+            if resume:
+                # changes written while nobody watched concern nobody
+                with self._cursor_lock:
+                    self._cursor.skip_to_end(self._context)
+                self._active.set()
+            yield event
+        finally:
+            metrics.API_WATCHERS.dec()
+            with self._lock:
+                waiters = self._waiters[key]
+                waiters.discard(event)
+                if not waiters:
+                    del self._waiters[key]
+                if not self._waiters:
+                    self._active.clear()
+
+
+_hub = None
+
+
+def get_hub():
+    global _hub
+    if _hub is None:
+        _hub = ChangeHub(CONF.api.watch_poll_interval)
+    return _hub
+
+
+def watch(resource_type, resource_id, get, status=None, timeout=None):
+    """Wait until the record's status is other than status.
+
+    get() reads the record. status defaults to the status the record
+    has when the watch starts. Returns the record, or None if its status
+    didn't change within timeout seconds.
+    """
+    if status is not None and status not in statuses.ALL:
+        raise exception.InvalidStatus(status=status)
+    if timeout is None:
+        timeout = CONF.api.watch_max_timeout
+    deadline = time.monotonic() + min(timeout, CONF.api.watch_max_timeout)
+    with get_hub().watching(resource_type, resource_id) as changed:
+        record = get()
+        if status is None:
+            status = record.status
+        while record.status == status:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not changed.wait(remaining):
+                return None
+            changed.clear()
+            record = get()
+    return record
@@ -0,0 +1,110 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""Serve the API on native threads, for [api]server_mode = threaded.
+
+flocx-market-api execs main() in a fresh interpreter, because importing
+flocx_market.cmd monkey patches the standard library for eventlet. main()
+binds the API socket and forks [api]api_workers processes that each run
+waitress with [api]threads threads.
+
+initialize_application() builds the application for an external WSGI
+server such as uwsgi or gunicorn instead.
+"""
+
+import os
+import signal
+import socket
+import sys
+
+from oslo_concurrency import processutils
+from oslo_log import log as logging
+import waitress
+
+from flocx_market.api import app
+from flocx_market.common import metrics
+from flocx_market.common import service as flocx_market_service
+import flocx_market.conf
+
+CONF = flocx_market.conf.CONF
+LOG = logging.getLogger(__name__)
+
+
+def initialize_application():
+    flocx_market_service.prepare_service([])
+    return app.create_app(app_name='flocx-market')
+
+
+def listen(host, port, backlog=128):
+    # eventlet's green getaddrinfo takes its arguments positionally only
+    family, _, _, _, address = socket.getaddrinfo(
+        host, port, 0, socket.SOCK_STREAM)[0]
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(address)
+    sock.listen(backlog)
+    return sock
+
+
+def serve(application, sock):
+    waitress.serve(application, sockets=[sock],
+                   threads=CONF.api.threads,
+                   connection_limit=CONF.api.connection_limit,
+                   ident='flocx-market')
+
+
+def run_workers(application, sock, workers):
+    """Fork workers processes serving sock and wait for them to exit."""
+    children = set()
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                serve(application, sock)
+            finally:
+                os._exit(0)
+        children.add(pid)
+
+    def stop(signo, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    while children:
+        pid, status = os.wait()
+        children.discard(pid)
+        metrics.mark_process_dead(pid)
+        if status:
+            LOG.warning("API worker %(pid)d exited with status %(status)d",
+                        {'pid': pid, 'status': status})
+
+
+def main():
+    flocx_market_service.prepare_service(sys.argv)
+    if CONF.api.enable_ssl_api:
+        sys.exit("[api]enable_ssl_api is not supported in threaded server "
+                 "mode; terminate TLS in front of the API")
+    application = app.create_app(app_name='flocx-market')
+    sock = listen(CONF.api.host_ip, CONF.api.port)
+    workers = CONF.api.api_workers or processutils.get_worker_count()
+    LOG.info("Serving the API on %(host)s:%(port)d with %(workers)d "
+             "processes of %(threads)d threads",
+             {'host': CONF.api.host_ip, 'port': CONF.api.port,
+              'workers': workers, 'threads': CONF.api.threads})
+    run_workers(application, sock, workers)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
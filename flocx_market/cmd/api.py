@@ -9,6 +9,7 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
+import os
 import sys
 
 from oslo_service import service
@@ -22,6 +23,12 @@ CONF = flocx_market.conf.CONF
 
 def main():
     flocx_market_service.prepare_service(sys.argv)
+    if CONF.api.server_mode == 'threaded':
+        # importing flocx_market.cmd monkey patched this interpreter for
+        # eventlet, so the threaded server starts in a fresh one
+        os.execv(sys.executable,
+                 [sys.executable, '-m', 'flocx_market.api.wsgi'] +
+                 sys.argv[1:])
     # Build and start the WSGI app
     launcher = service.ProcessLauncher(CONF, restart_method='mutate')
     server = wsgi_service.WSGIService('flocx_market_api')
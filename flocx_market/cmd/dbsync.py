@@ -6,4 +6,4 @@ from flocx_market.db.sqlalchemy import api as db_api
 
 def main():
     flocx_market_service.prepare_service(sys.argv)
-    db_api.setup_db()
+    db_api.upgrade()
@@ -0,0 +1,77 @@
+import datetime
+import sys
+
+from oslo_config import cfg
+from oslo_context import context as ctx
+
+from flocx_market.common import service as flocx_market_service
+import flocx_market.conf
+from flocx_market.db.sqlalchemy import api as db_api
+
+
+CONF = flocx_market.conf.CONF
+
+purge_opts = [
+    cfg.IntOpt('archived-before-days',
+               min=0,
+               help="Permanently delete archived rows that were archived \
+                     more than this many days ago."),
+    cfg.BoolOpt('archive',
+                default=False,
+                help="First move expired rows older than \
+                      --archive-after-days to the archive tables, like \
+                      the manager's periodic task does."),
+    cfg.IntOpt('archive-after-days',
+               min=1,
+               help="Archive rows that expired more than this many days \
+                     ago. Defaults to [manager]archive_after_days, which \
+                     disables archiving when 0."),
+    cfg.IntOpt('batch-size',
+               min=1,
+               help="Rows of each table handled per transaction. Defaults \
+                     to [manager]archive_batch_size."),
+]
+
+
+def _run_batches(func, before, batch_size):
+    context = ctx.RequestContext(is_admin=True)
+    totals = {}
+    while True:
+        counts = func(context, before, batch_size)
+        for table, count in counts.items():
+            totals[table] = totals.get(table, 0) + count
+        if not any(counts.values()):
+            return totals
+
+
+def _print_totals(action, totals):
+    for table, count in sorted(totals.items()):
+        print("%s %d rows from %s" % (action, count, table))
+
+
+def main():
+    CONF.register_cli_opts(purge_opts)
+    flocx_market_service.prepare_service(sys.argv)
+
+    if not CONF.archive and CONF.archived_before_days is None:
+        sys.exit("Nothing to do, pass --archive and/or "
+                 "--archived-before-days")
+
+    now = datetime.datetime.utcnow()
+    batch_size = CONF.batch_size or CONF.manager.archive_batch_size
+    if CONF.archive:
+        days = CONF.archive_after_days or CONF.manager.archive_after_days
+        if not days:
+            sys.exit("Archiving is disabled by [manager]archive_after_days "
+                     "= 0, pass --archive-after-days to archive anyway")
+        before = now - datetime.timedelta(days=days)
+        _print_totals("Archived", _run_batches(db_api.archive_expired,
+                                               before, batch_size))
+    if CONF.archived_before_days is not None:
+        before = now - datetime.timedelta(days=CONF.archived_before_days)
+        _print_totals("Purged", _run_batches(db_api.purge_archive,
+                                             before, batch_size))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -32,3 +32,24 @@ class RequiresAdmin(MarketplaceException):
     code = 403
     msg_fmt = ("You must be an admin to perform this"
                "action on type {resource_type}.")
+
+
+class InvalidStatus(MarketplaceException):
+    code = 400
+    msg_fmt = "{status} is not a valid status."
+
+
+class InvalidStatusTransition(MarketplaceException):
+    code = 409
+    msg_fmt = ("{resource_type} can't go from status {current} to "
+               "{new}.")
+
+
+class InvalidTimestamp(MarketplaceException):
+    code = 400
+    msg_fmt = "{value} is not a valid ISO 8601 timestamp for {field}."
+
+
+class InvalidParameter(MarketplaceException):
+    code = 400
+    msg_fmt = "{value} is not a valid value for {name}."
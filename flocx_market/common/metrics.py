@@ -0,0 +1,174 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Runtime metrics in the Prometheus exposition format.
+
+The API service exports them on /metrics and the manager on a small HTTP
+listener (see the [metrics] options). The API service forks its workers
+from a ProcessLauncher; to aggregate the metrics of every worker, set the
+PROMETHEUS_MULTIPROC_DIR environment variable to an empty, writable
+directory before starting it.
+"""
+
+import functools
+import os
+import time
+
+import prometheus_client
+from prometheus_client import multiprocess
+
+CONTENT_TYPE = prometheus_client.CONTENT_TYPE_LATEST
+
+API_REQUEST_LATENCY = prometheus_client.Histogram(
+    'flocx_market_api_request_duration_seconds',
+    'API request latency',
+    ['method', 'route', 'status'])
+
+API_WATCHERS = prometheus_client.Gauge(
+    'flocx_market_api_watchers',
+    'Watch requests waiting for a status change',
+    multiprocess_mode='livesum')
+
+DB_CALL_LATENCY = prometheus_client.Histogram(
+    'flocx_market_db_call_duration_seconds',
+    'Latency of the database API functions',
+    ['function'])
+
+TASK_DURATION = prometheus_client.Histogram(
+    'flocx_market_manager_task_duration_seconds',
+    'Duration of the manager periodic tasks',
+    ['task'],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600))
+
+TASK_SKIPPED_RUNS = prometheus_client.Counter(
+    'flocx_market_manager_task_skipped_runs',
+    'Manager task runs skipped because the previous run was still going',
+    ['task'])
+
+TASK_INTERVAL = prometheus_client.Gauge(
+    'flocx_market_manager_task_interval_seconds',
+    'Delay chosen before the next run of each manager task',
+    ['task'])
+
+TASK_IDLE_TICKS = prometheus_client.Counter(
+    'flocx_market_manager_task_idle_ticks',
+    'Manager task runs left out because nothing they read had changed',
+    ['task'])
+
+MATCHER_BIDS_EVALUATED = prometheus_client.Counter(
+    'flocx_market_matcher_bids_evaluated',
+    'Bids the matcher tried to find offers for')
+
+MATCHER_OFFERS_EVALUATED = prometheus_client.Counter(
+    'flocx_market_matcher_offers_evaluated',
+    'Offers the matcher evaluated against bid specs')
+
+EXPIRED = prometheus_client.Counter(
+    'flocx_market_expired',
+    'Offers, bids and contracts expired by the manager',
+    ['resource_type'])
+
+ARCHIVED = prometheus_client.Counter(
+    'flocx_market_archived',
+    'Expired rows moved to the archive tables',
+    ['table'])
+
+CHANGES_COMPACTED = prometheus_client.Counter(
+    'flocx_market_changes_compacted',
+    'Change log entries deleted by the manager')
+
+IRONIC_CALL_LATENCY = prometheus_client.Histogram(
+    'flocx_market_ironic_call_duration_seconds',
+    'Latency of Ironic API calls',
+    ['operation'])
+
+IRONIC_TOKEN_FETCH_LATENCY = prometheus_client.Histogram(
+    'flocx_market_ironic_token_fetch_duration_seconds',
+    'Latency of fetching a keystone token for Ironic calls')
+
+IRONIC_AUTHENTICATED_REQUESTS = prometheus_client.Counter(
+    'flocx_market_ironic_authenticated_requests',
+    'Ironic requests sent with a token, fetched or reused')
+
+
+def timed(histogram, **labels):
+    """Decorator observing the duration of each call in histogram."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with histogram.labels(**labels).time():
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timed_iter(histogram, **labels):
+    """Decorator for functions returning an iterator, observing the time
+    spent producing its items. The time the caller spends between items
+    is left out; the total is observed once the iterator is exhausted or
+    closed."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            elapsed = 0.0
+            start = time.perf_counter()
+            try:
+                items = iter(func(*args, **kwargs))
+                while True:
+                    try:
+                        item = next(items)
+                    except StopIteration:
+                        return
+                    elapsed += time.perf_counter() - start
+                    start = None
+                    yield item
+                    start = time.perf_counter()
+            finally:
+                if start is not None:
+                    elapsed += time.perf_counter() - start
+                histogram.labels(**labels).observe(elapsed)
+        return wrapper
+    return decorator
+
+
+def db_timed(func):
+    return timed(DB_CALL_LATENCY, function=func.__name__)(func)
+
+
+def db_timed_iter(func):
+    return timed_iter(DB_CALL_LATENCY, function=func.__name__)(func)
+
+
+def _multiprocess_dir():
+    return os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+
+def get_registry():
+    if _multiprocess_dir():
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return prometheus_client.REGISTRY
+
+
+def generate_latest():
+    return prometheus_client.generate_latest(get_registry())
+
+
+def start_http_server(port, addr='0.0.0.0'):
+    prometheus_client.start_http_server(port, addr=addr,
+                                        registry=get_registry())
+
+
+def mark_process_dead(pid=None):
+    if _multiprocess_dir():
+        multiprocess.mark_process_dead(pid or os.getpid())
@@ -81,6 +81,14 @@ contract_policies = [
         [{'path': '/contract', 'method': 'PUT'}]),
 ]
 
+change_policies = [
+    policy.DocumentedRuleDefault(
+        'flocx_market:change:get_all',
+        'rule:is_admin',
+        'Retrieve the change log',
+        [{'path': '/changes', 'method': 'GET'}]),
+]
+
 offer_policies = [
     policy.DocumentedRuleDefault(
         'flocx_market:offer:create',
@@ -141,6 +149,7 @@ def list_rules():
     policies = itertools.chain(
         default_policies,
         bid_policies,
+        change_policies,
         contract_policies,
         offer_policies,
         ocr_policies,
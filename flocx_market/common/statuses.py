@@ -15,3 +15,54 @@ AVAILABLE = 'available'
 CLAIMED = 'claimed'
 FULFILLED = 'fulfilled'
 EXPIRED = 'expired'
+
+# statuses are stored as these small integers; never reuse a code
+CODES = {
+    AVAILABLE: 1,
+    CLAIMED: 2,
+    FULFILLED: 3,
+    EXPIRED: 4,
+}
+NAMES = {code: name for name, code in CODES.items()}
+
+ALL = tuple(CODES)
+# every status but EXPIRED; queries for live records list these rather
+# than excluding EXPIRED so that they can be served by an index
+ACTIVE = (AVAILABLE, CLAIMED, FULFILLED)
+
+OFFER = 'offer'
+BID = 'bid'
+CONTRACT = 'contract'
+OFFER_CONTRACT_RELATIONSHIP = 'offer_contract_relationship'
+
+# the statuses each kind of record may move to from a given status;
+# setting a record to the status it already has is always allowed
+TRANSITIONS = {
+    OFFER: {
+        AVAILABLE: (EXPIRED,),
+    },
+    BID: {
+        AVAILABLE: (CLAIMED, EXPIRED),
+        CLAIMED: (EXPIRED,),
+    },
+    CONTRACT: {
+        AVAILABLE: (FULFILLED, EXPIRED),
+        FULFILLED: (EXPIRED,),
+    },
+    OFFER_CONTRACT_RELATIONSHIP: {
+        AVAILABLE: (FULFILLED, EXPIRED),
+        FULFILLED: (EXPIRED,),
+    },
+}
+
+
+def can_transition(resource_type, current, new):
+    if current == new:
+        return True
+    return new in TRANSITIONS[resource_type].get(current, ())
+
+
+def sources(resource_type, new):
+    """Statuses from which a record may be set to `new`."""
+    return tuple(status for status in ALL
+                 if can_transition(resource_type, status, new))
@@ -6,6 +6,10 @@ from flocx_market.conf import ironic
 from flocx_market.conf import netconf
 from flocx_market.conf import flask
 from flocx_market.conf import manager
+from flocx_market.conf import metrics
+from flocx_market.conf import profiling
+from flocx_market.conf import resource
+from flocx_market.conf import simulated_node
 
 
 CONF = cfg.CONF
@@ -18,3 +22,7 @@ ironic.register_opts(CONF)
 netconf.register_opts(CONF)
 flask.register_opts(CONF)
 manager.register_opts(CONF)
+metrics.register_opts(CONF)
+profiling.register_opts(CONF)
+resource.register_opts(CONF)
+simulated_node.register_opts(CONF)
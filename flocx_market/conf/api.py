@@ -9,11 +9,53 @@ opts = [
     cfg.IntOpt('max_limit',
                default=1000),
     cfg.StrOpt('public_endpoint'),
-    cfg.IntOpt('api_workers'),
+    cfg.IntOpt('api_workers',
+               help="Number of API processes. Defaults to the number of \
+                     CPUs."),
+    cfg.StrOpt('server_mode',
+               default='eventlet',
+               choices=[('eventlet', "Each API process serves up to \
+                         [DEFAULT]wsgi_default_pool_size requests at once \
+                         on eventlet green threads. They only take \
+                         turns while waiting on sockets, so a database \
+                         driver written in C, such as SQLite's, blocks \
+                         every request of its process."),
+                        ('threaded', "Each API process serves up to \
+                         [api]threads requests at once on native \
+                         threads, with waitress, without eventlet's \
+                         monkey patching. TLS is not supported; \
+                         terminate it in front of the API.")],
+               help="How the API processes serve concurrent requests."),
+    cfg.IntOpt('threads',
+               default=8,
+               min=1,
+               help="Requests each API process serves at once in threaded \
+                     server mode. Keep api_workers * threads within the \
+                     database's connection limit."),
+    cfg.IntOpt('connection_limit',
+               default=100,
+               min=1,
+               help="Client connections each API process accepts in \
+                     threaded server mode; requests beyond [api]threads \
+                     wait in a queue."),
     cfg.BoolOpt('enable_ssl_api',
                 default=False),
     cfg.BoolOpt('auth_enable',
-                default=True)
+                default=True),
+    cfg.FloatOpt('watch_poll_interval',
+                 default=0.5,
+                 min=0.01,
+                 help="How often, in seconds, each API process reads the \
+                       change log while requests are watching for status \
+                       changes."),
+    cfg.IntOpt('watch_max_timeout',
+               default=30,
+               min=1,
+               help="Longest, in seconds, a watch request waits for a \
+                     status change. Each waiting request holds one of \
+                     the worker's [DEFAULT]wsgi_default_pool_size green \
+                     threads, or in threaded server mode one of its \
+                     [api]threads."),
 ]
 
 api_group = cfg.OptGroup(
@@ -16,6 +16,15 @@ from oslo_config import cfg
 opts = [
     cfg.StrOpt('dummy_node_dir',
                default='/tmp/nodes'),
+    cfg.BoolOpt('fsync',
+                default=True,
+                help='Flush dummy node files and their directory to disk \
+                      after each write. Disabling this makes writes much \
+                      cheaper at the cost of durability on a crash.'),
+    cfg.BoolOpt('preload',
+                default=False,
+                help='Parse every file in dummy_node_dir when the API and \
+                      manager services start, rather than on first use.'),
 ]
 
 dummy_node_group = cfg.OptGroup(
@@ -16,7 +16,26 @@ from keystoneauth1 import loading
 from oslo_config import cfg
 
 
-opts = []
+opts = [
+    cfg.IntOpt('connection_pool_size',
+               default=100,
+               min=1,
+               help='Connections to Ironic kept open for reuse. Requests \
+                     beyond this many in flight still go out, on \
+                     connections that are closed afterwards.'),
+    cfg.BoolOpt('tcp_keepalive',
+                default=True,
+                help='Enable TCP keepalive on connections to Ironic, so \
+                      idle pooled connections are not silently dropped.'),
+    cfg.IntOpt('list_threshold',
+               default=20,
+               min=1,
+               help='Batches of at least this many nodes, such as the \
+                     nodes of an expiring contract, are read with one \
+                     listing of the whole fleet instead of a GET per \
+                     node. A listing reads every node, so set this near \
+                     the batch size at which that is cheaper.'),
+]
 ironic_group = cfg.OptGroup(
     'ironic',
     title='Ironic Options')
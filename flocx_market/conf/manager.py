@@ -3,15 +3,87 @@ from oslo_config import cfg
 
 opts = [
     cfg.IntOpt('update_expire_frequency',
-               default=60,
-               help="The frequency in which the manager's \
-                     expiration periodic tasks will run.\
-                     Enter in seconds"),
+               default=5,
+               help="How often, in seconds, the manager looks for offers, \
+                     bids and contracts created or updated since it last \
+                     looked, to learn when they expire or start. The \
+                     manager expires and fulfills them as each of these \
+                     deadlines passes."),
     cfg.IntOpt('matcher_frequency',
                default=60,
-               help="The frequency in which the manager's \
-                     matcher periodic task will run.\
-                     Enter in seconds")
+               help="The longest, in seconds, the manager's matcher waits \
+                     between passes. The matcher runs again after \
+                     matcher_min_interval while its passes create \
+                     contracts, and doubles its wait up to this value \
+                     while no offer, bid or contract changes."),
+    cfg.FloatOpt('matcher_min_interval',
+                 default=1.0,
+                 min=0,
+                 help="The shortest, in seconds, the manager's matcher \
+                       waits between passes."),
+    cfg.FloatOpt('matcher_max_duty_cycle',
+                 default=0.5,
+                 min=0.01,
+                 max=1,
+                 help="Largest fraction of the time the matcher may spend \
+                       running: after a pass that took t seconds it waits \
+                       at least t * (1 - duty cycle) / duty cycle."),
+    cfg.FloatOpt('task_jitter',
+                 default=0.1,
+                 min=0,
+                 max=1,
+                 help="Fraction by which each manager task's interval is \
+                       randomly lengthened or shortened, so that tasks \
+                       and managers started together drift apart."),
+    cfg.StrOpt('matcher_ranking',
+               default='cost',
+               help="How the matcher ranks the offers matching a bid \
+                     before picking the ones it needs. One of 'cost', \
+                     'start_time' (earliest availability), 'best_fit' \
+                     (least spare capacity) or a policy registered with \
+                     flocx_market.matcher.ranking.register_policy."),
+    cfg.IntOpt('matcher_batch_size',
+               default=100,
+               min=1,
+               help="Number of offers the matcher loads from the database \
+                     at a time while looking for offers matching a bid."),
+    cfg.IntOpt('matcher_workers',
+               default=0,
+               min=0,
+               help="Number of worker processes the matcher spreads spec \
+                     evaluation over. They are started on the first tick \
+                     and kept for later ones. Offers are loaded once per \
+                     tick and bids are split between the workers; offers \
+                     are still assigned to bids one at a time in the \
+                     manager. Values below 2 evaluate specs in the manager \
+                     process."),
+    cfg.IntOpt('archive_frequency',
+               default=3600,
+               help="The frequency in which the manager's archive \
+                     periodic task will run. Enter in seconds"),
+    cfg.IntOpt('archive_after_days',
+               default=30,
+               min=0,
+               help="Number of days after which expired offers, bids, \
+                     contracts and offer contract relationships are \
+                     moved from the live tables to the archive tables. \
+                     0 disables archiving."),
+    cfg.IntOpt('archive_batch_size',
+               default=1000,
+               min=1,
+               help="Maximum number of rows of each table moved to the \
+                     archive in one transaction."),
+    cfg.IntOpt('change_log_frequency',
+               default=3600,
+               help="How often, in seconds, the manager compacts the \
+                     change log."),
+    cfg.IntOpt('change_log_keep_days',
+               default=7,
+               min=0,
+               help="Number of days change log entries are kept before \
+                     the manager deletes them. Consumers reading the \
+                     log less often than this miss changes. 0 keeps \
+                     every entry."),
 ]
 
 manager_group = cfg.OptGroup(
@@ -0,0 +1,40 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_config import cfg
+
+
+opts = [
+    cfg.BoolOpt('enabled',
+                default=True,
+                help="Record API request latency and expose the metrics \
+                      on the /metrics endpoint of the API service. So \
+                      that Prometheus can scrape it, /metrics is served \
+                      without keystone authentication even when \
+                      [api]auth_enable is set; limit who can reach it \
+                      in the network, or disable metrics."),
+    cfg.HostAddressOpt('manager_host',
+                       default='0.0.0.0',
+                       help="Address the manager's metrics listener binds \
+                             to."),
+    cfg.PortOpt('manager_port',
+                help="Port the manager's metrics listener binds to. The \
+                      listener is not started when unset."),
+]
+
+metrics_group = cfg.OptGroup(
+    'metrics',
+    title='Metrics Options')
+
+
+def register_opts(conf):
+    conf.register_opts(opts, group=metrics_group)
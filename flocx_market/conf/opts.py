@@ -7,6 +7,10 @@ _opts = [
     ('flask', flocx_market.conf.flask.opts),
     ('ironic', flocx_market.conf.ironic.list_opts()),
     ('manager', flocx_market.conf.manager.opts),
+    ('metrics', flocx_market.conf.metrics.opts),
+    ('profiling', flocx_market.conf.profiling.opts),
+    ('resource', flocx_market.conf.resource.opts),
+    ('simulated_node', flocx_market.conf.simulated_node.opts),
 ]
 
 
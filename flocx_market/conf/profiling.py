@@ -0,0 +1,64 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_config import cfg
+
+
+opts = [
+    cfg.BoolOpt('count_queries',
+                default=False,
+                help="Count and time the SQL statements run by each API \
+                      request and manager periodic task. API responses \
+                      carry the X-Query-Count and X-Query-Time headers. \
+                      Meant for debugging; adds overhead to every \
+                      statement."),
+    cfg.IntOpt('repeated_query_threshold',
+               default=5,
+               min=2,
+               help="When counting queries, log a warning for statements \
+                     of the same shape run at least this many times in a \
+                     single request or task, which usually means an N+1 \
+                     query pattern."),
+    cfg.StrOpt('profiler',
+               default='cprofile',
+               choices=['cprofile', 'sampling'],
+               help="Profiler used for the manager's periodic tasks. \
+                     cprofile writes pstats files; sampling samples the \
+                     stack every sampling_interval seconds of CPU time \
+                     and writes collapsed stacks for flame graphs."),
+    cfg.FloatOpt('sampling_interval',
+                 default=0.005,
+                 min=0.001,
+                 help="Seconds of CPU time between two stack samples of \
+                       the sampling profiler."),
+    cfg.IntOpt('profile_runs',
+               default=5,
+               min=1,
+               help="Number of periodic task runs the manager profiles \
+                     once profiling is armed, either at startup with \
+                     profile_on_start or by sending it SIGUSR2."),
+    cfg.BoolOpt('profile_on_start',
+                default=False,
+                help="Profile the manager's first profile_runs periodic \
+                      task runs."),
+    cfg.StrOpt('profile_dir',
+               help="Directory the manager writes profiles to. Defaults \
+                     to the system's temporary directory."),
+]
+
+profiling_group = cfg.OptGroup(
+    'profiling',
+    title='Profiling Options')
+
+
+def register_opts(conf):
+    conf.register_opts(opts, group=profiling_group)
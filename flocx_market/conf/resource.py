@@ -0,0 +1,36 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_config import cfg
+
+
+opts = [
+    cfg.IntOpt('snapshot_cache_ttl',
+               default=0,
+               min=0,
+               help="Seconds a snapshot of a resource's config, owner and \
+                     contract is reused before the resource is fetched \
+                     again. Snapshots are dropped as soon as the \
+                     resource's contract is changed by this process, but \
+                     not when its owner is changed elsewhere, and offers \
+                     are authorized against the cached owner; only \
+                     enable it where owners rarely change. 0 disables \
+                     the cache."),
+]
+
+resource_group = cfg.OptGroup(
+    'resource',
+    title='Resource Options')
+
+
+def register_opts(conf):
+    conf.register_opts(opts, group=resource_group)
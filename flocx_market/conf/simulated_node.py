@@ -0,0 +1,33 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_config import cfg
+
+
+opts = [
+    cfg.StrOpt('db_path',
+               default='/tmp/simulated_nodes.sqlite',
+               help='SQLite database holding the simulated node fleet.'),
+    cfg.BoolOpt('synchronous',
+                default=True,
+                help='Wait for SQLite to sync each commit to disk. Turn \
+                      off for a disposable fleet, e.g. when \
+                      benchmarking, to trade durability for speed.'),
+]
+
+simulated_node_group = cfg.OptGroup(
+    'simulated_node',
+    title='Simulated Node Options')
+
+
+def register_opts(conf):
+    conf.register_opts(opts, group=simulated_node_group)
@@ -1,7 +1,14 @@
+from alembic import command as alembic_command
+from alembic import config as alembic_config
 from oslo_db.sqlalchemy import session as db_session
+from oslo_utils import timeutils
 from oslo_utils import uuidutils
+import sqlalchemy as sa
+from sqlalchemy.orm import joinedload
+import datetime
 
 from flocx_market.common import exception
+from flocx_market.common import metrics
 from flocx_market.common import statuses
 import flocx_market.conf
 from flocx_market.db.sqlalchemy import models
@@ -11,6 +18,9 @@ from flocx_market.resource_objects import resource_types
 CONF = flocx_market.conf.CONF
 _engine_facade = None
 
+# how long a seq missing from the change log may still be committing
+CHANGE_SETTLE = datetime.timedelta(seconds=5)
+
 
 def get_facade():
     global _engine_facade
@@ -35,6 +45,21 @@ def setup_db():
     return True
 
 
+def _alembic_config(connection):
+    config = alembic_config.Config()
+    config.set_main_option('script_location', 'flocx_market:migrations')
+    config.attributes['connection'] = connection
+    return config
+
+
+def upgrade(revision='head', engine=None):
+    """Migrate the database schema and data up to revision."""
+    engine = engine or get_facade().get_engine()
+    with engine.begin() as connection:
+        alembic_command.upgrade(_alembic_config(connection), revision)
+    return True
+
+
 def drop_db():
     engine = db_session.EngineFacade(CONF.database.connection,
                                      sqlite_fk=True).get_engine()
@@ -42,6 +67,49 @@ def drop_db():
     return True
 
 
+def _check_status_filter(filters):
+    # the status column only stores known codes, an unknown name would
+    # fail while binding the query
+    status = filters.get('status')
+    if status is not None and status not in statuses.ALL:
+        raise exception.InvalidStatus(status=status)
+
+
+def _change(action, ref):
+    primary_key = list(ref.__table__.primary_key.columns)[0]
+    return dict(action=action,
+                resource_type=ref.status_resource_type,
+                resource_id=getattr(ref, primary_key.name),
+                status=ref.status,
+                project_id=getattr(ref, 'project_id', None))
+
+
+def _record_changes(session, changes):
+    # in the caller's transaction, so that the log holds exactly the
+    # writes that were committed
+    if changes:
+        session.execute(models.Change.__table__.insert(), changes)
+
+
+def _save(ref, action):
+    """Save ref and log the write in one transaction."""
+    session = get_session()
+    with session.begin():
+        ref.save(session)
+        _record_changes(session, [_change(action, ref)])
+    return ref
+
+
+def _delete(query, ref):
+    """Delete the rows of query, which holds ref, and log the delete in
+    one transaction."""
+    session = get_session()
+    with session.begin():
+        query.with_session(session).delete()
+        _record_changes(session, [_change('delete', ref)])
+
+
+@metrics.db_timed
 def offer_get(offer_id, context):
 
     offer_ref = get_session().query(models.Offer).filter_by(
@@ -54,15 +122,18 @@ def offer_get(offer_id, context):
                                          resource_uuid=offer_id)
 
 
+@metrics.db_timed
 def offer_get_all(context):
     return get_session().query(models.Offer).all()
 
 
+@metrics.db_timed
 def offer_get_all_by_project_id(context):
     return get_session().query(models.Offer).filter_by(
         project_id=context.project_id).all()
 
 
+@metrics.db_timed
 def offer_get_all_by_resource_id(context,
                                  resource_id,
                                  status=None):
@@ -73,30 +144,109 @@ def offer_get_all_by_resource_id(context,
     return query.all()
 
 
+@metrics.db_timed
 def offer_get_all_unexpired(context):
     if context.is_admin:
         return get_session().query(models.Offer).filter(
-            models.Offer.status != statuses.EXPIRED).all()
+            models.Offer.status.in_(statuses.ACTIVE)).all()
     else:
         return get_session().query(models.Offer).filter(
-            models.Offer.status != statuses.EXPIRED,
+            models.Offer.status.in_(statuses.ACTIVE),
             models.Offer.project_id == context.project_id).all()
 
 
-def offer_get_all_by_status(status, context):
-    if context.is_admin:
-        return get_session().query(models.Offer)\
-                            .filter_by(status=status).all()
-    return get_session().query(models.Offer)\
-        .filter(models.Offer.status == status, models.Offer.project_id ==
-                context.project_id).all()
+_SQL_NUMERIC_OPS = {
+    '==': lambda column, val: column == val,
+    '<': lambda column, val: column < val,
+    '<=': lambda column, val: column <= val,
+    '>': lambda column, val: column > val,
+    '>=': lambda column, val: column >= val,
+}
+
+
+def _offer_config_spec_clause(spec):
+    key, op, val = spec[0], spec[1], spec[2]
+    if key not in models.OFFER_CONFIG_COLUMNS:
+        return None
+    column_name, col_type = models.OFFER_CONFIG_COLUMNS[key]
+    column = getattr(models.Offer, column_name)
+
+    if col_type is float and op in _SQL_NUMERIC_OPS:
+        try:
+            val = float(val)
+        except (TypeError, ValueError):
+            return None
+        return _SQL_NUMERIC_OPS[op](column, val)
+
+    if col_type is str:
+        if op == 'eq':
+            return column == str(val)
+        if (op == 'in' and isinstance(val, (list, tuple))
+                and all(isinstance(v, str) for v in val)):
+            return column.in_(val)
+
+    return None
+
+
+def offer_split_config_specs(specs):
+    """Split match specs into those that can be evaluated in SQL against
+    the denormalized offer config columns and those that can't."""
+    sql_specs = []
+    python_specs = []
+    for spec in specs or []:
+        if _offer_config_spec_clause(spec) is not None:
+            sql_specs.append(spec)
+        else:
+            python_specs.append(spec)
+    return sql_specs, python_specs
+
+
+def _offer_by_status_query(status, context, specs=None, order_by=None):
+    query = get_session().query(models.Offer).filter_by(status=status)
+    if not context.is_admin:
+        query = query.filter(models.Offer.project_id == context.project_id)
+
+    # specs that can't be expressed in SQL are left to the caller
+    for spec in specs or []:
+        clause = _offer_config_spec_clause(spec)
+        if clause is not None:
+            query = query.filter(clause)
+
+    for column in order_by or []:
+        query = query.order_by(getattr(models.Offer, column))
+    return query
+
+
+@metrics.db_timed
+def offer_get_all_by_status(status, context, specs=None, order_by=None):
+    return _offer_by_status_query(
+        status, context, specs=specs, order_by=order_by).all()
+
+
+@metrics.db_timed_iter
+def offer_iter_by_status(status, context, specs=None, order_by=None,
+                         batch_size=100):
+    """Like offer_get_all_by_status, but loads offers in batches of
+    batch_size as the result is iterated instead of all at once."""
+    return iter(_offer_by_status_query(
+        status, context, specs=specs, order_by=order_by).yield_per(
+            batch_size))
 
 
-def offer_create(values, context):
+@metrics.db_timed
+def offer_get_related_contracts(context, offer_id):
+    return get_session().query(models.Contract)\
+        .join(models.Contract.offer_contract_relationships)\
+        .filter(models.OfferContractRelationship.offer_id == offer_id).all()
+
+
+@metrics.db_timed
+def offer_create(values, context, resource=None):
     resource_id = values['resource_id']
     resource_type = values.get('resource_type', resource_types.IRONIC_NODE)
-    resource = ro_factory.ResourceObjectFactory.get_resource_object(
-        resource_type, resource_id)
+    if resource is None:
+        resource = ro_factory.ResourceObjectFactory.get_resource_object(
+            resource_type, resource_id)
 
     if not resource.is_resource_admin(context.project_id):
         raise exception.ResourceNoPermission(
@@ -114,10 +264,10 @@ def offer_create(values, context):
     values['project_id'] = context.project_id
     offer_ref = models.Offer()
     offer_ref.update(values)
-    offer_ref.save(get_session())
-    return offer_ref
+    return _save(offer_ref, 'create')
 
 
+@metrics.db_timed
 def offer_update(offer_id, values, context):
     offer_ref = get_session().query(models.Offer).filter_by(
         offer_id=offer_id).one_or_none()
@@ -129,13 +279,13 @@ def offer_update(offer_id, values, context):
                                             resource_uuid=offer_id)
         values.pop('offer_id', None)
         offer_ref.update(values)
-        offer_ref.save(get_session())
-        return offer_ref
+        return _save(offer_ref, 'update')
     else:
         raise exception.ResourceNotFound(resource_type="Offer",
                                          resource_uuid=offer_id)
 
 
+@metrics.db_timed
 def offer_destroy(offer_id, context):
     offer_ref = get_session().query(models.Offer).filter_by(
         offer_id=offer_id).one_or_none()
@@ -147,17 +297,18 @@ def offer_destroy(offer_id, context):
                                             resource_uuid=offer_id)
 
         if context.is_admin:
-            get_session().query(models.Offer).filter_by(
-                offer_id=offer_id).delete()
+            _delete(get_session().query(models.Offer).filter_by(
+                offer_id=offer_id), offer_ref)
         else:
-            get_session().query(models.Offer).filter_by(
+            _delete(get_session().query(models.Offer).filter_by(
                 offer_id=offer_id,
-                project_id=context.project_id).delete()
+                project_id=context.project_id), offer_ref)
     else:
         raise exception.ResourceNotFound(resource_type="Offer",
                                          resource_uuid=offer_id)
 
 
+@metrics.db_timed
 def bid_get(bid_id, context):
 
     bid_ref = get_session().query(models.Bid).filter_by(
@@ -170,20 +321,24 @@ def bid_get(bid_id, context):
                                          resource_uuid=bid_id)
 
 
+@metrics.db_timed
 def bid_get_all(context):
     return get_session().query(models.Bid).all()
 
 
+@metrics.db_timed
 def bid_get_all_by_project_id(context):
     return get_session().query(models.Bid)\
         .filter_by(project_id=context.project_id).all()
 
 
+@metrics.db_timed
 def bid_get_all_unexpired(context):
     return get_session().query(models.Bid)\
-        .filter(models.Bid.status != statuses.EXPIRED).all()
+        .filter(models.Bid.status.in_(statuses.ACTIVE)).all()
 
 
+@metrics.db_timed
 def bid_get_all_by_status(status, context):
     if context.is_admin:
         return get_session().query(models.Bid)\
@@ -193,15 +348,27 @@ def bid_get_all_by_status(status, context):
                 context.project_id).all()
 
 
+@metrics.db_timed
+def bid_get_contracts(context, bid_id):
+    bid_ref = get_session().query(models.Bid)\
+        .options(joinedload(models.Bid.contracts))\
+        .filter_by(bid_id=bid_id).one_or_none()
+    if bid_ref is None:
+        raise exception.ResourceNotFound(resource_type="Bid",
+                                         resource_uuid=bid_id)
+    return bid_ref.contracts
+
+
+@metrics.db_timed
 def bid_create(values, context):
     values['bid_id'] = uuidutils.generate_uuid()
     values['project_id'] = context.project_id
     bid_ref = models.Bid()
     bid_ref.update(values)
-    bid_ref.save(get_session())
-    return bid_ref
+    return _save(bid_ref, 'create')
 
 
+@metrics.db_timed
 def bid_update(bid_id, values, context):
     if context.is_admin:
         bid_ref = get_session().query(models.Bid).filter_by(
@@ -218,13 +385,13 @@ def bid_update(bid_id, values, context):
 
         values.pop('bid_id', None)
         bid_ref.update(values)
-        bid_ref.save(get_session())
-        return bid_ref
+        return _save(bid_ref, 'update')
     else:
         raise exception.ResourceNotFound(resource_type="Bid",
                                          resource_uuid=bid_id)
 
 
+@metrics.db_timed
 def bid_destroy(bid_id, context):
     if context.is_admin:
         bid_ref = get_session().query(models.Bid).filter_by(
@@ -240,18 +407,19 @@ def bid_destroy(bid_id, context):
                                             resource_uuid=bid_id)
 
         if context.is_admin:
-            get_session().query(models.Bid).filter_by(
-                bid_id=bid_id).delete()
+            _delete(get_session().query(models.Bid).filter_by(
+                bid_id=bid_id), bid_ref)
         else:
-            get_session().query(models.Bid).filter_by(
+            _delete(get_session().query(models.Bid).filter_by(
                 bid_id=bid_id,
-                project_id=context.project_id).delete()
+                project_id=context.project_id), bid_ref)
     else:
         raise exception.ResourceNotFound(resource_type="Bid",
                                          resource_uuid=bid_id)
 
 
 # contract
+@metrics.db_timed
 def contract_get(contract_id, context):
 
     contract_ref = get_session().query(models.Contract).filter_by(
@@ -264,10 +432,12 @@ def contract_get(contract_id, context):
                                          resource_uuid=contract_id)
 
 
+@metrics.db_timed
 def contract_get_all(context):
     return get_session().query(models.Contract).all()
 
 
+@metrics.db_timed
 def contract_get_all_by_status(context, status):
     if context.is_admin:
         return get_session().query(models.Contract)\
@@ -278,11 +448,21 @@ def contract_get_all_by_status(context, status):
             models.Contract.project_id == context.project_id).all()
 
 
+@metrics.db_timed
 def contract_get_all_unexpired(context):
     return get_session().query(models.Contract)\
-        .filter(models.Contract.status != statuses.EXPIRED).all()
+        .filter(models.Contract.status.in_(statuses.ACTIVE)).all()
 
 
+@metrics.db_timed
+def contract_get_offers(context, contract_id):
+    return get_session().query(models.Offer)\
+        .join(models.Offer.offer_contract_relationships)\
+        .filter(models.OfferContractRelationship.contract_id
+                == contract_id).all()
+
+
+@metrics.db_timed
 def contract_create(values, context):
 
     if context.is_admin:
@@ -293,19 +473,25 @@ def contract_create(values, context):
         del values['offers']
         contract_ref = models.Contract()
         contract_ref.update(values)
-        contract_ref.save(get_session())
-        # update foreign key for offers
-        for offer_id in offers:
-            ocr_data = dict(contract_id=values['contract_id'],
-                            offer_id=offer_id,
-                            status=statuses.AVAILABLE)
-            offer_contract_relationship_create(context, ocr_data)
+        session = get_session()
+        with session.begin():
+            contract_ref.save(session)
+            changes = [_change('create', contract_ref)]
+            # update foreign key for offers
+            for offer_id in offers:
+                ocr_ref = _offer_contract_relationship_create(
+                    session, dict(contract_id=values['contract_id'],
+                                  offer_id=offer_id,
+                                  status=statuses.AVAILABLE))
+                changes.append(_change('create', ocr_ref))
+            _record_changes(session, changes)
         return contract_ref
     else:
         raise exception.RequiresAdmin(
             resource_type="Contract")
 
 
+@metrics.db_timed
 def contract_update(contract_id, values, context):
 
     if context.is_admin:
@@ -314,8 +500,7 @@ def contract_update(contract_id, values, context):
         if contract_ref:
             values.pop('contract_id', None)
             contract_ref.update(values)
-            contract_ref.save(get_session())
-            return contract_ref
+            return _save(contract_ref, 'update')
         else:
             raise exception.ResourceNotFound(resource_type="Contract",
                                              resource_uuid=contract_id)
@@ -324,12 +509,13 @@ def contract_update(contract_id, values, context):
                                              resource_uuid=contract_id)
 
 
+@metrics.db_timed
 def contract_destroy(contract_id, context):
     if context.is_admin:
         contract_ref = contract_get(contract_id, context)
         if contract_ref:
-            get_session().query(models.Contract).filter_by(
-                contract_id=contract_id).delete()
+            _delete(get_session().query(models.Contract).filter_by(
+                contract_id=contract_id), contract_ref)
         else:
             raise exception.ResourceNotFound(resource_type="Contract",
                                              resource_uuid=contract_id)
@@ -339,6 +525,7 @@ def contract_destroy(contract_id, context):
 
 
 # offer_contract_relationship
+@metrics.db_timed
 def offer_contract_relationship_get(context,
                                     offer_contract_relationship_id=None):
 
@@ -356,35 +543,57 @@ def offer_contract_relationship_get(context,
             resource_uuid=offer_contract_relationship_id)
 
 
+@metrics.db_timed
 def offer_contract_relationship_get_all(context, filters=None):
     query = get_session().query(models.OfferContractRelationship)
     if filters is not None:
+        _check_status_filter(filters)
         for field in ['offer_id', 'contract_id', 'status']:
             if field in filters:
                 query = query.filter_by(**{field: filters[field]})
     return query.all()
 
 
+@metrics.db_timed
+def offer_contract_relationship_get_all_with_offers(context, contract_id):
+    """Return the relationships of a contract with their offers loaded
+    in the same query."""
+    return get_session().query(models.OfferContractRelationship)\
+        .options(joinedload(models.OfferContractRelationship.offer))\
+        .filter_by(contract_id=contract_id).all()
+
+
+@metrics.db_timed
 def offer_contract_relationship_get_all_unexpired(context):
     return get_session().query(models.OfferContractRelationship)\
-        .filter(
-            models.OfferContractRelationship.status != statuses.EXPIRED).all()
+        .filter(models.OfferContractRelationship.status.in_(
+            statuses.ACTIVE)).all()
 
 
+def _offer_contract_relationship_create(session, values):
+    values['offer_contract_relationship_id'] = uuidutils.generate_uuid()
+    # exception for foreign key constraint needed here
+    offer_contract_relationship_ref = models.OfferContractRelationship()
+    offer_contract_relationship_ref.update(values)
+    offer_contract_relationship_ref.save(session)
+    return offer_contract_relationship_ref
+
+
+@metrics.db_timed
 def offer_contract_relationship_create(context, values):
 
     if context.is_admin:
-        values['offer_contract_relationship_id'] = uuidutils.generate_uuid()
-        # exception for foreign key constraint needed here
-        offer_contract_relationship_ref = models.OfferContractRelationship()
-        offer_contract_relationship_ref.update(values)
-        offer_contract_relationship_ref.save(get_session())
-        return offer_contract_relationship_ref
+        session = get_session()
+        with session.begin():
+            ref = _offer_contract_relationship_create(session, values)
+            _record_changes(session, [_change('create', ref)])
+        return ref
     else:
         raise exception.RequiresAdmin(
             resource_type="Offer_Contract_Relationship")
 
 
+@metrics.db_timed
 def offer_contract_relationship_update(context,
                                        offer_contract_relationship_id,
                                        values):
@@ -394,10 +603,43 @@ def offer_contract_relationship_update(context,
 
     values.pop('offer_contract_relationship_id', None)
     offer_contract_relationship_ref.update(values)
-    offer_contract_relationship_ref.save(get_session())
-    return offer_contract_relationship_ref
-
-
+    return _save(offer_contract_relationship_ref, 'update')
+
+
+@metrics.db_timed
+def offer_contract_relationship_update_status(context,
+                                              offer_contract_relationship_ids,
+                                              status):
+    """Set the status of the given relationships that may move to it and
+    return the ids of those that now have it."""
+    if not offer_contract_relationship_ids:
+        return []
+    ocr_id = models.OfferContractRelationship.offer_contract_relationship_id
+    ocr_status = models.OfferContractRelationship.status
+    session = get_session()
+    with session.begin():
+        count = session.query(models.OfferContractRelationship)\
+            .filter(ocr_id.in_(offer_contract_relationship_ids),
+                    ocr_status.in_(statuses.sources(
+                        statuses.OFFER_CONTRACT_RELATIONSHIP, status)))\
+            .update({'status': status}, synchronize_session=False)
+        if count == len(offer_contract_relationship_ids):
+            ids = list(offer_contract_relationship_ids)
+        else:
+            # some rows had moved on to a status they can't leave for
+            # this one
+            ids = [r[0] for r in session.query(ocr_id).filter(
+                ocr_id.in_(offer_contract_relationship_ids),
+                ocr_status == status)]
+        _record_changes(session, [dict(
+            action='update',
+            resource_type=statuses.OFFER_CONTRACT_RELATIONSHIP,
+            resource_id=changed_id, status=status, project_id=None)
+            for changed_id in ids])
+    return ids
+
+
+@metrics.db_timed
 def offer_contract_relationship_destroy(context,
                                         offer_contract_relationship_id):
     if context.is_admin:
@@ -406,12 +648,231 @@ def offer_contract_relationship_destroy(context,
                                               offer_contract_relationship_id)
 
         if offer_contract_relationship_ref:
-            get_session().query(models.OfferContractRelationship) \
-                .filter(models.OfferContractRelationship.
-                        offer_contract_relationship_id ==
-                        offer_contract_relationship_id).delete()
+            _delete(get_session().query(models.OfferContractRelationship)
+                    .filter(models.OfferContractRelationship.
+                            offer_contract_relationship_id ==
+                            offer_contract_relationship_id),
+                    offer_contract_relationship_ref)
         else:
             return None
     else:
         raise exception.RequiresAdmin(
             resource_type="Offer_Contract_Relationship")
+
+
+@metrics.db_timed
+def market_watermark(context):
+    """Return a value that changes whenever an offer, bid or contract is
+    created or updated, read from the timestamp indexes in one query.
+
+    Offer contract relationships are created along with their contract
+    and change status along with their offer or contract.
+    """
+    columns = []
+    for model in (models.Offer, models.Bid, models.Contract):
+        for column in (model.created_at, model.updated_at):
+            columns.append(sa.select([sa.func.max(column)]).as_scalar())
+    return tuple(get_session().query(*columns).one())
+
+
+@metrics.db_timed
+def deadlines_get(context, changed_since=None):
+    """Return ((action, resource_type, id), time) for the deadlines the
+    manager acts on: when active offers, bids and contracts expire and
+    when available contracts start.
+
+    changed_since limits them to the records created or updated at or
+    after that time, read from the timestamp indexes.
+    """
+    sources = [
+        ('expire', statuses.OFFER, models.Offer, 'offer_id', 'end_time',
+         statuses.ACTIVE),
+        ('expire', statuses.BID, models.Bid, 'bid_id', 'end_time',
+         statuses.ACTIVE),
+        ('expire', statuses.CONTRACT, models.Contract, 'contract_id',
+         'end_time', statuses.ACTIVE),
+        ('fulfill', statuses.CONTRACT, models.Contract, 'contract_id',
+         'start_time', (statuses.AVAILABLE,)),
+    ]
+    session = get_session()
+    deadlines = []
+    for action, resource_type, model, id_name, time_name, active in sources:
+        time_column = getattr(model, time_name)
+        query = session.query(getattr(model, id_name), time_column).filter(
+            model.status.in_(active), time_column.isnot(None))
+        if changed_since is not None:
+            query = query.filter(sa.or_(model.created_at >= changed_since,
+                                        model.updated_at >= changed_since))
+        deadlines.extend(((action, resource_type, resource_id), when)
+                         for resource_id, when in query)
+    return deadlines
+
+
+# change log
+@metrics.db_timed
+def change_get_since(context, since=0, limit=100):
+    """Return up to limit change log entries after seq since, oldest
+    first.
+
+    A seq is handed out when a transaction writes its entries, so a
+    transaction may commit after one that started later. Entries after
+    a gap are held back until the gap is CHANGE_SETTLE old, by which
+    time it is a rolled back transaction or compacted entries rather
+    than one still committing. Reading from 0 starts wherever the log
+    does.
+    """
+    if not context.is_admin:
+        raise exception.RequiresAdmin(resource_type="Change")
+    entries = get_session().query(models.Change)\
+        .filter(models.Change.seq > since)\
+        .order_by(models.Change.seq).limit(limit).all()
+    settled = timeutils.utcnow() - CHANGE_SETTLE
+    expected = since + 1 if since else None
+    for i, entry in enumerate(entries):
+        if expected is not None and entry.seq != expected and \
+                entry.created_at > settled:
+            return entries[:i]
+        expected = entry.seq + 1
+    return entries
+
+
+@metrics.db_timed
+def change_latest_seq(context):
+    """Return the seq of the latest change log entry, 0 if there is
+    none."""
+    return get_session().query(
+        sa.func.max(models.Change.seq)).scalar() or 0
+
+
+@metrics.db_timed
+def change_compact(context, before, batch_size):
+    """Delete up to batch_size change log entries written before
+    `before`. The latest entry is always kept, so that seq numbers go on
+    from it. Returns the number of entries deleted."""
+    session = get_session()
+    with session.begin():
+        latest = session.query(sa.func.max(models.Change.seq)).scalar()
+        seqs = [row[0] for row in session.query(models.Change.seq).filter(
+            models.Change.created_at < before,
+            models.Change.seq < latest).limit(batch_size)]
+        if seqs:
+            session.query(models.Change).filter(
+                models.Change.seq.in_(seqs)).delete(
+                    synchronize_session=False)
+    return len(seqs)
+
+
+# archive
+def _archive_batch(session, model, archive_model, before, batch_size,
+                   referenced_by, archived_at):
+    table = model.__table__
+    primary_key = list(table.primary_key.columns)[0]
+    columns = [primary_key]
+    if 'project_id' in table.c:
+        columns.append(table.c.project_id)
+    query = session.query(*columns).filter(
+        model.status == statuses.EXPIRED,
+        sa.func.coalesce(model.updated_at, model.created_at) < before)
+    # rows still referenced from a live table stay until the referencing
+    # rows are archived
+    for column in referenced_by:
+        query = query.filter(~sa.exists().where(column == primary_key))
+    found = query.limit(batch_size).all()
+    if not found:
+        return 0
+    ids = [row[0] for row in found]
+
+    names = [column.name for column in table.columns]
+    rows = sa.select(
+        [table.c[name] for name in names] +
+        [sa.literal(archived_at, type_=sa.DateTime)]).where(
+            primary_key.in_(ids))
+    session.execute(archive_model.__table__.insert().from_select(
+        names + ['archived_at'], rows))
+    session.query(model).filter(primary_key.in_(ids)).delete(
+        synchronize_session=False)
+    _record_changes(session, [
+        dict(action='archive',
+             resource_type=model.status_resource_type,
+             resource_id=row[0],
+             status=statuses.EXPIRED,
+             project_id=row[1] if len(row) > 1 else None)
+        for row in found])
+    return len(ids)
+
+
+@metrics.db_timed
+def archive_expired(context, before, batch_size):
+    """Move up to batch_size rows of each kind that expired before
+    `before` into the archive tables.
+
+    Relationships are archived first so that the offers and contracts
+    they point to can follow in the same or a later batch. Returns the
+    number of rows archived per table.
+    """
+    ocr = models.OfferContractRelationship
+    archives = [
+        (ocr, models.OfferContractRelationshipArchive, []),
+        (models.Contract, models.ContractArchive, [ocr.contract_id]),
+        (models.Offer, models.OfferArchive, [ocr.offer_id]),
+        (models.Bid, models.BidArchive, [models.Contract.bid_id]),
+    ]
+    archived_at = timeutils.utcnow()
+    archived = {}
+    session = get_session()
+    with session.begin():
+        for model, archive_model, referenced_by in archives:
+            archived[model.__tablename__] = _archive_batch(
+                session, model, archive_model, before, batch_size,
+                referenced_by, archived_at)
+    return archived
+
+
+@metrics.db_timed
+def purge_archive(context, before, batch_size):
+    """Delete up to batch_size archived rows of each kind that were
+    archived before `before`. Returns the number of rows deleted per
+    table."""
+    archive_models = [models.OfferContractRelationshipArchive,
+                      models.ContractArchive,
+                      models.OfferArchive,
+                      models.BidArchive]
+    purged = {}
+    session = get_session()
+    with session.begin():
+        for archive_model in archive_models:
+            primary_key = list(
+                archive_model.__table__.primary_key.columns)[0]
+            ids = [row[0] for row in session.query(primary_key).filter(
+                archive_model.archived_at < before).limit(batch_size)]
+            if ids:
+                session.query(archive_model).filter(
+                    primary_key.in_(ids)).delete(synchronize_session=False)
+            purged[archive_model.__table__.name] = len(ids)
+    return purged
+
+
+@metrics.db_timed
+def offer_get_all_archived(context):
+    return get_session().query(models.OfferArchive).all()
+
+
+@metrics.db_timed
+def bid_get_all_archived(context):
+    return get_session().query(models.BidArchive).all()
+
+
+@metrics.db_timed
+def contract_get_all_archived(context):
+    return get_session().query(models.ContractArchive).all()
+
+
+@metrics.db_timed
+def offer_contract_relationship_get_all_archived(context, filters=None):
+    query = get_session().query(models.OfferContractRelationshipArchive)
+    if filters is not None:
+        _check_status_filter(filters)
+        for field in ['offer_id', 'contract_id', 'status']:
+            if field in filters:
+                query = query.filter_by(**{field: filters[field]})
+    return query.all()
@@ -1,8 +1,10 @@
 from oslo_db.sqlalchemy import models
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import types
 import sqlalchemy_jsonfield
 import datetime
 
+from flocx_market.common import exception
 from flocx_market.common import statuses
 from flocx_market.db.orm import orm
 from flocx_market.resource_objects import resource_types
@@ -25,8 +27,75 @@ class FLOCXMarketBase(models.TimestampMixin, models.ModelBase):
 Base = declarative_base(cls=FLOCXMarketBase)
 
 
-class Bid(Base):
+class Status(types.TypeDecorator):
+    """A status name from flocx_market.common.statuses, stored as its
+    small integer code."""
+
+    impl = types.SmallInteger
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            return statuses.CODES[value]
+        except KeyError:
+            raise exception.InvalidStatus(status=value)
+
+    def process_literal_param(self, value, dialect):
+        return str(self.process_bind_param(value, dialect))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return statuses.NAMES[value]
+
+
+class StatusMixin(object):
+    # set by each model to its statuses.TRANSITIONS key
+    status_resource_type = None
+
+    @orm.validates('status')
+    def validate_status(self, key, value):
+        if value not in statuses.ALL:
+            raise exception.InvalidStatus(status=value)
+        if self.status is not None and not statuses.can_transition(
+                self.status_resource_type, self.status, value):
+            raise exception.InvalidStatusTransition(
+                resource_type=self.status_resource_type,
+                current=self.status, new=value)
+        return value
+
+
+def _active_index(name, *columns):
+    # partial index over the records that aren't expired where the backend
+    # supports it, MySQL indexes every row
+    active = orm.text('status IN (%s)' % ', '.join(
+        str(statuses.CODES[status]) for status in statuses.ACTIVE))
+    return orm.Index(name, *columns,
+                     postgresql_where=active,
+                     sqlite_where=active)
+
+
+# Offer config keys that are copied into typed, indexed columns when an
+# offer is written, so that simple match specs can be evaluated in SQL.
+# Maps the config key to the column name and the python type of its values.
+OFFER_CONFIG_COLUMNS = {
+    'cpus': ('config_cpus', float),
+    'memory_mb': ('config_memory_mb', float),
+    'local_gb': ('config_local_gb', float),
+    'cpu_arch': ('config_cpu_arch', str),
+}
+
+
+class Bid(StatusMixin, Base):
     __tablename__ = 'bids'
+    __table_args__ = (
+        _active_index('bids_active_idx', 'status', 'end_time'),
+        # serve the manager's change watermark (see market_watermark)
+        orm.Index('bids_created_at_idx', 'created_at'),
+        orm.Index('bids_updated_at_idx', 'updated_at'),
+    )
+    status_resource_type = statuses.BID
     bid_id = orm.Column(
         orm.String(64),
         primary_key=True,
@@ -37,13 +106,12 @@ class Bid(Base):
     start_time = orm.Column(orm.DateTime(timezone=True), nullable=False)
     end_time = orm.Column(orm.DateTime(timezone=True), nullable=False)
     duration = orm.Column(orm.Integer, nullable=False)
-    status = orm.Column(
-        orm.String(15), nullable=False, default=statuses.AVAILABLE)
+    status = orm.Column(Status, nullable=False, default=statuses.AVAILABLE)
     config_query = orm.Column(sqlalchemy_jsonfield.JSONField(
         enforce_string=True,
         enforce_unicode=False), nullable=False)
     cost = orm.Column(orm.Float, nullable=False)
-    contracts = orm.relationship('Contract', lazy='dynamic')
+    contracts = orm.relationship('Contract', back_populates='bid')
 
     @orm.validates('cost')
     def validate_cost(self, key, value):
@@ -52,16 +120,25 @@ class Bid(Base):
         return value
 
 
-class Offer(Base):
+class Offer(StatusMixin, Base):
     __tablename__ = "offers"
+    __table_args__ = (
+        # let the matcher stream available offers in ranking order
+        orm.Index('offers_status_cost_idx', 'status', 'cost', 'offer_id'),
+        orm.Index('offers_status_start_time_idx',
+                  'status', 'start_time', 'offer_id'),
+        _active_index('offers_active_idx', 'status', 'end_time'),
+        orm.Index('offers_created_at_idx', 'created_at'),
+        orm.Index('offers_updated_at_idx', 'updated_at'),
+    )
+    status_resource_type = statuses.OFFER
     offer_id = orm.Column(
         orm.String(64),
         primary_key=True,
         autoincrement=False,
     )
     project_id = orm.Column(orm.String(64), nullable=False)
-    status = orm.Column(
-        orm.String(15), nullable=False, default=statuses.AVAILABLE)
+    status = orm.Column(Status, nullable=False, default=statuses.AVAILABLE)
     resource_id = orm.Column(orm.String(64), nullable=False)
     resource_type = orm.Column(
         orm.String(64), nullable=False, default=resource_types.IRONIC_NODE)
@@ -73,8 +150,12 @@ class Offer(Base):
         nullable=False,
     )
     cost = orm.Column(orm.Float, nullable=False)
+    config_cpus = orm.Column(orm.Float, nullable=True, index=True)
+    config_memory_mb = orm.Column(orm.Float, nullable=True, index=True)
+    config_local_gb = orm.Column(orm.Float, nullable=True, index=True)
+    config_cpu_arch = orm.Column(orm.String(64), nullable=True, index=True)
     offer_contract_relationships = orm.relationship(
-        'OfferContractRelationship', lazy='dynamic')
+        'OfferContractRelationship', back_populates='offer')
 
     @orm.validates('cost')
     def validate_cost(self, key, value):
@@ -82,29 +163,69 @@ class Offer(Base):
             raise ValueError('Cost must be >= 0')
         return value
 
+    @orm.validates('config')
+    def validate_config(self, key, value):
+        config = value if isinstance(value, dict) else {}
+        for config_key, (column, col_type) in OFFER_CONFIG_COLUMNS.items():
+            config_value = config.get(config_key)
+            # the column would hold NULL where the matcher compares
+            # str(value), so SQL and python would disagree on the offer
+            if (col_type is str and config_value is not None
+                    and not isinstance(config_value, str)):
+                raise exception.InvalidParameter(
+                    value=config_value, name='config.' + config_key)
+            setattr(self, column, _config_column_value(config_value,
+                                                       col_type))
+        return value
+
+
+def _config_column_value(value, col_type):
+    # numeric columns mirror the float() coercion done by the matcher;
+    # string columns only hold values that already are strings (see
+    # Offer.validate_config) so that 'eq' and 'in' give the same answer in
+    # SQL and in python
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    if col_type is str:
+        return value if isinstance(value, str) else None
+    try:
+        return col_type(value)
+    except (TypeError, ValueError):
+        return None
 
-class Contract(Base):
+
+class Contract(StatusMixin, Base):
     __tablename__ = 'contracts'
+    __table_args__ = (
+        _active_index('contracts_active_idx', 'status', 'end_time'),
+        orm.Index('contracts_created_at_idx', 'created_at'),
+        orm.Index('contracts_updated_at_idx', 'updated_at'),
+    )
+    status_resource_type = statuses.CONTRACT
     contract_id = orm.Column(
         orm.String(64),
         primary_key=True,
         autoincrement=False,
     )
-    status = orm.Column(
-        orm.String(15), nullable=False, default=statuses.AVAILABLE)
+    status = orm.Column(Status, nullable=False, default=statuses.AVAILABLE)
     start_time = orm.Column(orm.DateTime(timezone=True), nullable=False)
     end_time = orm.Column(orm.DateTime(timezone=True), nullable=False)
     cost = orm.Column(orm.Float, nullable=False)
     bid_id = orm.Column(orm.String(64),
                         orm.ForeignKey('bids.bid_id'))
-    bid = orm.relationship('Bid')
+    bid = orm.relationship('Bid', back_populates='contracts')
     offer_contract_relationships = orm.relationship(
-        'OfferContractRelationship', lazy='dynamic')
+        'OfferContractRelationship', back_populates='contract')
     project_id = orm.Column(orm.String(64), nullable=False)
 
 
-class OfferContractRelationship(Base):
+class OfferContractRelationship(StatusMixin, Base):
     __tablename__ = 'offer_contract_relationship'
+    __table_args__ = (
+        _active_index('offer_contract_relationship_active_idx',
+                      'status'),
+    )
+    status_resource_type = statuses.OFFER_CONTRACT_RELATIONSHIP
     offer_contract_relationship_id = orm.Column(
         orm.String(64),
         primary_key=True,
@@ -112,9 +233,64 @@ class OfferContractRelationship(Base):
     )
     offer_id = orm.Column(
         orm.String(64), orm.ForeignKey('offers.offer_id'))
-    offer = orm.relationship('Offer')
+    # a relationship is nearly always used together with its offer and
+    # contract, load them in the same query
+    offer = orm.relationship('Offer', lazy='joined',
+                             back_populates='offer_contract_relationships')
     contract_id = orm.Column(orm.String(64),
                              orm.ForeignKey('contracts.contract_id'))
-    contract = orm.relationship('Contract')
-    status = orm.Column(
-        orm.String(15), nullable=False, default=statuses.AVAILABLE)
+    contract = orm.relationship('Contract', lazy='joined',
+                                back_populates='offer_contract_relationships')
+    status = orm.Column(Status, nullable=False, default=statuses.AVAILABLE)
+
+
+class Change(Base):
+    """An entry in the append-only log of writes to offers, bids,
+    contracts and offer contract relationships. seq numbers the entries
+    in the order they were written."""
+    __tablename__ = 'changes'
+    __table_args__ = (
+        orm.Index('changes_created_at_idx', 'created_at'),
+        # never reuse the seq of a compacted entry
+        {'sqlite_autoincrement': True},
+    )
+    seq = orm.Column(orm.Integer, primary_key=True, autoincrement=True)
+    resource_type = orm.Column(orm.String(64), nullable=False)
+    resource_id = orm.Column(orm.String(64), nullable=False)
+    # one of CHANGE_ACTIONS
+    action = orm.Column(orm.String(16), nullable=False)
+    # the status of the record after the write
+    status = orm.Column(Status, nullable=True)
+    project_id = orm.Column(orm.String(64), nullable=True)
+
+
+CHANGE_ACTIONS = ('create', 'update', 'delete', 'archive')
+
+
+def _archive_table(model):
+    # same columns as the live table but no foreign keys or indexes, rows
+    # are only ever inserted in bulk and read back for history queries
+    columns = [orm.Column(column.name, column.type,
+                          primary_key=column.primary_key,
+                          nullable=column.nullable)
+               for column in model.__table__.columns]
+    columns.append(orm.Column('archived_at', orm.DateTime, nullable=False,
+                              index=True))
+    return orm.Table(model.__tablename__ + '_archive', Base.metadata,
+                     *columns)
+
+
+class OfferArchive(Base):
+    __table__ = _archive_table(Offer)
+
+
+class BidArchive(Base):
+    __table__ = _archive_table(Bid)
+
+
+class ContractArchive(Base):
+    __table__ = _archive_table(Contract)
+
+
+class OfferContractRelationshipArchive(Base):
+    __table__ = _archive_table(OfferContractRelationship)
@@ -0,0 +1,172 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Count and time the SQL statements run in a unit of work.
+
+Statements are recorded through SQLAlchemy engine events into the
+recorder that is active in the current thread (or greenthread, once
+eventlet has patched the threading module). Recording is only done
+between QueryRecorder.start() and stop(), or inside record() and
+assert_max_queries().
+"""
+
+import collections
+import contextlib
+import functools
+import re
+import threading
+import time
+
+from oslo_log import log as logging
+from sqlalchemy import engine
+from sqlalchemy import event
+
+import flocx_market.conf
+
+CONF = flocx_market.conf.CONF
+LOG = logging.getLogger(__name__)
+
+_local = threading.local()
+_IN_LIST = re.compile(r'\((?:\s*[?]\s*,|\s*%s\s*,|\s*%\(\w+\)s\s*,)+'
+                      r'\s*(?:[?]|%s|%\(\w+\)s)\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+# oslo.db checks connections out of the pool with this liveness ping
+_PING = 'SELECT 1'
+
+
+def statement_shape(statement):
+    """Normalize a statement so that repeated queries compare equal.
+
+    Statements are already parameterized; only whitespace and the length
+    of IN lists differ between runs of the same query.
+    """
+    shape = _WHITESPACE.sub(' ', statement).strip()
+    return _IN_LIST.sub('(?)', shape)
+
+
+class QueryRecorder(object):
+
+    def __init__(self, name=None):
+        self.name = name
+        self.statements = []
+        self._parent = None
+        self._active = False
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    @property
+    def duration(self):
+        return sum(duration for _, duration in self.statements)
+
+    def repeated(self, threshold):
+        """Return (shape, count) of statements run threshold+ times."""
+        shapes = collections.Counter(statement_shape(statement)
+                                     for statement, _ in self.statements)
+        return [(shape, count) for shape, count in shapes.most_common()
+                if count >= threshold]
+
+    def start(self):
+        self._parent = getattr(_local, 'recorder', None)
+        _local.recorder = self
+        self._active = True
+        return self
+
+    def stop(self):
+        if not self._active:
+            return
+        self._active = False
+        _local.recorder = self._parent
+        if self._parent is not None:
+            self._parent.statements.extend(self.statements)
+        self._parent = None
+
+    def report(self, threshold=None):
+        threshold = threshold or CONF.profiling.repeated_query_threshold
+        LOG.debug("%(name)s ran %(count)d SQL statements in %(time).3fs",
+                  {'name': self.name, 'count': self.count,
+                   'time': self.duration})
+        for shape, count in self.repeated(threshold):
+            LOG.warning("%(name)s ran the same SQL statement %(count)d "
+                        "times, possible N+1 query: %(statement)s",
+                        {'name': self.name, 'count': count,
+                         'statement': shape})
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    if getattr(_local, 'recorder', None) is not None:
+        conn.info.setdefault('query_start', []).append(time.monotonic())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    recorder = getattr(_local, 'recorder', None)
+    if recorder is None:
+        return
+    starts = conn.info.get('query_start')
+    duration = time.monotonic() - starts.pop() if starts else 0.0
+    if statement == _PING:
+        return
+    recorder.statements.append((statement, duration))
+
+
+def install():
+    """Listen for statements on every engine; safe to call repeatedly."""
+    if not event.contains(engine.Engine, 'before_cursor_execute',
+                          _before_cursor_execute):
+        event.listen(engine.Engine, 'before_cursor_execute',
+                     _before_cursor_execute)
+        event.listen(engine.Engine, 'after_cursor_execute',
+                     _after_cursor_execute)
+
+
+@contextlib.contextmanager
+def record(name=None):
+    install()
+    recorder = QueryRecorder(name).start()
+    try:
+        yield recorder
+    finally:
+        recorder.stop()
+
+
+def counted(name):
+    """Decorator recording and reporting the queries of each call when
+    [profiling]count_queries is enabled."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not CONF.profiling.count_queries:
+                return func(*args, **kwargs)
+            with record(name) as recorder:
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    recorder.report()
+        return wrapper
+    return decorator
+
+
+@contextlib.contextmanager
+def assert_max_queries(count):
+    """Fail with AssertionError if the block runs more than count
+    statements. For use in tests."""
+    with record('assert_max_queries') as recorder:
+        yield recorder
+    if recorder.count > count:
+        raise AssertionError(
+            "Expected at most %d SQL statements, got %d:\n%s" % (
+                count, recorder.count,
+                '\n'.join(statement for statement, _ in
+                          recorder.statements)))
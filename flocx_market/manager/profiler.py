@@ -0,0 +1,151 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""On-demand profiling of the manager's periodic tasks.
+
+Every task run logs its wall clock and CPU time. Profiling of the next
+[profiling]profile_runs task runs is armed at startup with
+[profiling]profile_on_start or at any time by sending SIGUSR2 to the
+manager process. Each profiled run is written to [profiling]profile_dir,
+either as a pstats file (cprofile) or as collapsed stacks that
+flamegraph.pl and speedscope read (sampling).
+"""
+
+import collections
+import cProfile
+import functools
+import os
+import signal
+import tempfile
+import time
+
+from oslo_log import log as logging
+
+import flocx_market.conf
+
+CONF = flocx_market.conf.CONF
+LOG = logging.getLogger(__name__)
+
+CPROFILE = 'cprofile'
+SAMPLING = 'sampling'
+
+# only assigned here and decremented by the task greenthread; no lock, as
+# arm() also runs from a signal handler
+_remaining_runs = 0
+
+
+def arm(runs=None):
+    """Profile the next runs periodic task runs."""
+    global _remaining_runs
+    runs = runs or CONF.profiling.profile_runs
+    _remaining_runs = runs
+    LOG.info("Profiling the next %d periodic task runs", runs)
+
+
+def _take_run():
+    global _remaining_runs
+    if _remaining_runs <= 0:
+        return False
+    _remaining_runs -= 1
+    return True
+
+
+def _handle_signal(signum, frame):
+    arm()
+
+
+def install_signal_handler():
+    try:
+        signal.signal(signal.SIGUSR2, _handle_signal)
+    except (AttributeError, ValueError):
+        # no SIGUSR2 on this platform, or not running in the main thread
+        LOG.warning("Unable to install the SIGUSR2 profiling handler")
+
+
+def _output_path(task, extension):
+    directory = CONF.profiling.profile_dir or tempfile.gettempdir()
+    os.makedirs(directory, exist_ok=True)
+    name = '%s-%d-%s.%s' % (task, os.getpid(),
+                            time.strftime('%Y%m%dT%H%M%S'), extension)
+    return os.path.join(directory, name)
+
+
+class SamplingProfiler(object):
+    """Samples the running stack on a CPU-time interval timer.
+
+    Periodic tasks run in greenthreads on the process' main thread, which
+    is also where the SIGPROF handler runs, so the interrupted frame is
+    the task's own stack.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = collections.Counter()
+
+    def _sample(self, signum, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append('%s (%s:%d)' % (code.co_name,
+                                         os.path.basename(code.co_filename),
+                                         code.co_firstlineno))
+            frame = frame.f_back
+        self.stacks[';'.join(reversed(stack))] += 1
+
+    def enable(self):
+        self._previous = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def disable(self):
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous)
+
+    def dump_stats(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write('%s %d\n' % (stack, count))
+
+
+def _make_profiler():
+    if CONF.profiling.profiler == SAMPLING:
+        return (SamplingProfiler(CONF.profiling.sampling_interval),
+                'collapsed')
+    return cProfile.Profile(), 'pstats'
+
+
+def profiled(task):
+    """Decorator logging the run time of a periodic task and profiling
+    the run when profiling is armed."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = extension = None
+            if _take_run():
+                profiler, extension = _make_profiler()
+                profiler.enable()
+            wall = time.monotonic()
+            cpu = time.process_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                cpu = time.process_time() - cpu
+                wall = time.monotonic() - wall
+                if profiler is not None:
+                    profiler.disable()
+                    path = _output_path(task, extension)
+                    profiler.dump_stats(path)
+                    LOG.info("Wrote %(task)s profile to %(path)s",
+                             {'task': task, 'path': path})
+                LOG.info("%(task)s took %(wall).3fs (%(cpu).3fs CPU)",
+                         {'task': task, 'wall': wall, 'cpu': cpu})
+        return wrapper
+    return decorator
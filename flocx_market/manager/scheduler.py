@@ -0,0 +1,316 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Independent schedules for the manager's tasks.
+
+Each task runs in a green thread of its own, sleeping for its interval,
+give or take [manager]task_jitter, between runs. A slow matcher pass no
+longer holds back expiry, and the other way round.
+
+Overlap: a task never runs twice at once. A run started while the
+previous one is still going, say by trigger() or a direct call to
+run(), is skipped and counted in
+flocx_market_manager_task_skipped_runs.
+
+Mutual exclusion: tasks that write the same rows name them in their
+locks. A run waits until it holds every lock it names. The locks are
+taken in sorted order, so two tasks can't each wait on the other.
+Tasks whose rows don't overlap run side by side. The manager's tasks
+use these locks:
+
+    bids    the status of bids: deadlines and matcher
+    offers  the status of offers, contracts and their relationships:
+            deadlines and matcher
+
+Archiving only moves rows that are already expired, which no other task
+writes, and compacting the change log only deletes old entries, so
+neither takes a lock.
+"""
+
+import datetime
+import heapq
+import random
+import threading
+import time
+
+from oslo_log import log as logging
+
+from flocx_market.common import metrics
+
+
+LOG = logging.getLogger(__name__)
+
+
+class LockSet(object):
+    """Named locks shared by the tasks of one manager."""
+
+    def __init__(self):
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _get(self, name):
+        with self._guard:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def acquire(self, names):
+        names = sorted(set(names))
+        for name in names:
+            self._get(name).acquire()
+        return names
+
+    def release(self, names):
+        for name in reversed(names):
+            self._get(name).release()
+
+
+class ScheduledTask(object):
+    """Run func(context) every interval seconds in its own thread.
+
+    next_delay() decides how long to sleep after each run; subclasses
+    override it to schedule adaptively. trigger() cuts the current
+    sleep short.
+    """
+
+    def __init__(self, name, func, interval, jitter=0.0, locks=(),
+                 lockset=None, run_immediately=False):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.locks = tuple(locks)
+        self.lockset = lockset if lockset is not None else LockSet()
+        self.run_immediately = run_immediately
+        self.last_result = None
+        self._running = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+
+    def _jittered(self, delay):
+        if not self.jitter:
+            return delay
+        return max(0.0, delay * random.uniform(1 - self.jitter,
+                                               1 + self.jitter))
+
+    def next_delay(self):
+        return self._jittered(self.interval)
+
+    def run(self, context):
+        """Run the task once, unless it is already running.
+
+        Returns whether it ran. Errors are logged rather than raised so
+        that one failed run doesn't end the schedule; last_result is then
+        None.
+        """
+        if not self._running.acquire(False):
+            metrics.TASK_SKIPPED_RUNS.labels(task=self.name).inc()
+            LOG.warning("Skipping %s, the previous run is still going",
+                        self.name)
+            return False
+        try:
+            held = self.lockset.acquire(self.locks)
+            try:
+                self.last_result = self.func(context)
+            finally:
+                self.lockset.release(held)
+        except Exception:
+            self.last_result = None
+            LOG.exception("Task %s failed", self.name)
+        finally:
+            self._running.release()
+        return True
+
+    def trigger(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+
+    def loop(self, context):
+        delay = 0 if self.run_immediately else self.next_delay()
+        metrics.TASK_INTERVAL.labels(task=self.name).set(delay)
+        while True:
+            self._wake.wait(delay)
+            self._wake.clear()
+            if self._stopped:
+                return
+            self.run(context)
+            delay = self.next_delay()
+            metrics.TASK_INTERVAL.labels(task=self.name).set(delay)
+
+
+class AdaptiveTask(ScheduledTask):
+    """A task that runs again soon while it makes progress and backs off
+    while nothing it reads changes.
+
+    watermark(context) returns a value that changes whenever the task's
+    input does. A run is left out, and the wait doubled up to interval,
+    when the watermark still has the value it had at the start of the
+    last run that made no progress. progress(result) tells from the
+    task's return value whether the run changed anything, in which case
+    the next run comes after min_interval. Whatever the case, the task
+    spends at most max_duty_cycle of its time running.
+    """
+
+    def __init__(self, name, func, interval, watermark, min_interval,
+                 max_duty_cycle=1.0, progress=bool, **kwargs):
+        super(AdaptiveTask, self).__init__(name, func, interval, **kwargs)
+        self.watermark = watermark
+        self.min_interval = min_interval
+        self.max_duty_cycle = max_duty_cycle
+        self.progress = progress
+        self._delay = min_interval
+        self._seen = None
+        self._idle = False
+        self._duration = 0.0
+
+    def _read_watermark(self, context):
+        try:
+            return self.watermark(context)
+        except Exception:
+            LOG.exception("Could not read the watermark of %s", self.name)
+            return None
+
+    def run(self, context):
+        mark = self._read_watermark(context)
+        self._idle = mark is not None and mark == self._seen
+        if self._idle:
+            metrics.TASK_IDLE_TICKS.labels(task=self.name).inc()
+            return False
+        start = time.monotonic()
+        ran = super(AdaptiveTask, self).run(context)
+        if ran:
+            self._duration = time.monotonic() - start
+            # its own writes move the watermark, so a run that made
+            # progress is always followed by another
+            self._seen = None if self.progress(self.last_result) else mark
+        return ran
+
+    def next_delay(self):
+        if self._idle:
+            self._delay = min(self._delay * 2, self.interval)
+            return self._jittered(self._delay)
+        self._delay = self.min_interval
+        duty = self.max_duty_cycle
+        rest = self._duration * (1 - duty) / duty
+        return self._jittered(max(self._delay, rest))
+
+
+class DeadlineQueue(object):
+    """A min-heap of deadlines, each identified by a key.
+
+    Pushing a key again moves its deadline; the entry it replaces stays
+    in the heap and is dropped when it reaches the top.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._when = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._when)
+
+    def push(self, key, when):
+        with self._lock:
+            if self._when.get(key) == when:
+                return
+            self._when[key] = when
+            heapq.heappush(self._heap, (when, key))
+
+    def _drop_stale(self):
+        while self._heap and \
+                self._when.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def next_deadline(self):
+        with self._lock:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """Remove and return the keys whose deadline is not after now,
+        earliest first."""
+        due = []
+        with self._lock:
+            self._drop_stale()
+            while self._heap and self._heap[0][0] <= now:
+                when, key = heapq.heappop(self._heap)
+                del self._when[key]
+                due.append(key)
+                self._drop_stale()
+        return due
+
+
+class DeadlineTask(ScheduledTask):
+    """Handle each deadline when it passes instead of scanning for them.
+
+    deadlines(context, changed_since) returns (key, when) pairs for the
+    records created or updated since changed_since, or for every record
+    when it is None. The first run loads them all; later runs, every
+    interval seconds, only load what changed since the previous one,
+    which also picks up records written by other processes. The task
+    wakes when the earliest deadline passes and calls
+    handler(context, key) for each key that is due. The handler checks
+    the record itself, so a deadline that has since moved or a record
+    that has since changed status is harmless. A key whose handler
+    fails is tried again after interval.
+    """
+
+    # how far back each refresh reaches into the previous one, for rows
+    # whose transaction committed after the previous refresh read
+    OVERLAP = datetime.timedelta(seconds=10)
+
+    def __init__(self, name, handler, interval, deadlines, **kwargs):
+        super(DeadlineTask, self).__init__(name, self._tick, interval,
+                                           **kwargs)
+        self.handler = handler
+        self.deadlines = deadlines
+        self.queue = DeadlineQueue()
+        self._refreshed = None
+        self._next_refresh = None
+
+    def _refresh(self, context, now):
+        # a failed refresh is retried after interval, from the same point
+        self._next_refresh = now + datetime.timedelta(
+            seconds=self._jittered(self.interval))
+        since = None
+        if self._refreshed is not None:
+            since = self._refreshed - self.OVERLAP
+        for key, when in self.deadlines(context, since):
+            self.queue.push(key, when)
+        self._refreshed = now
+
+    def _tick(self, context):
+        now = datetime.datetime.utcnow()
+        if self._next_refresh is None or now >= self._next_refresh:
+            self._refresh(context, now)
+        handled = 0
+        for key in self.queue.pop_due(now):
+            try:
+                if self.handler(context, key):
+                    handled += 1
+            except Exception:
+                LOG.exception("%s could not handle %s", self.name, key)
+                self.queue.push(key, now + datetime.timedelta(
+                    seconds=self.interval))
+        return handled
+
+    def next_delay(self):
+        now = datetime.datetime.utcnow()
+        if self._next_refresh is None:
+            return 0
+        wake = self._next_refresh
+        deadline = self.queue.next_deadline()
+        if deadline is not None and deadline < wake:
+            wake = deadline
+        return max(0.0, (wake - now).total_seconds())
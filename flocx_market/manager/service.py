@@ -1,17 +1,24 @@
 from oslo_context import context as ctx
 from oslo_log import log as logging
 from oslo_service import service
-from oslo_service import periodic_task
 from oslo_service import threadgroup
 import datetime
 
+from flocx_market.common import exception
+from flocx_market.common import metrics
 from flocx_market.common import statuses
+from flocx_market.db.sqlalchemy import api as db_api
+from flocx_market.db.sqlalchemy import query_counter
+from flocx_market.manager import profiler
+from flocx_market.manager import scheduler
 from flocx_market.matcher import match_engine
 from flocx_market.objects.offer import Offer
 from flocx_market.objects.bid import Bid
 from flocx_market.objects.contract import Contract
 from flocx_market.objects.offer_contract_relationship import \
     OfferContractRelationship
+from flocx_market.resource_objects import dummy_node
+from flocx_market.resource_objects import resource_object_factory
 import flocx_market.conf
 
 CONF = flocx_market.conf.CONF
@@ -23,6 +30,7 @@ class ManagerService(service.Service):
         self.tg = threadgroup.ThreadGroup(threads)
         LOG.info("Creating flocx-market manager service")
         self.tasks = Manager(CONF)
+        self.schedules = self.tasks.schedules()
         self._context = ctx.RequestContext(
             auth_token=None,
             project_id=None,
@@ -32,72 +40,159 @@ class ManagerService(service.Service):
     def start(self):
         LOG.info("Starting flocx-market manager service")
 
-        self.tg.add_dynamic_timer(
-            self.tasks.run_periodic_tasks,
-            initial_delay=None,
-            periodic_interval_max=1,
-            context=self._context
-        )
+        if CONF.metrics.manager_port:
+            LOG.info("Serving metrics on %s:%s", CONF.metrics.manager_host,
+                     CONF.metrics.manager_port)
+            metrics.start_http_server(CONF.metrics.manager_port,
+                                      addr=CONF.metrics.manager_host)
 
+        profiler.install_signal_handler()
+        if CONF.profiling.profile_on_start:
+            profiler.arm()
 
-class Manager(periodic_task.PeriodicTasks):
+        resource_object_factory.load_drivers()
+        if CONF.dummy_node.preload:
+            dummy_node.preload()
 
-    @periodic_task.periodic_task(spacing=CONF.manager.update_expire_frequency,
-                                 run_immediately=True)
-    def update_expired_offers(self, context):
-        LOG.info("Checking for expiring offers")
-        now = datetime.datetime.utcnow()
-        unexpired_offers = Offer.get_all_unexpired(context)
-        exp = 0
-        for offer in unexpired_offers:
-            if offer.end_time < now:
-                offer.expire(context)
-                offer_id = offer.offer_id
-                filters = {'offer_id': offer_id}
-                unexpired_ocrs = OfferContractRelationship.get_all(context,
-                                                                   filters)
-                for ocr in unexpired_ocrs:
-                    ocr.expire(context)
-                exp += 1
-        if exp > 0:
-            LOG.info("Updated " + str(exp) + " offers")
-
-    @periodic_task.periodic_task(spacing=CONF.manager.update_expire_frequency,
-                                 run_immediately=True)
-    def update_expired_bids(self, context):
-        LOG.info("Checking for expiring offers")
-        now = datetime.datetime.utcnow()
-        unexpired_bids = Bid.get_all_unexpired(context)
-        exp = 0
-        for bid in unexpired_bids:
-            if bid.end_time < now:
-                bid.expire(context)
-                exp += 1
-        if exp > 0:
-            LOG.info("Updated " + str(exp) + " bids")
-
-    @periodic_task.periodic_task(spacing=CONF.manager.update_expire_frequency,
-                                 run_immediately=True)
-    def update_contracts(self, context):
-        LOG.info("Checking for expiring contracts")
+        for task in self.schedules:
+            self.tg.add_thread(task.loop, self._context)
+
+    def stop(self, graceful=False):
+        for task in self.schedules:
+            task.stop()
+        super(ManagerService, self).stop(graceful)
+
+
+class Manager(object):
+
+    def __init__(self, conf):
+        self.conf = conf
+
+    def schedules(self):
+        """One independent schedule per task, sharing the locks that
+        keep tasks writing the same rows apart (see scheduler)."""
+        conf = self.conf.manager
+        lockset = scheduler.LockSet()
+        return [
+            # expiry and fulfillment happen as each deadline passes
+            scheduler.DeadlineTask(
+                'deadlines', self.handle_deadline,
+                conf.update_expire_frequency, db_api.deadlines_get,
+                jitter=conf.task_jitter, locks=('bids', 'offers'),
+                lockset=lockset, run_immediately=True),
+            # the matcher scans every open bid, so it only runs again
+            # while it creates contracts or the market moves
+            scheduler.AdaptiveTask(
+                'matcher', self.matcher, conf.matcher_frequency,
+                db_api.market_watermark,
+                min_interval=conf.matcher_min_interval,
+                max_duty_cycle=conf.matcher_max_duty_cycle,
+                jitter=conf.task_jitter, locks=('bids', 'offers'),
+                lockset=lockset, run_immediately=True),
+            scheduler.ScheduledTask(
+                'archive_expired', self.archive_expired,
+                conf.archive_frequency, jitter=conf.task_jitter,
+                lockset=lockset),
+            scheduler.ScheduledTask(
+                'compact_changes', self.compact_changes,
+                conf.change_log_frequency, jitter=conf.task_jitter,
+                lockset=lockset),
+        ]
+
+    @metrics.timed(metrics.TASK_DURATION, task='deadline')
+    @query_counter.counted('deadline')
+    @profiler.profiled('deadline')
+    def handle_deadline(self, context, key):
+        """Act on a deadline that has passed, if the record still has it.
+
+        key is one of the (action, resource_type, id) keys returned by
+        db_api.deadlines_get. Returns whether the record was changed.
+        """
+        try:
+            return self._handle_deadline(context, *key)
+        except exception.ResourceNotFound:
+            # destroyed since the deadline was read
+            return False
+
+    def _handle_deadline(self, context, action, resource_type,
+                         resource_id):
         now = datetime.datetime.utcnow()
+        if resource_type == statuses.OFFER:
+            offer = Offer.get(resource_id, context)
+            if offer is None or offer.status not in statuses.ACTIVE or \
+                    offer.end_time is None or offer.end_time > now:
+                return False
+            offer.expire(context)
+            filters = {'offer_id': resource_id}
+            for ocr in OfferContractRelationship.get_all(context, filters):
+                ocr.expire(context)
+            metrics.EXPIRED.labels(resource_type='offer').inc()
+            LOG.info("Expired offer %s", resource_id)
+            return True
+
+        if resource_type == statuses.BID:
+            bid = Bid.get(resource_id, context)
+            if bid is None or bid.status not in statuses.ACTIVE or \
+                    bid.end_time > now:
+                return False
+            bid.expire(context)
+            metrics.EXPIRED.labels(resource_type='bid').inc()
+            LOG.info("Expired bid %s", resource_id)
+            return True
 
-        unexpired_contracts = Contract.get_all_unexpired(context)
-        for contract in unexpired_contracts:
-            if contract.end_time < now:
-                contract.expire(context)
-                LOG.info("Expiring contract " + contract.contract_id)
-
-        LOG.info("Checking for contracts to fulfill")
-        contracts_to_fulfill = Contract.get_all_by_status(
-            context, statuses.AVAILABLE)
-        for contract in contracts_to_fulfill:
-            if contract.start_time >= now:
-                contract.fulfill(context)
-                LOG.info("Fulfilled contract " + contract.contract_id)
-
-    @periodic_task.periodic_task(spacing=CONF.manager.matcher_frequency,
-                                 run_immediately=True)
+        contract = Contract.get(resource_id, context)
+        if contract is None or contract.status not in statuses.ACTIVE:
+            return False
+        if contract.end_time <= now:
+            contract.expire(context)
+            metrics.EXPIRED.labels(resource_type='contract').inc()
+            LOG.info("Expired contract %s", resource_id)
+            return True
+        if action == 'fulfill' and contract.status == statuses.AVAILABLE \
+                and contract.start_time <= now:
+            contract.fulfill(context)
+            LOG.info("Fulfilled contract %s", resource_id)
+            return True
+        return False
+
+    @metrics.timed(metrics.TASK_DURATION, task='matcher')
+    @query_counter.counted('matcher')
+    @profiler.profiled('matcher')
     def matcher(self, context):
         LOG.info("Matching bids and offers")
-        match_engine.match(context)
+        return match_engine.match(context)
+
+    @metrics.timed(metrics.TASK_DURATION, task='archive_expired')
+    @query_counter.counted('archive_expired')
+    @profiler.profiled('archive_expired')
+    def archive_expired(self, context):
+        if not CONF.manager.archive_after_days:
+            return
+        LOG.info("Archiving expired offers, bids and contracts")
+        before = datetime.datetime.utcnow() - datetime.timedelta(
+            days=CONF.manager.archive_after_days)
+        while True:
+            archived = db_api.archive_expired(
+                context, before, CONF.manager.archive_batch_size)
+            for table, count in archived.items():
+                metrics.ARCHIVED.labels(table=table).inc(count)
+            if not any(archived.values()):
+                break
+            LOG.info("Archived %s", archived)
+
+    @metrics.timed(metrics.TASK_DURATION, task='compact_changes')
+    @query_counter.counted('compact_changes')
+    @profiler.profiled('compact_changes')
+    def compact_changes(self, context):
+        if not CONF.manager.change_log_keep_days:
+            return
+        LOG.info("Compacting the change log")
+        before = datetime.datetime.utcnow() - datetime.timedelta(
+            days=CONF.manager.change_log_keep_days)
+        while True:
+            compacted = db_api.change_compact(
+                context, before, CONF.manager.archive_batch_size)
+            metrics.CHANGES_COMPACTED.inc(compacted)
+            if not compacted:
+                break
+            LOG.info("Compacted %d change log entries", compacted)
@@ -1,7 +1,16 @@
+import itertools
+
+from flocx_market.common import metrics
 from flocx_market.common import statuses
 from flocx_market.matcher import matcher
+from flocx_market.matcher import parallel
+from flocx_market.matcher import ranking
 from flocx_market.objects import bid
 from flocx_market.objects import contract
+from flocx_market.objects import offer
+import flocx_market.conf
+
+CONF = flocx_market.conf.CONF
 
 
 def prepare_contract(offers_used, bid_, context):
@@ -13,20 +22,56 @@ def prepare_contract(offers_used, bid_, context):
                          bid_id=bid_.bid_id,
                          offers=[x.offer_id for x in offers_used]
                          )
-    bid_.status = 'busy'
+    bid_.status = statuses.CLAIMED
     bid_.save(context)
     return contract.Contract.create(contract_data, context)
 
 
 def match(context):
+    """Create a contract for each available bid that enough offers match
+    and return the number of contracts created."""
     all_bids = bid.Bid.get_all_by_status(statuses.AVAILABLE, context)
+    metrics.MATCHER_BIDS_EVALUATED.inc(len(all_bids))
+    if CONF.manager.matcher_workers > 1 and len(all_bids) > 1:
+        return match_parallel(all_bids, context)
+
+    created = 0
     for b in all_bids:
         offers = matcher.\
-                    get_all_matching_offers(context,
-                                            b.config_query['specs'],
-                                            start_time=b.start_time,
-                                            end_time=b.end_time)
+                    get_ranked_matching_offers(context,
+                                               b.config_query['specs'],
+                                               b.quantity,
+                                               start_time=b.start_time,
+                                               end_time=b.end_time)
+
+        if len(offers) >= b.quantity:
+            prepare_contract(offers, b, context)
+            created += 1
+    return created
+
+
+def match_parallel(all_bids, context):
+    # spec evaluation is spread over worker processes; assigning offers
+    # stays serial so two bids can never be given the same offer
+    all_offers = offer.Offer.get_all_by_status(statuses.AVAILABLE, context)
+    offers_by_id = {o.offer_id: o for o in all_offers}
+    feasible = parallel.find_feasible_offers(
+        all_bids, all_offers, CONF.manager.matcher_workers)
+    metrics.MATCHER_OFFERS_EVALUATED.inc(len(all_bids) * len(all_offers))
+
+    policy = ranking.get_policy(CONF.manager.matcher_ranking)
+    created = 0
+    for b in all_bids:
+        specs = b.config_query['specs']
+        candidates = sorted(
+            (offers_by_id[offer_id] for offer_id in feasible[b.bid_id]),
+            key=lambda o: (policy.key(o, specs), o.offer_id))
+        offers = list(itertools.islice(
+            (o for o in candidates
+             if o.available_between(context, b.start_time, b.end_time)),
+            b.quantity))
 
         if len(offers) >= b.quantity:
-            offers_used = offers[:b.quantity+1]
-            prepare_contract(offers_used, b, context)
+            prepare_contract(offers, b, context)
+            created += 1
+    return created
@@ -1,7 +1,12 @@
+from flocx_market.common import metrics
+from flocx_market.matcher import ranking
 from flocx_market.objects import offer
+import flocx_market.conf
 import jmespath
 import re
 
+CONF = flocx_market.conf.CONF
+
 
 def apply_operator(val1, val2, op):
 
@@ -100,26 +105,54 @@ def match_specs(match_expression, data):
     return True
 
 
+def iter_matching_offers(context,
+                         specs,
+                         start_time=None,
+                         end_time=None,
+                         order_by=None):
+
+    # simple specs on the indexed config keys are evaluated by the database,
+    # only the remainder is evaluated here
+    sql_specs, python_specs = offer.Offer.split_specs(specs)
+    all_offers = offer.Offer.iter_available_status_contract(
+        context,
+        start_time=start_time,
+        end_time=end_time,
+        specs=sql_specs,
+        order_by=order_by)
+
+    for o in all_offers:
+        metrics.MATCHER_OFFERS_EVALUATED.inc()
+        if match_specs(python_specs, o.config):
+            yield o
+
+
 def get_all_matching_offers(context,
                             specs,
                             start_time=None,
                             end_time=None,
                             first=False):
 
-    all_offers = offer.Offer.\
-                    get_available_status_contract(
-                                      context,
-                                      start_time=start_time,
-                                      end_time=end_time)
-
-    matching_offers = []
-
-    for o in all_offers:
-        if match_specs(specs, o.config):
-            if first:
-                return o
-            else:
-                matching_offers.append(o)
+    matching_offers = iter_matching_offers(context,
+                                           specs,
+                                           start_time=start_time,
+                                           end_time=end_time)
     if first:
-        return None
-    return matching_offers
+        return next(matching_offers, None)
+    return list(matching_offers)
+
+
+def get_ranked_matching_offers(context,
+                               specs,
+                               count,
+                               start_time=None,
+                               end_time=None,
+                               policy=None):
+
+    policy = ranking.get_policy(policy or CONF.manager.matcher_ranking)
+    matching_offers = iter_matching_offers(context,
+                                           specs,
+                                           start_time=start_time,
+                                           end_time=end_time,
+                                           order_by=policy.order_by)
+    return policy.select(matching_offers, count, specs)
@@ -0,0 +1,158 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import multiprocessing
+import threading
+
+from eventlet import hubs
+
+from flocx_market.matcher import matcher
+
+
+def _feasible_offers(snapshot, bids):
+    offers = json.loads(snapshot)
+    feasible = {}
+    for bid_id, specs in bids:
+        feasible[bid_id] = [offer_id for offer_id, config in offers
+                            if matcher.match_specs(specs, config)]
+    return feasible
+
+
+def _worker(requests, replies):
+    while True:
+        try:
+            snapshot, bids = requests.recv()
+        except EOFError:
+            return
+        try:
+            reply = (None, _feasible_offers(snapshot, bids))
+        except Exception as e:
+            reply = (e, None)
+        replies.send(reply)
+
+
+class WorkerPool(object):
+    """Spec evaluation processes kept across matcher ticks.
+
+    Results are waited for through the eventlet hub: os isn't monkey
+    patched in the manager, so a plain recv() on a worker's pipe would
+    stall every other green thread until the worker answered.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def _start_worker(self):
+        # spawn rather than fork: the manager runs under eventlet and a
+        # forked child would inherit its hub and database connections
+        mp_context = multiprocessing.get_context('spawn')
+        # one-way pipes are os.pipe()s, which stay blocking; a duplex one
+        # is a socketpair, which eventlet's patched socket makes
+        # non-blocking
+        request_reader, request_writer = mp_context.Pipe(duplex=False)
+        reply_reader, reply_writer = mp_context.Pipe(duplex=False)
+        proc = mp_context.Process(target=_worker,
+                                  args=(request_reader, reply_writer),
+                                  daemon=True)
+        proc.start()
+        request_reader.close()
+        reply_writer.close()
+        return proc, request_writer, reply_reader
+
+    def _discard(self, worker):
+        proc, requests, replies = worker
+        self._workers.remove(worker)
+        requests.close()
+        replies.close()
+        proc.join()
+
+    def _receive(self, worker):
+        proc, _, replies = worker
+        try:
+            hubs.trampoline(replies.fileno(), read=True)
+            return replies.recv()
+        except (EOFError, OSError):
+            self._discard(worker)
+            return (RuntimeError("Matcher worker exited with code %s"
+                                 % proc.exitcode), None)
+
+    def map(self, snapshot, partitions):
+        """Evaluate each partition of bids against snapshot in a worker
+        of its own and return the merged results."""
+        with self._lock:
+            for worker in list(self._workers):
+                if not worker[0].is_alive():
+                    self._discard(worker)
+            while len(self._workers) < self.size:
+                self._workers.append(self._start_worker())
+
+            feasible = {}
+            error = None
+            busy = []
+            for worker, partition in zip(list(self._workers), partitions):
+                if not partition:
+                    continue
+                try:
+                    worker[1].send((snapshot, partition))
+                except OSError as e:
+                    self._discard(worker)
+                    error = error or e
+                    continue
+                busy.append(worker)
+            for worker in busy:
+                exc, result = self._receive(worker)
+                if exc is not None:
+                    error = error or exc
+                else:
+                    feasible.update(result)
+        if error is not None:
+            raise error
+        return feasible
+
+    def shutdown(self):
+        with self._lock:
+            for worker in list(self._workers):
+                self._discard(worker)
+
+
+_pool = None
+
+
+def get_pool(size):
+    """Return the process-wide pool, resized to size workers."""
+    global _pool
+    if _pool is None or _pool.size != size:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = WorkerPool(size)
+    return _pool
+
+
+def find_feasible_offers(bids, offers, workers):
+    """Evaluate every bid's specs against every offer's config.
+
+    The offers are serialized once into a compact JSON snapshot that is
+    handed to each of the pool's worker processes together with its
+    share of the bids. Workers only run match_specs; the caller still
+    has to check time windows and existing contracts before assigning
+    an offer.
+
+    Returns a dict mapping bid ids to the ids of the offers whose config
+    matches the bid's specs, in the order the offers were given.
+    """
+    snapshot = json.dumps([[o.offer_id, o.config] for o in offers])
+    bid_specs = [(b.bid_id, b.config_query['specs']) for b in bids]
+    partitions = [bid_specs[i::workers] for i in range(workers)]
+    return get_pool(workers).map(snapshot, partitions)
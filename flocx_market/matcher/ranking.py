@@ -0,0 +1,83 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import heapq
+import itertools
+
+COST = 'cost'
+START_TIME = 'start_time'
+BEST_FIT = 'best_fit'
+
+
+class RankingPolicy(object):
+    """Orders matching offers so the matcher can pick the best K of them.
+
+    `key` is called with an offer and the bid's specs and must return a
+    sortable value; the offer id is always appended to it so ties are
+    broken deterministically. When `order_by` lists offer columns that
+    produce the same order as `key`, the database returns offers already
+    ranked and selection stops after the first K matches.
+    """
+
+    def __init__(self, name, key, order_by=None):
+        self.name = name
+        self.key = key
+        self.order_by = order_by
+
+    def select(self, offers, count, specs=None):
+        if self.order_by is not None:
+            return list(itertools.islice(offers, count))
+
+        return heapq.nsmallest(
+            count, offers,
+            key=lambda o: (self.key(o, specs), o.offer_id))
+
+
+def _fit_slack(offer, specs):
+    # relative amount by which an offer exceeds the bid's lower bounds
+    slack = 0.0
+    for exp in specs or []:
+        key, op, val = exp[0], exp[1], exp[2]
+        if op not in ('>=', '>', '==') or '.' in key:
+            continue
+        try:
+            wanted = float(val)
+            actual = float(offer.config.get(key))
+        except (TypeError, ValueError):
+            continue
+        if wanted > 0:
+            slack += (actual - wanted) / wanted
+    return slack
+
+
+_POLICIES = {}
+
+
+def register_policy(name, key, order_by=None):
+    _POLICIES[name] = RankingPolicy(name, key, order_by=order_by)
+
+
+def get_policy(name):
+    try:
+        return _POLICIES[name]
+    except KeyError:
+        raise ValueError("Unknown offer ranking policy %s" % name)
+
+
+register_policy(COST,
+                lambda o, specs: o.cost,
+                order_by=['cost', 'offer_id'])
+register_policy(START_TIME,
+                lambda o, specs: o.start_time,
+                order_by=['start_time', 'offer_id'])
+register_policy(BEST_FIT,
+                lambda o, specs: (_fit_slack(o, specs), o.cost))
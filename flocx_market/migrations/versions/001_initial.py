@@ -0,0 +1,103 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Schema of the releases that predate migrations
+
+Databases created by those releases' flocx-market-dbsync already have
+these tables, so only the missing ones are created.
+
+Revision ID: 001
+Revises:
+"""
+
+from alembic import op
+import sqlalchemy as sa
+import sqlalchemy_jsonfield
+
+revision = '001'
+down_revision = None
+
+
+def _json():
+    return sqlalchemy_jsonfield.JSONField(enforce_string=True,
+                                          enforce_unicode=False)
+
+
+def _timestamps():
+    return [sa.Column('created_at', sa.DateTime),
+            sa.Column('updated_at', sa.DateTime)]
+
+
+def upgrade():
+    existing = sa.inspect(op.get_bind()).get_table_names()
+
+    if 'bids' not in existing:
+        op.create_table(
+            'bids',
+            sa.Column('bid_id', sa.String(64), primary_key=True,
+                      autoincrement=False),
+            sa.Column('project_id', sa.String(64), nullable=False),
+            sa.Column('quantity', sa.Integer, nullable=False),
+            sa.Column('start_time', sa.DateTime(timezone=True),
+                      nullable=False),
+            sa.Column('end_time', sa.DateTime(timezone=True),
+                      nullable=False),
+            sa.Column('duration', sa.Integer, nullable=False),
+            sa.Column('status', sa.String(15), nullable=False),
+            sa.Column('config_query', _json(), nullable=False),
+            sa.Column('cost', sa.Float, nullable=False),
+            *_timestamps())
+
+    if 'offers' not in existing:
+        op.create_table(
+            'offers',
+            sa.Column('offer_id', sa.String(64), primary_key=True,
+                      autoincrement=False),
+            sa.Column('project_id', sa.String(64), nullable=False),
+            sa.Column('status', sa.String(15), nullable=False),
+            sa.Column('resource_id', sa.String(64), nullable=False),
+            sa.Column('resource_type', sa.String(64), nullable=False),
+            sa.Column('start_time', sa.DateTime(timezone=True),
+                      nullable=False),
+            sa.Column('end_time', sa.DateTime(timezone=True),
+                      nullable=True),
+            sa.Column('config', _json(), nullable=False),
+            sa.Column('cost', sa.Float, nullable=False),
+            *_timestamps())
+
+    if 'contracts' not in existing:
+        op.create_table(
+            'contracts',
+            sa.Column('contract_id', sa.String(64), primary_key=True,
+                      autoincrement=False),
+            sa.Column('status', sa.String(15), nullable=False),
+            sa.Column('start_time', sa.DateTime(timezone=True),
+                      nullable=False),
+            sa.Column('end_time', sa.DateTime(timezone=True),
+                      nullable=False),
+            sa.Column('cost', sa.Float, nullable=False),
+            sa.Column('bid_id', sa.String(64),
+                      sa.ForeignKey('bids.bid_id')),
+            sa.Column('project_id', sa.String(64), nullable=False),
+            *_timestamps())
+
+    if 'offer_contract_relationship' not in existing:
+        op.create_table(
+            'offer_contract_relationship',
+            sa.Column('offer_contract_relationship_id', sa.String(64),
+                      primary_key=True, autoincrement=False),
+            sa.Column('offer_id', sa.String(64),
+                      sa.ForeignKey('offers.offer_id')),
+            sa.Column('contract_id', sa.String(64),
+                      sa.ForeignKey('contracts.contract_id')),
+            sa.Column('status', sa.String(15), nullable=False),
+            *_timestamps())
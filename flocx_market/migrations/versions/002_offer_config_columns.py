@@ -0,0 +1,73 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Copy simple offer config values into typed, indexed columns
+
+Revision ID: 002
+Revises: 001
+"""
+
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '002'
+down_revision = '001'
+
+# config key, column and type, as in models.OFFER_CONFIG_COLUMNS when
+# this migration was written
+COLUMNS = [
+    ('cpus', 'config_cpus', float),
+    ('memory_mb', 'config_memory_mb', float),
+    ('local_gb', 'config_local_gb', float),
+    ('cpu_arch', 'config_cpu_arch', str),
+]
+
+
+def _column_value(value, col_type):
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    if col_type is str:
+        return value if isinstance(value, str) else None
+    try:
+        return col_type(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def upgrade():
+    with op.batch_alter_table('offers') as batch_op:
+        for _, column, col_type in COLUMNS:
+            sa_type = sa.String(64) if col_type is str else sa.Float
+            batch_op.add_column(sa.Column(column, sa_type, nullable=True))
+            batch_op.create_index('ix_offers_%s' % column, [column])
+
+    offers = sa.table('offers',
+                      sa.column('offer_id', sa.String),
+                      sa.column('config'),
+                      *[sa.column(column) for _, column, _ in COLUMNS])
+    bind = op.get_bind()
+    rows = bind.execute(sa.select([offers.c.offer_id, offers.c.config]))
+    for offer_id, config in rows.fetchall():
+        # stored as text unless the backend has a native JSON type
+        if isinstance(config, (str, bytes)):
+            try:
+                config = json.loads(config)
+            except ValueError:
+                config = {}
+        if not isinstance(config, dict):
+            config = {}
+        bind.execute(
+            offers.update().where(offers.c.offer_id == offer_id).values(
+                {column: _column_value(config.get(key), col_type)
+                 for key, column, col_type in COLUMNS}))
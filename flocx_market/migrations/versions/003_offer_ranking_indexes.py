@@ -0,0 +1,29 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Index offers in the orders the matcher ranks them
+
+Revision ID: 003
+Revises: 002
+"""
+
+from alembic import op
+
+revision = '003'
+down_revision = '002'
+
+
+def upgrade():
+    op.create_index('offers_status_cost_idx', 'offers',
+                    ['status', 'cost', 'offer_id'])
+    op.create_index('offers_status_start_time_idx', 'offers',
+                    ['status', 'start_time', 'offer_id'])
@@ -0,0 +1,93 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Archive tables for expired records
+
+Revision ID: 004
+Revises: 003
+"""
+
+from alembic import op
+import sqlalchemy as sa
+import sqlalchemy_jsonfield
+
+revision = '004'
+down_revision = '003'
+
+
+def _json():
+    return sqlalchemy_jsonfield.JSONField(enforce_string=True,
+                                          enforce_unicode=False)
+
+
+def _id(name):
+    return sa.Column(name, sa.String(64), primary_key=True,
+                     autoincrement=False)
+
+
+def _time(name, nullable=False):
+    return sa.Column(name, sa.DateTime(timezone=True), nullable=nullable)
+
+
+def _create_archive(name, *columns):
+    # same columns as the live table but no foreign keys, rows are only
+    # ever inserted in bulk and read back for history queries
+    op.create_table(
+        name, *columns,
+        sa.Column('created_at', sa.DateTime),
+        sa.Column('updated_at', sa.DateTime),
+        sa.Column('archived_at', sa.DateTime, nullable=False))
+    op.create_index('ix_%s_archived_at' % name, name, ['archived_at'])
+
+
+def upgrade():
+    _create_archive(
+        'offers_archive',
+        _id('offer_id'),
+        sa.Column('project_id', sa.String(64), nullable=False),
+        sa.Column('status', sa.String(15), nullable=False),
+        sa.Column('resource_id', sa.String(64), nullable=False),
+        sa.Column('resource_type', sa.String(64), nullable=False),
+        _time('start_time'),
+        _time('end_time', nullable=True),
+        sa.Column('config', _json(), nullable=False),
+        sa.Column('cost', sa.Float, nullable=False),
+        sa.Column('config_cpus', sa.Float),
+        sa.Column('config_memory_mb', sa.Float),
+        sa.Column('config_local_gb', sa.Float),
+        sa.Column('config_cpu_arch', sa.String(64)))
+    _create_archive(
+        'bids_archive',
+        _id('bid_id'),
+        sa.Column('project_id', sa.String(64), nullable=False),
+        sa.Column('quantity', sa.Integer, nullable=False),
+        _time('start_time'),
+        _time('end_time'),
+        sa.Column('duration', sa.Integer, nullable=False),
+        sa.Column('status', sa.String(15), nullable=False),
+        sa.Column('config_query', _json(), nullable=False),
+        sa.Column('cost', sa.Float, nullable=False))
+    _create_archive(
+        'contracts_archive',
+        _id('contract_id'),
+        sa.Column('status', sa.String(15), nullable=False),
+        _time('start_time'),
+        _time('end_time'),
+        sa.Column('cost', sa.Float, nullable=False),
+        sa.Column('bid_id', sa.String(64)),
+        sa.Column('project_id', sa.String(64), nullable=False))
+    _create_archive(
+        'offer_contract_relationship_archive',
+        _id('offer_contract_relationship_id'),
+        sa.Column('offer_id', sa.String(64)),
+        sa.Column('contract_id', sa.String(64)),
+        sa.Column('status', sa.String(15), nullable=False))
@@ -0,0 +1,87 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Store statuses as small integer codes and index live records
+
+Revision ID: 005
+Revises: 004
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '005'
+down_revision = '004'
+
+# statuses.CODES when this migration was written; 'busy' is what the
+# matcher used to call claimed bids
+CODES = {
+    'available': 1,
+    'claimed': 2,
+    'busy': 2,
+    'fulfilled': 3,
+    'expired': 4,
+}
+
+ACTIVE = sa.text('status IN (1, 2, 3)')
+
+TABLES = ['offers', 'bids', 'contracts', 'offer_contract_relationship']
+
+
+def _convert(table):
+    bind = op.get_bind()
+    t = sa.table(table,
+                 sa.column('status', sa.String),
+                 sa.column('status_code', sa.SmallInteger))
+    unknown = [row[0] for row in bind.execute(
+        sa.select([t.c.status]).distinct().where(
+            t.c.status.notin_(list(CODES))))]
+    if unknown:
+        raise RuntimeError("%s has rows with unknown statuses %s, fix or "
+                           "remove them before upgrading"
+                           % (table, ', '.join(sorted(unknown))))
+
+    with op.batch_alter_table(table) as batch_op:
+        batch_op.add_column(sa.Column('status_code', sa.SmallInteger))
+    for name, code in CODES.items():
+        bind.execute(t.update().where(t.c.status == name).values(
+            status_code=code))
+    with op.batch_alter_table(table) as batch_op:
+        batch_op.drop_column('status')
+        batch_op.alter_column('status_code', new_column_name='status',
+                              existing_type=sa.SmallInteger,
+                              nullable=False)
+
+
+def _active_index(name, table, columns):
+    op.create_index(name, table, columns,
+                    postgresql_where=ACTIVE, sqlite_where=ACTIVE)
+
+
+def upgrade():
+    op.drop_index('offers_status_cost_idx', table_name='offers')
+    op.drop_index('offers_status_start_time_idx', table_name='offers')
+
+    for table in TABLES:
+        _convert(table)
+        _convert(table + '_archive')
+
+    op.create_index('offers_status_cost_idx', 'offers',
+                    ['status', 'cost', 'offer_id'])
+    op.create_index('offers_status_start_time_idx', 'offers',
+                    ['status', 'start_time', 'offer_id'])
+    _active_index('offers_active_idx', 'offers', ['status', 'end_time'])
+    _active_index('bids_active_idx', 'bids', ['status', 'end_time'])
+    _active_index('contracts_active_idx', 'contracts',
+                  ['status', 'end_time'])
+    _active_index('offer_contract_relationship_active_idx',
+                  'offer_contract_relationship', ['status'])
@@ -0,0 +1,30 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Index the timestamps the manager's change watermark reads
+
+Revision ID: 006
+Revises: 005
+"""
+
+from alembic import op
+
+revision = '006'
+down_revision = '005'
+
+TABLES = ['offers', 'bids', 'contracts']
+
+
+def upgrade():
+    for table in TABLES:
+        for column in ('created_at', 'updated_at'):
+            op.create_index('%s_%s_idx' % (table, column), table, [column])
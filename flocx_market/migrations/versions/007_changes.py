@@ -0,0 +1,38 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Change log of writes to offers, bids, contracts and their relationships
+
+Revision ID: 007
+Revises: 006
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '007'
+down_revision = '006'
+
+
+def upgrade():
+    op.create_table(
+        'changes',
+        sa.Column('seq', sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column('resource_type', sa.String(64), nullable=False),
+        sa.Column('resource_id', sa.String(64), nullable=False),
+        sa.Column('action', sa.String(16), nullable=False),
+        sa.Column('status', sa.SmallInteger),
+        sa.Column('project_id', sa.String(64)),
+        sa.Column('created_at', sa.DateTime),
+        sa.Column('updated_at', sa.DateTime),
+        sqlite_autoincrement=True)
+    op.create_index('changes_created_at_idx', 'changes', ['created_at'])
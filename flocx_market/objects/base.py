@@ -1,7 +1,10 @@
 from oslo_log import log
+from oslo_utils import timeutils
 from oslo_versionedobjects import base as object_base
 import datetime
+import six
 
+from flocx_market.common import exception
 from flocx_market.objects import fields
 
 
@@ -18,6 +21,21 @@ class FLOCXMarketObject(object_base.VersionedObject):
         'updated_at': fields.DateTimeField(nullable=True),
     }
 
+    @classmethod
+    def _parse_timestamps(cls, data):
+        # requests carry timestamps as ISO 8601 strings, the database wants
+        # naive UTC datetimes
+        for key, field in cls.fields.items():
+            value = data.get(key)
+            if isinstance(field, fields.DateTimeField) and \
+                    isinstance(value, six.string_types):
+                try:
+                    data[key] = timeutils.normalize_time(
+                        timeutils.parse_isotime(value))
+                except ValueError:
+                    raise exception.InvalidTimestamp(value=value, field=key)
+        return data
+
     @staticmethod
     def _from_db_object(obj, db_obj):
         for key in obj.fields:
@@ -3,6 +3,7 @@ from oslo_versionedobjects import base as versioned_objects_base
 from flocx_market.common import statuses
 import flocx_market.db.sqlalchemy.api as db
 from flocx_market.objects import base
+from flocx_market.objects import contract
 from flocx_market.objects import fields
 
 
@@ -23,7 +24,7 @@ class Bid(base.FLOCXMarketObject):
 
     @classmethod
     def create(cls, data, context):
-        b = db.bid_create(data, context)
+        b = db.bid_create(cls._parse_timestamps(data), context)
         return cls._from_db_object(cls(), b)
 
     @classmethod
@@ -52,6 +53,11 @@ class Bid(base.FLOCXMarketObject):
             self.bid_id, updates, context)
         return self._from_db_object(self, db_bid)
 
+    @classmethod
+    def get_all_archived(cls, context):
+        archived = db.bid_get_all_archived(context)
+        return cls._from_db_object_list(archived)
+
     @classmethod
     def get_all_unexpired(cls, context):
         unexpired = db.bid_get_all_unexpired(context)
@@ -67,6 +73,10 @@ class Bid(base.FLOCXMarketObject):
         available = db.bid_get_all_by_status(status, context)
         return cls._from_db_object_list(available)
 
+    def contracts(self, context):
+        db_contracts = db.bid_get_contracts(context, self.bid_id)
+        return contract.Contract._from_db_object_list(db_contracts)
+
     def expire(self, context):
         self.status = statuses.EXPIRED
         self.save(context)
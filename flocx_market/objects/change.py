@@ -0,0 +1,52 @@
+from oslo_versionedobjects import base as versioned_objects_base
+
+import flocx_market.db.sqlalchemy.api as db
+from flocx_market.objects import base
+from flocx_market.objects import fields
+
+
+@versioned_objects_base.VersionedObjectRegistry.register
+class Change(base.FLOCXMarketObject):
+
+    fields = {
+        'seq': fields.IntegerField(),
+        'resource_type': fields.StringField(),
+        'resource_id': fields.StringField(),
+        'action': fields.StringField(),
+        'status': fields.StringField(nullable=True),
+        'project_id': fields.StringField(nullable=True),
+    }
+
+    @classmethod
+    def get_since(cls, context, since=0, limit=100):
+        changes = db.change_get_since(context, since, limit)
+        return cls._from_db_object_list(changes)
+
+
+class ChangeCursor(object):
+    """Read the change log from where the previous read stopped, so a
+    consumer only processes what was written since."""
+
+    def __init__(self, since=0, limit=100):
+        self.since = since
+        self.limit = limit
+
+    def skip_to_end(self, context):
+        """Move past every change written so far."""
+        self.since = db.change_latest_seq(context)
+
+    def read(self, context):
+        """Return the next page of changes and move past them."""
+        changes = Change.get_since(context, self.since, self.limit)
+        if changes:
+            self.since = changes[-1].seq
+        return changes
+
+    def read_all(self, context):
+        """Yield every change written since the previous read."""
+        while True:
+            changes = self.read(context)
+            for change in changes:
+                yield change
+            if len(changes) < self.limit:
+                return
@@ -5,6 +5,7 @@ from flocx_market.common import statuses
 import flocx_market.db.sqlalchemy.api as db
 from flocx_market.objects import base
 from flocx_market.objects import fields
+from flocx_market.objects import offer
 from flocx_market.objects import offer_contract_relationship
 
 
@@ -56,7 +57,7 @@ class Contract(base.FLOCXMarketObject):
 
     @classmethod
     def create(cls, data, context):
-        c = db.contract_create(data, context)
+        c = db.contract_create(cls._parse_timestamps(data), context)
         return cls._from_db_object(cls(), c)
 
     def destroy(self, context):
@@ -68,25 +69,34 @@ class Contract(base.FLOCXMarketObject):
         db_contract = db.contract_update(self.contract_id, updates, context)
         return self._from_db_object(self, db_contract)
 
+    @classmethod
+    def get_all_archived(cls, context):
+        archived = db.contract_get_all_archived(context)
+        return cls._from_db_object_list(archived)
+
     @classmethod
     def get_all_unexpired(cls, context):
         unexpired = db.contract_get_all_unexpired(context)
         return cls._from_db_object_list(unexpired)
 
+    def offers(self, context):
+        return offer.Offer._from_db_object_list(
+            db.contract_get_offers(context, self.contract_id))
+
+    def _offer_contract_relationships(self, context):
+        return offer_contract_relationship.OfferContractRelationship\
+            .get_all_for_contract(context, self)
+
     def fulfill(self, context):
-        ocrs = offer_contract_relationship.OfferContractRelationship.get_all(
-            context, {'contract_id': self.contract_id})
-        for ocr in ocrs:
-            ocr.fulfill(context)
+        offer_contract_relationship.OfferContractRelationship.fulfill_all(
+            context, self._offer_contract_relationships(context))
 
         self.status = statuses.FULFILLED
         self.save(context)
 
     def expire(self, context):
-        ocrs = offer_contract_relationship.OfferContractRelationship.get_all(
-            context, {'contract_id': self.contract_id})
-        for ocr in ocrs:
-            ocr.expire(context)
+        offer_contract_relationship.OfferContractRelationship.expire_all(
+            context, self._offer_contract_relationships(context))
 
         self.status = statuses.EXPIRED
         self.save(context)
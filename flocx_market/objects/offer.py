@@ -4,9 +4,11 @@ from flocx_market.common import statuses
 import flocx_market.db.sqlalchemy.api as db
 from flocx_market.objects import base
 from flocx_market.objects import fields
-from flocx_market.objects import offer_contract_relationship as oc_relationship
 from flocx_market.objects import contract
 from flocx_market.resource_objects import resource_object_factory as ro_factory
+import flocx_market.conf
+
+CONF = flocx_market.conf.CONF
 
 
 @versioned_objects_base.VersionedObjectRegistry.register
@@ -26,12 +28,15 @@ class Offer(base.FLOCXMarketObject):
 
     @classmethod
     def create(cls, data, context):
+        resource = None
         if 'config' not in data:
-            ro = ro_factory.ResourceObjectFactory.get_resource_object(
+            # one fetch answers both the config and the ownership check
+            resource = ro_factory.ResourceObjectFactory.get_resource_snapshot(
                 data['resource_type'], data['resource_id'])
-            data['config'] = ro.get_node_config()
+            data['config'] = resource.get_node_config()
 
-        o = db.offer_create(data, context)
+        o = db.offer_create(cls._parse_timestamps(data), context,
+                            resource=resource)
         return cls._from_db_object(cls(), o)
 
     @classmethod
@@ -60,6 +65,11 @@ class Offer(base.FLOCXMarketObject):
             self.offer_id, updates, context)
         return self._from_db_object(self, db_offer)
 
+    @classmethod
+    def get_all_archived(cls, context):
+        archived = db.offer_get_all_archived(context)
+        return cls._from_db_object_list(archived)
+
     @classmethod
     def get_all_unexpired(cls, context):
         unexpired = db.offer_get_all_unexpired(context)
@@ -71,14 +81,9 @@ class Offer(base.FLOCXMarketObject):
         return cls._from_db_object_list(by_project_id)
 
     def related_contracts(self, context):
-        related_contracts = []
-        ocrs = oc_relationship.OfferContractRelationship.get_all(
-            context,
-            {'offer_id': self.offer_id}
-        )
-        for ocr in ocrs:
-            related_contracts.append(ocr.contract(context))
-        return related_contracts
+        related_contracts = db.offer_get_related_contracts(context,
+                                                           self.offer_id)
+        return contract.Contract._from_db_object_list(related_contracts)
 
     def expire(self, context):
         # make sure all related contracts are expired
@@ -94,43 +99,53 @@ class Offer(base.FLOCXMarketObject):
         return ro_factory.ResourceObjectFactory.get_resource_object(
             self.resource_type, self.resource_id)
 
+    @staticmethod
+    def split_specs(specs):
+        return db.offer_split_config_specs(specs)
+
     @classmethod
     def get_available_status_contract(cls,
                                       context,
                                       start_time,
-                                      end_time):
-        def check_contracts_time(context,
-                                 prev_contracts,
-                                 start_time,
-                                 end_time):
-            for con in prev_contracts:
-                c = contract.Contract.get(con.contract_id, context)
-                if not (end_time <= c.start_time or start_time >= c.end_time):
-                    return False
-            return True
-
-        offers_by_status = db.offer_get_all_by_status(
-            statuses.AVAILABLE, context)
-
-        if start_time is None and end_time is None:
-            return cls._from_db_object_list(offers_by_status)
+                                      end_time,
+                                      specs=None):
+        return list(cls.iter_available_status_contract(
+            context, start_time, end_time, specs=specs))
 
-        else:
-            valid_offers = []
-            for o in offers_by_status:
-                prev_con = oc_relationship.OfferContractRelationship. \
-                    get_all(context,
-                            filters={'offer_id':
-                                     o.offer_id}
-                            )
-
-                if o.start_time < start_time and o.end_time > end_time \
-                        and check_contracts_time(context, prev_con,
-                                                 start_time,
-                                                 end_time):
-                    valid_offers.append(o)
-
-            return cls._from_db_object_list(valid_offers)
+    @classmethod
+    def iter_available_status_contract(cls,
+                                       context,
+                                       start_time,
+                                       end_time,
+                                       specs=None,
+                                       order_by=None):
+        """Lazily yield available offers free between start and end time.
+
+        Offers are streamed from the database in batches and checked
+        against their existing contracts one at a time, so a caller that
+        stops iterating early neither loads nor checks the remaining ones.
+        """
+        offers_by_status = db.offer_iter_by_status(
+            statuses.AVAILABLE, context, specs=specs, order_by=order_by,
+            batch_size=CONF.manager.matcher_batch_size)
+
+        for o in offers_by_status:
+            offer = cls._from_db_object(cls(), o)
+            if start_time is None and end_time is None:
+                yield offer
+            elif offer.available_between(context, start_time, end_time):
+                yield offer
+
+    def available_between(self, context, start_time, end_time):
+        """Whether the offer covers the time window and none of its
+        existing contracts overlap it."""
+        if not (self.start_time < start_time and self.end_time > end_time):
+            return False
+
+        for c in self.related_contracts(context):
+            if not (end_time <= c.start_time or start_time >= c.end_time):
+                return False
+        return True
 
     @classmethod
     def get_all_by_status(cls, status, context):
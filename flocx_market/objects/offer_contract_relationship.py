@@ -1,3 +1,5 @@
+import collections
+
 from oslo_versionedobjects import base as versioned_objects_base
 
 from flocx_market.common import statuses
@@ -6,6 +8,7 @@ from flocx_market.objects import base
 from flocx_market.objects import contract
 from flocx_market.objects import fields
 from flocx_market.objects import offer
+from flocx_market.resource_objects import resource_object_factory as ro_factory
 
 
 @versioned_objects_base.VersionedObjectRegistry.register
@@ -18,6 +21,19 @@ class OfferContractRelationship(base.FLOCXMarketObject):
         'status': fields.StringField(),
     }
 
+    @staticmethod
+    def _from_db_object(obj, db_obj):
+        base.FLOCXMarketObject._from_db_object(obj, db_obj)
+        # keep the offer and contract loaded along with the relationship
+        loaded = getattr(db_obj, '__dict__', {})
+        if loaded.get('offer') is not None:
+            obj._offer = offer.Offer._from_db_object(offer.Offer(),
+                                                     loaded['offer'])
+        if loaded.get('contract') is not None:
+            obj._contract = contract.Contract._from_db_object(
+                contract.Contract(), loaded['contract'])
+        return obj
+
     @classmethod
     def get(cls, context, ocr_id):
         o = db.offer_contract_relationship_get(context, ocr_id)
@@ -45,29 +61,110 @@ class OfferContractRelationship(base.FLOCXMarketObject):
             context, self.offer_contract_relationship_id, updates)
         return self._from_db_object(self, db_offer_contract_relationship)
 
+    @classmethod
+    def get_all_for_contract(cls, context, contract_):
+        """Return the relationships of a contract with the contract and
+        their offers already attached, so that neither offer() nor
+        contract() needs another query."""
+        ocrs = []
+        for db_ocr in db.offer_contract_relationship_get_all_with_offers(
+                context, contract_.contract_id):
+            ocr = cls._from_db_object(cls(), db_ocr)
+            ocr._contract = contract_
+            ocrs.append(ocr)
+        return ocrs
+
     def contract(self, context):
+        if getattr(self, '_contract', None) is not None:
+            return self._contract
         return contract.Contract.get(self.contract_id, context)
 
     def offer(self, context):
+        if getattr(self, '_offer', None) is not None:
+            return self._offer
         return offer.Offer.get(self.offer_id, context)
 
+    @classmethod
+    def get_all_archived(cls, context, filters=None):
+        archived = db.offer_contract_relationship_get_all_archived(context,
+                                                                   filters)
+        return cls._from_db_object_list(archived)
+
     @classmethod
     def get_all_unexpired(cls, context):
         unexpired = db.offer_contract_relationship_get_all_unexpired(context)
         return cls._from_db_object_list(unexpired)
 
-    def fulfill(self, context):
+    def _claim_resource(self, context):
         ro = self.offer(context).resource_object()
         ro.set_contract(self.contract(context))
 
-        self.status = statuses.FULFILLED
-        self.save(context)
-
-    def expire(self, context):
+    def _release_resource(self, context):
         ro = self.offer(context).resource_object()
         c = self.contract(context)
         if ro.get_contract_uuid() == c.contract_id:
             ro.set_contract(None)
 
+    def fulfill(self, context):
+        self._claim_resource(context)
+
+        self.status = statuses.FULFILLED
+        self.save(context)
+
+    def expire(self, context):
+        self._release_resource(context)
+
         self.status = statuses.EXPIRED
         self.save(context)
+
+    @staticmethod
+    def _can_transition(ocrs, status):
+        return [ocr for ocr in ocrs
+                if statuses.can_transition(
+                    statuses.OFFER_CONTRACT_RELATIONSHIP, ocr.status, status)]
+
+    @classmethod
+    def _save_status(cls, context, ocrs, status):
+        # the update skips rows another process moved on in the meantime
+        changed = set(db.offer_contract_relationship_update_status(
+            context,
+            [ocr.offer_contract_relationship_id for ocr in ocrs],
+            status))
+        saved = []
+        for ocr in ocrs:
+            if ocr.offer_contract_relationship_id in changed:
+                ocr.status = status
+                ocr.obj_reset_changes(['status'])
+                saved.append(ocr)
+        return saved
+
+    @staticmethod
+    def _assignments_by_type(context, ocrs):
+        by_type = collections.defaultdict(list)
+        for ocr in ocrs:
+            o = ocr.offer(context)
+            by_type[o.resource_type].append(
+                (o.resource_id, ocr.contract(context)))
+        return by_type
+
+    @classmethod
+    def fulfill_all(cls, context, ocrs):
+        """Claim the resources of the relationships that may be fulfilled
+        and return those whose status was changed."""
+        ocrs = cls._can_transition(ocrs, statuses.FULFILLED)
+        by_type = cls._assignments_by_type(context, ocrs)
+        for resource_type, assignments in by_type.items():
+            ro_factory.ResourceObjectFactory.set_contracts(
+                resource_type, assignments)
+        return cls._save_status(context, ocrs, statuses.FULFILLED)
+
+    @classmethod
+    def expire_all(cls, context, ocrs):
+        """Release the resources of the relationships that may be expired
+        and return those whose status was changed."""
+        ocrs = cls._can_transition(ocrs, statuses.EXPIRED)
+        by_type = cls._assignments_by_type(context, ocrs)
+        for resource_type, assignments in by_type.items():
+            ro_factory.ResourceObjectFactory.release_contracts(
+                resource_type, assignments)
+        return cls._save_status(context, ocrs, statuses.EXPIRED)
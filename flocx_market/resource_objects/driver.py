@@ -0,0 +1,50 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+class ResourceDriver(object):
+    """Access to every resource of one type.
+
+    A driver is loaded once per process and owns whatever its resources
+    share, such as a client or a cache. The batch methods default to one
+    call per resource; drivers override them when the backend can do
+    better.
+    """
+
+    resource_type = None
+
+    def get(self, resource_id):
+        """Return the resource object for resource_id."""
+        raise NotImplementedError()
+
+    def get_many(self, resource_ids):
+        """Return a dict mapping resource ids to snapshots."""
+        return {resource_id: self.get(resource_id).snapshot()
+                for resource_id in resource_ids}
+
+    def set_contract_many(self, assignments):
+        """Point each resource at its contract, or clear it for None.
+
+        assignments is a list of (resource_id, contract) pairs.
+        """
+        for resource_id, contract in assignments:
+            self.get(resource_id).set_contract(contract)
+
+    def release_contract_many(self, assignments):
+        """Clear the contract of each resource still pointing at the given
+        one.
+
+        assignments is a list of (resource_id, contract) pairs.
+        """
+        for resource_id, contract in assignments:
+            ro = self.get(resource_id)
+            if ro.get_contract_uuid() == contract.contract_id:
+                ro.set_contract(None)
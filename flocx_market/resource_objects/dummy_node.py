@@ -10,50 +10,168 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
 import json
+import os
+import stat
+import tempfile
+
+from oslo_log import log
 
 import flocx_market.conf
+from flocx_market.resource_objects import driver
+from flocx_market.resource_objects import resource_types
+from flocx_market.resource_objects import snapshot
 
 
 CONF = flocx_market.conf.CONF
-DUMMY_NODE_DIR = CONF.dummy_node.dummy_node_dir
+LOG = log.getLogger(__name__)
+
+
+def _stat_key(st):
+    # os.replace gives the file a new inode, so a rewrite is noticed even
+    # when it lands within the filesystem's mtime granularity
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _file_mode(path):
+    """The permissions of path, or those a new file would be created
+    with."""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+class NodeStore(object):
+    """Parsed dummy node files, cached until the file changes on disk.
+
+    Every lookup still stats the file, so writes made by other processes
+    are picked up; only the open and JSON parse are skipped.
+    """
+
+    def __init__(self):
+        self._nodes = {}
+
+    def load(self, path):
+        key = _stat_key(os.stat(path))
+        entry = self._nodes.get(path)
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        with open(path) as node_file:
+            node_dict = json.load(node_file)
+        self._nodes[path] = (key, node_dict)
+        return node_dict
+
+    def write(self, path, node_dict):
+        """Replace the node file atomically: readers see either the old
+        or the new contents, never a partial write."""
+        node_dir = os.path.dirname(path) or '.'
+        mode = _file_mode(path)
+        fd, tmp_path = tempfile.mkstemp(dir=node_dir, prefix='.',
+                                        suffix='.tmp')
+        try:
+            # mkstemp creates the file readable by its owner only
+            os.fchmod(fd, mode)
+            with os.fdopen(fd, 'w') as node_file:
+                json.dump(node_dict, node_file)
+                if CONF.dummy_node.fsync:
+                    node_file.flush()
+                    os.fsync(node_file.fileno())
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        if CONF.dummy_node.fsync:
+            dir_fd = os.open(node_dir, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        self._nodes[path] = (_stat_key(os.stat(path)), node_dict)
+
+    def load_all(self, node_dir):
+        """Parse every node file in node_dir into the cache.
+
+        Returns the number of nodes loaded.
+        """
+        count = 0
+        with os.scandir(node_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith('.') or not entry.is_file():
+                    continue
+                try:
+                    self.load(entry.path)
+                except ValueError:
+                    LOG.warning("Skipping unreadable dummy node file %s",
+                                entry.path)
+                    continue
+                count += 1
+        return count
+
+    def clear(self):
+        self._nodes.clear()
+
+
+STORE = NodeStore()
+
+
+def preload():
+    """Index the whole dummy node directory, if it exists."""
+    node_dir = CONF.dummy_node.dummy_node_dir
+    if not os.path.isdir(node_dir):
+        return 0
+    count = STORE.load_all(node_dir)
+    LOG.info("Loaded %d dummy nodes from %s", count, node_dir)
+    return count
 
 
 class DummyNode(object):
 
     def __init__(self, uuid):
         self._uuid = uuid
-        self._path = DUMMY_NODE_DIR + "/" + uuid
+        self._path = os.path.join(CONF.dummy_node.dummy_node_dir, uuid)
+
+    def snapshot(self):
+        node_dict = STORE.load(self._path)
+        # copy, the cached dict is shared with other readers
+        return snapshot.ResourceSnapshot(
+            self._uuid,
+            copy.deepcopy(node_dict.get("server_config", None)),
+            project_owner_id=node_dict.get("project_owner_id", None),
+            project_id=node_dict.get("project_id", None),
+            contract_uuid=node_dict.get("contract_uuid", None))
 
     def get_contract_uuid(self):
-        with open(self._path) as node_file:
-            node_dict = json.load(node_file)
-        return node_dict.get("contract_uuid", None)
+        return self.snapshot().get_contract_uuid()
 
     def get_project_id(self):
-        with open(self._path) as node_file:
-            node_dict = json.load(node_file)
-        return node_dict.get("project_id", None)
+        return self.snapshot().get_project_id()
 
     def get_node_config(self):
-        with open(self._path) as node_file:
-            node_dict = json.load(node_file)
-        return node_dict.get("server_config", None)
+        return self.snapshot().get_node_config()
 
     def set_contract(self, contract):
-        with open(self._path) as node_file:
-            node_dict = json.load(node_file)
+        # copy, the cached dict is shared with other readers
+        node_dict = dict(STORE.load(self._path))
         if contract is None:
             node_dict.pop("contract_uuid", None)
             node_dict.pop("project_id", None)
         else:
             node_dict["contract_uuid"] = contract.contract_id
             node_dict["project_id"] = contract.project_id
-        with open(self._path, 'w') as node_file:
-            json.dump(node_dict, node_file)
+        STORE.write(self._path, node_dict)
+        snapshot.CACHE.invalidate(resource_types.DUMMY_NODE, self._uuid)
 
     def is_resource_admin(self, project_id):
-        with open(self._path) as node_file:
-            node_dict = json.load(node_file)
-        project_owner_id = node_dict.get("project_owner_id", None)
-        return (project_owner_id == project_id)
+        return self.snapshot().is_resource_admin(project_id)
+
+
+class DummyNodeDriver(driver.ResourceDriver):
+
+    resource_type = resource_types.DUMMY_NODE
+
+    def get(self, resource_id):
+        return DummyNode(resource_id)
@@ -10,83 +10,225 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import functools
+import threading
+
 from keystoneauth1 import loading as ks_loading
+from keystoneauth1 import session as ks_session
+from oslo_log import log
+import requests
 
 from ironicclient import client as ironic_client
+from ironicclient.common.apiclient import exceptions as ironic_exc
 
+from flocx_market.common import metrics
 import flocx_market.conf
+from flocx_market.resource_objects import driver
+from flocx_market.resource_objects import resource_types
+from flocx_market.resource_objects import snapshot
 
 
 CONF = flocx_market.conf.CONF
+LOG = log.getLogger(__name__)
 _cached_ironic_client = None
+_client_lock = threading.Lock()
+
+
+def _instrument_auth(auth_plugin):
+    """Count token fetches and the requests that use a token."""
+    get_auth_ref = getattr(auth_plugin, 'get_auth_ref', None)
+    if get_auth_ref is not None:
+        @functools.wraps(get_auth_ref)
+        def timed_get_auth_ref(*args, **kwargs):
+            with metrics.IRONIC_TOKEN_FETCH_LATENCY.time():
+                return get_auth_ref(*args, **kwargs)
+        auth_plugin.get_auth_ref = timed_get_auth_ref
+
+    get_headers = auth_plugin.get_headers
+
+    @functools.wraps(get_headers)
+    def counted_get_headers(*args, **kwargs):
+        metrics.IRONIC_AUTHENTICATED_REQUESTS.inc()
+        return get_headers(*args, **kwargs)
+    auth_plugin.get_headers = counted_get_headers
+
+
+def _http_session():
+    http = requests.Session()
+    if CONF.ironic.tcp_keepalive:
+        adapter_class = ks_session.TCPKeepAliveAdapter
+    else:
+        adapter_class = requests.adapters.HTTPAdapter
+    for scheme in ('https://', 'http://'):
+        # one pool per host; keystone and ironic each keep theirs
+        http.mount(scheme, adapter_class(
+            pool_maxsize=CONF.ironic.connection_pool_size))
+    return http
+
+
+def _build_ironic_client():
+    auth_plugin = ks_loading.load_auth_from_conf_options(CONF, 'ironic')
+    _instrument_auth(auth_plugin)
+    sess = ks_loading.load_session_from_conf_options(CONF, 'ironic',
+                                                     auth=auth_plugin,
+                                                     session=_http_session())
+
+    kwargs = {}
+    if CONF.ironic.endpoint_override:
+        kwargs['endpoint'] = CONF.ironic.endpoint_override
+    return ironic_client.get_client(1,
+                                    session=sess, **kwargs)
 
 
 def get_ironic_client():
+    """Return the process-wide Ironic client, building it on first use.
+
+    The client and its session are shared by every thread, so their
+    token and connection pool are too.
+    """
     global _cached_ironic_client
-    if _cached_ironic_client is not None:
+    cli = _cached_ironic_client
+    if cli is not None:
+        return cli
+
+    with _client_lock:
+        if _cached_ironic_client is None:
+            _cached_ironic_client = _build_ironic_client()
         return _cached_ironic_client
 
-    auth_plugin = ks_loading.load_auth_from_conf_options(CONF, 'ironic')
-    sess = ks_loading.load_session_from_conf_options(CONF, 'ironic',
-                                                     auth=auth_plugin)
 
-    kwargs = {}
-    cli = ironic_client.get_client(1,
-                                   session=sess, **kwargs)
-    _cached_ironic_client = cli
+@metrics.timed(metrics.IRONIC_CALL_LATENCY, operation='node_get')
+def _node_get(uuid):
+    return get_ironic_client().node.get(uuid)
 
-    return cli
 
+@metrics.timed(metrics.IRONIC_CALL_LATENCY, operation='node_list')
+def _node_list():
+    return get_ironic_client().node.list(detail=True, limit=0)
 
-class IronicNode(object):
 
-    def __init__(self, uuid):
-        self._uuid = uuid
+@metrics.timed(metrics.IRONIC_CALL_LATENCY, operation='node_update')
+def _node_update(uuid, patches):
+    return get_ironic_client().node.update(uuid, patches)
 
-    def get_contract_uuid(self):
-        node = get_ironic_client().node.get(self._uuid)
-        return node.properties.get('contract_uuid', None)
 
-    def get_project_id(self):
-        node = get_ironic_client().node.get(self._uuid)
-        return node.properties.get('project_id', None)
+def _snapshot(uuid, node):
+    properties = dict(node.properties)
+    return snapshot.ResourceSnapshot(
+        uuid,
+        properties,
+        project_owner_id=properties.pop('project_owner_id', None),
+        project_id=properties.pop('project_id', None),
+        contract_uuid=properties.pop('contract_uuid', None))
 
-    def get_node_config(self):
-        node = get_ironic_client().node.get(self._uuid)
-        config = node.properties
-        config.pop('contract_uuid', None)
-        config.pop('project_id', None)
-        config.pop('project_owner_id', None)
-        return config
-
-    def set_contract(self, contract):
-        patches = []
-        if contract is None:
-            if self.get_contract_uuid():
-                patches.append({
-                    "op": "remove",
-                    "path": "/properties/contract_uuid",
-                })
-            if self.get_project_id():
-                patches.append({
-                    "op": "remove",
-                    "path": "/properties/project_id",
-                })
-        else:
+
+def _contract_patches(current, contract):
+    """The patch pointing a node whose snapshot is current at contract,
+    or clearing its contract for None."""
+    patches = []
+    if contract is None:
+        if current.get_contract_uuid():
             patches.append({
-                "op": "add",
+                "op": "remove",
                 "path": "/properties/contract_uuid",
-                "value": contract.contract_id,
             })
+        if current.get_project_id():
             patches.append({
-                "op": "add",
+                "op": "remove",
                 "path": "/properties/project_id",
-                "value": contract.project_id,
             })
-        if len(patches) > 0:
-            get_ironic_client().node.update(self._uuid, patches)
+    else:
+        patches.append({
+            "op": "add",
+            "path": "/properties/contract_uuid",
+            "value": contract.contract_id,
+        })
+        patches.append({
+            "op": "add",
+            "path": "/properties/project_id",
+            "value": contract.project_id,
+        })
+    return patches
+
+
+def _apply_patches(uuid, patches):
+    if len(patches) > 0:
+        _node_update(uuid, patches)
+        snapshot.CACHE.invalidate(resource_types.IRONIC_NODE, uuid)
+
+
+class IronicNode(object):
+
+    def __init__(self, uuid):
+        self._uuid = uuid
+
+    def snapshot(self):
+        return _snapshot(self._uuid, _node_get(self._uuid))
+
+    def get_contract_uuid(self):
+        return self.snapshot().get_contract_uuid()
+
+    def get_project_id(self):
+        return self.snapshot().get_project_id()
+
+    def get_node_config(self):
+        return self.snapshot().get_node_config()
+
+    def set_contract(self, contract, current=None):
+        """Point the node at contract, or clear it for None.
+
+        Clearing needs the node's current state; pass its snapshot as
+        current when the caller already has one.
+        """
+        if contract is None and current is None:
+            current = self.snapshot()
+        _apply_patches(self._uuid, _contract_patches(current, contract))
 
     def is_resource_admin(self, project_id):
-        node = get_ironic_client().node.get(self._uuid)
-        project_owner_id = node.properties.get('project_owner_id', None)
-        return (project_owner_id == project_id)
+        return self.snapshot().is_resource_admin(project_id)
+
+
+class IronicNodeDriver(driver.ResourceDriver):
+
+    resource_type = resource_types.IRONIC_NODE
+
+    def get(self, resource_id):
+        return IronicNode(resource_id)
+
+    def get_many(self, resource_ids):
+        wanted = set(resource_ids)
+        if len(wanted) >= CONF.ironic.list_threshold:
+            # one listing of the fleet instead of a GET per node
+            return {node.uuid: _snapshot(node.uuid, node)
+                    for node in _node_list() if node.uuid in wanted}
+        snapshots = {}
+        for uuid in wanted:
+            try:
+                snapshots[uuid] = _snapshot(uuid, _node_get(uuid))
+            except ironic_exc.NotFound:
+                pass
+        return snapshots
+
+    def set_contract_many(self, assignments):
+        current = {}
+        if any(contract is None for _, contract in assignments):
+            current = self.get_many(
+                [uuid for uuid, contract in assignments if contract is None])
+        for uuid, contract in assignments:
+            if contract is None and uuid not in current:
+                LOG.warning("Not clearing the contract of Ironic node %s, "
+                            "it is not in the node list", uuid)
+                continue
+            _apply_patches(uuid,
+                           _contract_patches(current.get(uuid), contract))
+
+    def release_contract_many(self, assignments):
+        current = self.get_many([uuid for uuid, _ in assignments])
+        for uuid, contract in assignments:
+            node = current.get(uuid)
+            if node is None:
+                LOG.warning("Not releasing Ironic node %s from contract "
+                            "%s, it is not in the node list",
+                            uuid, contract.contract_id)
+            elif node.get_contract_uuid() == contract.contract_id:
+                _apply_patches(uuid, _contract_patches(node, None))
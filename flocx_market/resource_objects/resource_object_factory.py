@@ -10,18 +10,111 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from oslo_log import log
+from stevedore import extension
+
 from flocx_market.common import exception
+import flocx_market.conf
 from flocx_market.resource_objects import dummy_node
 from flocx_market.resource_objects import ironic_node
-from flocx_market.resource_objects import resource_types
+from flocx_market.resource_objects import simulated_node
+from flocx_market.resource_objects import snapshot
+
+CONF = flocx_market.conf.CONF
+LOG = log.getLogger(__name__)
+
+# out of tree resource types register a driver class under this
+# entry point namespace, named after the resource type
+DRIVER_NAMESPACE = 'flocx_market.resource_drivers'
+
+_BUILTIN_DRIVERS = [
+    ironic_node.IronicNodeDriver,
+    dummy_node.DummyNodeDriver,
+    simulated_node.SimulatedNodeDriver,
+]
+
+_drivers = None
+
+
+def _on_load_failure(manager, entrypoint, exc):
+    LOG.error("Could not load resource driver %s: %s", entrypoint, exc)
+
+
+def load_drivers():
+    """Instantiate the built-in and plugin drivers, once per process.
+
+    The services call this on startup, so that a broken plugin shows in
+    their logs right away rather than on the first request for its type.
+    """
+    global _drivers
+    if _drivers is not None:
+        return _drivers
+
+    drivers = {}
+    for driver_class in _BUILTIN_DRIVERS:
+        drivers[driver_class.resource_type] = driver_class()
+    plugins = extension.ExtensionManager(
+        DRIVER_NAMESPACE,
+        invoke_on_load=True,
+        on_load_failure_callback=_on_load_failure)
+    for ext in plugins:
+        if ext.name in drivers:
+            LOG.error("Ignoring resource driver %s from %s, a driver for "
+                      "that resource type is already loaded",
+                      ext.name, ext.entry_point)
+            continue
+        drivers[ext.name] = ext.obj
+    LOG.info("Loaded resource drivers: %s", ', '.join(sorted(drivers)))
+    _drivers = drivers
+    return _drivers
+
+
+def get_driver(resource_type):
+    driver = load_drivers().get(resource_type)
+    if driver is None:
+        raise exception.ResourceTypeUnknown(resource_type=resource_type)
+    return driver
 
 
 class ResourceObjectFactory(object):
 
     @staticmethod
     def get_resource_object(resource_type, resource_id):
-        if resource_type == resource_types.IRONIC_NODE:
-            return ironic_node.IronicNode(resource_id)
-        elif resource_type == resource_types.DUMMY_NODE:
-            return dummy_node.DummyNode(resource_id)
-        raise exception.ResourceTypeUnknown(resource_type=resource_type)
+        return get_driver(resource_type).get(resource_id)
+
+    @staticmethod
+    def get_resource_snapshot(resource_type, resource_id):
+        """Return a snapshot of the resource, from the process-wide cache
+        when a recent enough one is there."""
+        ttl = CONF.resource.snapshot_cache_ttl
+        resource_snapshot = snapshot.CACHE.get(
+            resource_type, resource_id, ttl) if ttl else None
+        if resource_snapshot is None:
+            resource_snapshot = ResourceObjectFactory.get_resource_object(
+                resource_type, resource_id).snapshot()
+            if ttl:
+                snapshot.CACHE.put(resource_type, resource_snapshot)
+        return resource_snapshot
+
+    @staticmethod
+    def get_resource_snapshots(resource_type, resource_ids):
+        """Return a dict mapping resource ids to snapshots, fetched in a
+        single batch when the type supports it."""
+        return get_driver(resource_type).get_many(resource_ids)
+
+    @staticmethod
+    def set_contracts(resource_type, assignments):
+        """Point each resource at its contract.
+
+        assignments is a list of (resource_id, contract) pairs.
+        """
+        get_driver(resource_type).set_contract_many(assignments)
+
+    @staticmethod
+    def release_contracts(resource_type, assignments):
+        """Clear the contract of each resource that still points at the
+        given one.
+
+        assignments is a list of (resource_id, contract) pairs.
+        """
+        get_driver(resource_type).release_contract_many(assignments)
@@ -13,5 +13,6 @@
 
 IRONIC_NODE = 'ironic_node'
 DUMMY_NODE = 'dummy_node'
+SIMULATED_NODE = 'simulated_node'
 
-RESOURCE_TYPES = [IRONIC_NODE, DUMMY_NODE]
+RESOURCE_TYPES = [IRONIC_NODE, DUMMY_NODE, SIMULATED_NODE]
@@ -0,0 +1,236 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Simulated nodes kept in a single SQLite database.
+
+Meant for simulating fleets far larger than one file per node allows.
+Besides the per-node interface shared with the other resource objects,
+the module offers batch reads and writes that each cost one transaction.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+
+from flocx_market.common import exception
+import flocx_market.conf
+from flocx_market.resource_objects import driver
+from flocx_market.resource_objects import resource_types
+from flocx_market.resource_objects import snapshot
+
+
+CONF = flocx_market.conf.CONF
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    uuid TEXT PRIMARY KEY,
+    server_config TEXT,
+    project_owner_id TEXT,
+    project_id TEXT,
+    contract_uuid TEXT
+)
+"""
+
+_COLUMNS = 'uuid, server_config, project_owner_id, project_id, contract_uuid'
+
+# sqlite parameter limit on older builds
+_MAX_PARAMS = 999
+
+# one connection per process, used by one thread at a time: greenthreads
+# would each get their own from a threading.local, and open a connection
+# (and rerun the PRAGMAs and CREATE TABLE) per request
+_lock = threading.Lock()
+_conn = None
+_conn_key = None
+
+
+def _open(path):
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None,
+                           check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=%s' % (
+        'FULL' if CONF.simulated_node.synchronous else 'OFF'))
+    conn.execute(_SCHEMA)
+    return conn
+
+
+class _connection(object):
+    """Hold the process-wide connection, opening it on first use or
+    after the database path changed or the process forked."""
+
+    def __enter__(self):
+        global _conn, _conn_key
+        _lock.acquire()
+        try:
+            key = (CONF.simulated_node.db_path, os.getpid())
+            if _conn is None or _conn_key != key:
+                if _conn is not None and _conn_key[1] == key[1]:
+                    _conn.close()
+                _conn = _open(key[0])
+                _conn_key = key
+        except Exception:
+            _lock.release()
+            raise
+        return _conn
+
+    def __exit__(self, exc_type, exc_value, tb):
+        _lock.release()
+
+
+def close():
+    """Close the connection, e.g. before removing the database."""
+    global _conn, _conn_key
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+            _conn_key = None
+
+
+class _transaction(_connection):
+
+    def __enter__(self):
+        self.conn = super(_transaction, self).__enter__()
+        try:
+            self.conn.execute('BEGIN IMMEDIATE')
+        except Exception:
+            _lock.release()
+            raise
+        return self.conn
+
+    def __exit__(self, exc_type, exc_value, tb):
+        try:
+            self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        finally:
+            super(_transaction, self).__exit__(exc_type, exc_value, tb)
+
+
+def _chunks(items, size=_MAX_PARAMS):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _snapshot(row):
+    uuid, server_config, project_owner_id, project_id, contract_uuid = row
+    return snapshot.ResourceSnapshot(
+        uuid,
+        json.loads(server_config) if server_config is not None else None,
+        project_owner_id=project_owner_id,
+        project_id=project_id,
+        contract_uuid=contract_uuid)
+
+
+def create_nodes(nodes):
+    """Insert or replace nodes given as dicts in the dummy node format,
+    with an additional 'uuid' key."""
+    rows = [(n['uuid'],
+             json.dumps(n.get('server_config')),
+             n.get('project_owner_id'),
+             n.get('project_id'),
+             n.get('contract_uuid')) for n in nodes]
+    with _transaction() as conn:
+        conn.executemany(
+            'INSERT OR REPLACE INTO nodes (%s) VALUES (?, ?, ?, ?, ?)'
+            % _COLUMNS, rows)
+
+
+def get_snapshots(uuids):
+    """Return a dict mapping each existing uuid to its snapshot."""
+    uuids = list(uuids)
+    snapshots = {}
+    with _connection() as conn:
+        for chunk in _chunks(uuids):
+            rows = conn.execute(
+                'SELECT %s FROM nodes WHERE uuid IN (%s)'
+                % (_COLUMNS, ', '.join('?' * len(chunk))), chunk).fetchall()
+            for row in rows:
+                snapshots[row[0]] = _snapshot(row)
+    return snapshots
+
+
+def set_contracts(assignments):
+    """Point each node at its contract, or clear it for None.
+
+    assignments is a list of (uuid, contract) pairs.
+    """
+    rows = [(c.contract_id, c.project_id, uuid) if c is not None
+            else (None, None, uuid) for uuid, c in assignments]
+    with _transaction() as conn:
+        conn.executemany(
+            'UPDATE nodes SET contract_uuid = ?, project_id = ? '
+            'WHERE uuid = ?', rows)
+    for uuid, _ in assignments:
+        snapshot.CACHE.invalidate(resource_types.SIMULATED_NODE, uuid)
+
+
+def release_contracts(assignments):
+    """Clear the contract of each node still pointing at the given one.
+
+    assignments is a list of (uuid, contract) pairs.
+    """
+    rows = [(uuid, c.contract_id) for uuid, c in assignments]
+    with _transaction() as conn:
+        conn.executemany(
+            'UPDATE nodes SET contract_uuid = NULL, project_id = NULL '
+            'WHERE uuid = ? AND contract_uuid = ?', rows)
+    for uuid, _ in assignments:
+        snapshot.CACHE.invalidate(resource_types.SIMULATED_NODE, uuid)
+
+
+class SimulatedNode(object):
+
+    def __init__(self, uuid):
+        self._uuid = uuid
+
+    def snapshot(self):
+        with _connection() as conn:
+            row = conn.execute(
+                'SELECT %s FROM nodes WHERE uuid = ?' % _COLUMNS,
+                (self._uuid,)).fetchone()
+        if row is None:
+            raise exception.ResourceNotFound(
+                resource_type=resource_types.SIMULATED_NODE,
+                resource_uuid=self._uuid)
+        return _snapshot(row)
+
+    def get_contract_uuid(self):
+        return self.snapshot().get_contract_uuid()
+
+    def get_project_id(self):
+        return self.snapshot().get_project_id()
+
+    def get_node_config(self):
+        return self.snapshot().get_node_config()
+
+    def set_contract(self, contract):
+        set_contracts([(self._uuid, contract)])
+
+    def is_resource_admin(self, project_id):
+        return self.snapshot().is_resource_admin(project_id)
+
+
+class SimulatedNodeDriver(driver.ResourceDriver):
+
+    resource_type = resource_types.SIMULATED_NODE
+
+    def get(self, resource_id):
+        return SimulatedNode(resource_id)
+
+    def get_many(self, resource_ids):
+        return get_snapshots(resource_ids)
+
+    def set_contract_many(self, assignments):
+        set_contracts(assignments)
+
+    def release_contract_many(self, assignments):
+        release_contracts(assignments)
@@ -0,0 +1,72 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import time
+
+
+class ResourceSnapshot(object):
+    """The state of a resource, fetched once.
+
+    Answers the same read-only questions as the resource objects without
+    going back to Ironic or the node file for each of them.
+    """
+
+    def __init__(self, resource_id, config, project_owner_id=None,
+                 project_id=None, contract_uuid=None):
+        self.resource_id = resource_id
+        self.config = config
+        self.project_owner_id = project_owner_id
+        self.project_id = project_id
+        self.contract_uuid = contract_uuid
+
+    def get_node_config(self):
+        return self.config
+
+    def get_project_id(self):
+        return self.project_id
+
+    def get_contract_uuid(self):
+        return self.contract_uuid
+
+    def is_resource_admin(self, project_id):
+        return self.project_owner_id == project_id
+
+
+class SnapshotCache(object):
+    """Process-wide snapshots keyed by resource type and id."""
+
+    def __init__(self):
+        self._snapshots = {}
+
+    def get(self, resource_type, resource_id, ttl):
+        key = (resource_type, resource_id)
+        entry = self._snapshots.get(key)
+        if entry is None:
+            return None
+        snapshot, fetched_at = entry
+        if time.monotonic() - fetched_at > ttl:
+            self._snapshots.pop(key, None)
+            return None
+        return snapshot
+
+    def put(self, resource_type, snapshot):
+        self._snapshots[(resource_type, snapshot.resource_id)] = (
+            snapshot, time.monotonic())
+
+    def invalidate(self, resource_type, resource_id):
+        self._snapshots.pop((resource_type, resource_id), None)
+
+    def clear(self):
+        self._snapshots.clear()
+
+
+CACHE = SnapshotCache()
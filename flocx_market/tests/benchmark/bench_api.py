@@ -0,0 +1,410 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Load test the API service with a mixed workload.
+
+Each run seeds a database, starts flocx-market-api with authentication
+disabled, the requested server mode and number of API workers, and
+drives it with concurrent clients. Latency percentiles and throughput
+are reported per route. The run fails if every write request errors,
+since the numbers would then describe a read-only workload.
+
+--workload read drives only the list and get routes, to compare the
+server modes where they differ most: on requests that spend their time
+waiting on the database.
+
+Example:
+
+    python -m flocx_market.tests.benchmark.bench_api \\
+        --workers 1 --workers 4 --concurrency 16 --duration 30 \\
+        --output after.json --compare before.json
+
+    python -m flocx_market.tests.benchmark.bench_api --workload read \\
+        --server-mode eventlet --server-mode threaded \\
+        --workers 2 --concurrency 32
+"""
+
+import argparse
+import collections
+import datetime
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from oslo_utils import uuidutils
+
+from flocx_market.common import statuses
+from flocx_market.db.sqlalchemy import api as db_api
+from flocx_market.db.sqlalchemy import models
+from flocx_market.resource_objects import resource_types
+from flocx_market.tests.benchmark import market
+from flocx_market.tests.benchmark import utils
+
+HEADERS = {
+    'Content-Type': 'application/json',
+    'X-Project-Id': market.PROJECT_ID,
+    'X-Roles': 'admin',
+}
+
+# (weight, method, route); routes are reported with the id placeholder
+WORKLOAD = [
+    (10, 'GET', '/offer'),
+    (20, 'GET', '/offer/<id>'),
+    (5, 'POST', '/offer'),
+    (3, 'PUT', '/offer/<id>'),
+    (2, 'DELETE', '/offer/<id>'),
+    (10, 'GET', '/bid'),
+    (15, 'GET', '/bid/<id>'),
+    (5, 'POST', '/bid'),
+    (3, 'PUT', '/bid/<id>'),
+    (2, 'DELETE', '/bid/<id>'),
+    (5, 'GET', '/contract'),
+    (10, 'GET', '/contract/<id>'),
+    (5, 'GET', '/offer_contract_relationship'),
+    (5, 'GET', '/offer_contract_relationship/<id>'),
+]
+
+WORKLOADS = {
+    'mixed': WORKLOAD,
+    'read': [w for w in WORKLOAD if w[1] == 'GET'],
+}
+
+
+def free_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def write_dummy_node(node_dir, resource_id):
+    with open(os.path.join(node_dir, resource_id), 'w') as fd:
+        json.dump({'project_owner_id': market.PROJECT_ID,
+                   'server_config': {'cpus': 16}}, fd)
+
+
+class Pool(object):
+    """Ids the clients may read, and ids they created and may modify."""
+
+    def __init__(self, ids):
+        self.lock = threading.Lock()
+        self.ids = list(ids)
+        self.owned = []
+
+    def any(self, rng):
+        with self.lock:
+            return rng.choice(self.ids) if self.ids else 'missing'
+
+    def add(self, item_id):
+        with self.lock:
+            self.ids.append(item_id)
+            self.owned.append(item_id)
+
+    def take_owned(self, rng):
+        with self.lock:
+            if not self.owned:
+                return None
+            item_id = self.owned.pop(rng.randrange(len(self.owned)))
+            self.ids.remove(item_id)
+            return item_id
+
+    def peek_owned(self, rng):
+        with self.lock:
+            return rng.choice(self.owned) if self.owned else None
+
+
+class Client(threading.Thread):
+
+    def __init__(self, port, pools, node_dir, deadline, seed, samples,
+                 workload=WORKLOAD):
+        super(Client, self).__init__(daemon=True)
+        self.port = port
+        self.workload = workload
+        self.pools = pools
+        self.node_dir = node_dir
+        self.deadline = deadline
+        self.rng = random.Random(seed)
+        self.samples = samples
+        self.conn = None
+
+    def _request(self, method, path, body=None):
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection('127.0.0.1', self.port,
+                                                   timeout=60)
+        payload = json.dumps(body) if body is not None else None
+        try:
+            self.conn.request(method, path, body=payload, headers=HEADERS)
+            resp = self.conn.getresponse()
+            data = resp.read()
+        except (http.client.HTTPException, OSError):
+            self.conn.close()
+            self.conn = None
+            raise
+        return resp.status, data
+
+    def _new_offer(self):
+        resource_id = uuidutils.generate_uuid()
+        write_dummy_node(self.node_dir, resource_id)
+        now = datetime.datetime.utcnow()
+        return {'resource_id': resource_id,
+                'resource_type': resource_types.DUMMY_NODE,
+                'start_time': now.isoformat(),
+                'end_time': (now + datetime.timedelta(days=7)).isoformat(),
+                'status': statuses.AVAILABLE,
+                'config': market.node_config(self.rng),
+                'cost': 1.0}
+
+    def _new_bid(self):
+        now = datetime.datetime.utcnow()
+        return {'quantity': 1,
+                'start_time': now.isoformat(),
+                'end_time': (now + datetime.timedelta(days=1)).isoformat(),
+                'duration': 86400,
+                'status': statuses.AVAILABLE,
+                'config_query': {'specs': market.bid_specs(self.rng)},
+                'cost': 1.0}
+
+    def _operation(self, method, route):
+        resource = route.split('/')[1]
+        pool = self.pools[resource]
+        id_field = resource + '_id'
+
+        if method == 'POST':
+            body = self._new_offer() if resource == 'offer' \
+                else self._new_bid()
+            status, data = self._request(method, route, body)
+            if status == 201:
+                pool.add(json.loads(data)[id_field])
+            return status
+        if method == 'DELETE':
+            item_id = pool.take_owned(self.rng)
+        elif method == 'PUT':
+            item_id = pool.peek_owned(self.rng)
+        else:
+            item_id = pool.any(self.rng)
+        if item_id is None:
+            return None
+
+        path = route.replace('<id>', item_id)
+        body = {'status': statuses.AVAILABLE} if method == 'PUT' else None
+        status, _ = self._request(method, path, body)
+        return status
+
+    def run(self):
+        weights = [w for w, _, _ in self.workload]
+        while time.monotonic() < self.deadline:
+            _, method, route = self.rng.choices(self.workload, weights)[0]
+            start = time.perf_counter()
+            try:
+                status = self._operation(method, route)
+            except (http.client.HTTPException, OSError):
+                status = 'error'
+            if status is None:
+                continue
+            self.samples.append((method + ' ' + route, status,
+                                 time.perf_counter() - start))
+
+
+def route_stats(samples, elapsed):
+    by_route = collections.defaultdict(list)
+    errors = collections.Counter()
+    for route, status, latency in samples:
+        by_route[route].append(latency)
+        if status == 'error' or status >= 500:
+            errors[route] += 1
+
+    timings = {}
+    for route, latencies in by_route.items():
+        timings[route] = {
+            'requests': len(latencies),
+            'errors': errors[route],
+            'rps': len(latencies) / elapsed,
+            'p50': utils.percentile(latencies, 50),
+            'p95': utils.percentile(latencies, 95),
+            'p99': utils.percentile(latencies, 99),
+        }
+    all_latencies = [s[2] for s in samples]
+    if all_latencies:
+        timings['ALL'] = {
+            'requests': len(all_latencies),
+            'errors': sum(errors.values()),
+            'rps': len(all_latencies) / elapsed,
+            'p50': utils.percentile(all_latencies, 50),
+            'p95': utils.percentile(all_latencies, 95),
+            'p99': utils.percentile(all_latencies, 99),
+        }
+    return timings
+
+
+def failed_writes(samples):
+    """Return the write routes none of whose requests succeeded."""
+    outcomes = collections.defaultdict(set)
+    for route, status, _ in samples:
+        if route.split()[0] in ('POST', 'PUT', 'DELETE'):
+            outcomes[route].add(status != 'error' and status < 400)
+    return sorted(route for route, ok in outcomes.items() if not any(ok))
+
+
+def start_server(tmpdir, connection, node_dir, workers, extra_conf,
+                 server_mode='eventlet'):
+    port = free_port()
+    conf_path = os.path.join(tmpdir, 'flocx-market-%d.conf' % workers)
+    with open(conf_path, 'w') as fd:
+        fd.write('[DEFAULT]\nlog_dir = %s\n' % tmpdir)
+        fd.write('[api]\nauth_enable = False\nhost_ip = 127.0.0.1\n'
+                 'port = %d\napi_workers = %d\nserver_mode = %s\n'
+                 % (port, workers, server_mode))
+        fd.write('[database]\nconnection = %s\n' % connection)
+        # measure the market rather than the disk
+        fd.write('[dummy_node]\ndummy_node_dir = %s\nfsync = False\n'
+                 'preload = True\n' % node_dir)
+        for line in extra_conf:
+            fd.write(line + '\n')
+
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'flocx_market.cmd.api',
+         '--config-file', conf_path],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError('flocx-market-api exited with code %s, see '
+                               'the log in %s' % (proc.returncode, tmpdir))
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/')
+            conn.getresponse().read()
+            conn.close()
+            return proc, port
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError('flocx-market-api did not start within 60s')
+
+
+def seed(connection, node_dir, offers, bids, contracts):
+    utils.reset_db(connection)
+    market.generate_market(offers, bids, contracts)
+    for resource_id in os.listdir(node_dir):
+        os.unlink(os.path.join(node_dir, resource_id))
+
+    session = db_api.get_session()
+    return {
+        'offer': [r[0] for r in session.query(models.Offer.offer_id)],
+        'bid': [r[0] for r in session.query(models.Bid.bid_id)],
+        'contract': [r[0] for r in session.query(
+            models.Contract.contract_id)],
+        'offer_contract_relationship': [r[0] for r in session.query(
+            models.OfferContractRelationship.offer_contract_relationship_id)],
+    }
+
+
+def run(args, server_mode, workers, tmpdir):
+    node_dir = os.path.join(tmpdir, 'nodes')
+    os.makedirs(node_dir, exist_ok=True)
+    connection = args.connection or 'sqlite:///' + os.path.join(
+        tmpdir, 'api.sqlite')
+    ids = seed(connection, node_dir, args.offers, args.bids, args.contracts)
+    pools = {resource: Pool(item_ids) for resource, item_ids in ids.items()}
+
+    proc, port = start_server(tmpdir, connection, node_dir, workers,
+                              args.conf or [], server_mode)
+    try:
+        samples = []
+        start = time.monotonic()
+        deadline = start + args.duration
+        clients = [Client(port, pools, node_dir, deadline, i, samples,
+                          WORKLOADS[args.workload])
+                   for i in range(args.concurrency)]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.monotonic() - start
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    failed = failed_writes(samples)
+    if failed:
+        raise RuntimeError('every request to %s failed'
+                           % ', '.join(failed))
+    return route_stats(samples, elapsed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', action='append', type=int,
+                        help='api_workers to run with, may be repeated '
+                             '(default: 1)')
+    parser.add_argument('--server-mode', action='append',
+                        choices=['eventlet', 'threaded'],
+                        help='[api]server_mode to run with, may be '
+                             'repeated (default: eventlet)')
+    parser.add_argument('--workload', choices=sorted(WORKLOADS),
+                        default='mixed',
+                        help='mixed reads and writes, or only reads')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='number of concurrent clients')
+    parser.add_argument('--duration', type=float, default=20,
+                        help='seconds to drive each server for')
+    parser.add_argument('--offers', type=int, default=1000)
+    parser.add_argument('--bids', type=int, default=200)
+    parser.add_argument('--contracts', type=int, default=100)
+    parser.add_argument('--connection',
+                        help='database URL to seed and serve from '
+                             '(default: a temporary SQLite file)')
+    parser.add_argument('--conf', action='append',
+                        help='extra line for the generated config file, '
+                             'e.g. "[database]" then "max_pool_size = 20"')
+    parser.add_argument('--output', default='bench_api.json',
+                        help='where to write the JSON results')
+    parser.add_argument('--compare',
+                        help='JSON results of an earlier run to compare '
+                             'the p95 latencies with')
+    args = parser.parse_args(argv)
+    utils.prepare()
+
+    results = []
+    for server_mode in args.server_mode or ['eventlet']:
+        for workers in args.workers or [1]:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                timings = run(args, server_mode, workers, tmpdir)
+            results.append(dict(server_mode=server_mode, workers=workers,
+                                timings=timings))
+            print('server_mode=%s api_workers=%d' % (server_mode, workers))
+            for route, stats in sorted(timings.items()):
+                print('  %-42s %7.1f rps  p50 %7.4fs  p95 %7.4fs'
+                      '  p99 %7.4fs  errors %d' % (
+                          route, stats['rps'], stats['p50'], stats['p95'],
+                          stats['p99'], stats['errors']))
+
+    doc = utils.write_results(
+        args.output, 'api', results, workload=args.workload,
+        concurrency=args.concurrency, duration=args.duration,
+        offers=args.offers, bids=args.bids, contracts=args.contracts)
+    if args.compare:
+        utils.compare(args.compare, doc, ['server_mode', 'workers'], 'p95')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,206 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Time offer creation, fulfillment and expiry against a fake Ironic.
+
+Every call goes through the real ironicclient to a local stand-in for
+the Ironic API (see fake_ironic), so the cost of talking to Ironic can
+be measured without one. Timings are per operation, and the number of
+Ironic requests each phase made is recorded alongside them.
+
+Example:
+
+    python -m flocx_market.tests.benchmark.bench_ironic \\
+        --nodes 200 --latency 5 --output before.json
+    python -m flocx_market.tests.benchmark.bench_ironic \\
+        --nodes 200 --latency 5 --output after.json --compare before.json
+"""
+
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+from oslo_context import context as ctx
+from oslo_utils import uuidutils
+
+from flocx_market.common import statuses
+from flocx_market.conf import CONF
+from flocx_market.db.sqlalchemy import api as db_api
+from flocx_market.db.sqlalchemy import models
+from flocx_market.objects import contract
+from flocx_market.objects import offer
+from flocx_market.resource_objects import ironic_node
+from flocx_market.resource_objects import resource_types
+from flocx_market.resource_objects import snapshot
+from flocx_market.tests.benchmark import fake_ironic
+from flocx_market.tests.benchmark import market
+from flocx_market.tests.benchmark import utils
+
+
+def use_fake_ironic(endpoint):
+    CONF.set_override('auth_type', 'none', group='ironic')
+    CONF.set_override('endpoint_override', endpoint, group='ironic')
+    ironic_node._cached_ironic_client = None
+    snapshot.CACHE.clear()
+
+
+def timed_each(items, func):
+    """Call func on every item, returning timing stats and the number of
+    calls that raised."""
+    samples = []
+    errors = 0
+    for item in items:
+        start = time.perf_counter()
+        try:
+            func(item)
+        except Exception:
+            errors += 1
+        samples.append(time.perf_counter() - start)
+    return utils.summarize(samples), errors
+
+
+def create_contracts(context, offer_ids, offers_per_contract, now):
+    contracts = []
+    session = db_api.get_session()
+    for i in range(0, len(offer_ids), offers_per_contract):
+        bid_ref = models.Bid()
+        bid_ref.update(dict(
+            bid_id=uuidutils.generate_uuid(),
+            project_id=market.PROJECT_ID,
+            quantity=offers_per_contract,
+            start_time=now,
+            end_time=now + datetime.timedelta(days=1),
+            duration=24 * 3600,
+            status=statuses.CLAIMED,
+            config_query={'specs': []},
+            cost=1.0,
+        ))
+        bid_ref.save(session)
+        contracts.append(contract.Contract.create(dict(
+            status=statuses.AVAILABLE,
+            start_time=now,
+            end_time=now + datetime.timedelta(days=1),
+            cost=1.0,
+            bid_id=bid_ref.bid_id,
+            project_id=market.PROJECT_ID,
+            offers=offer_ids[i:i + offers_per_contract],
+        ), context))
+    return contracts
+
+
+def run(connection, nodes, offers_per_contract, latency, error_rate, seed):
+    context = ctx.RequestContext(is_admin=True,
+                                 project_id=market.PROJECT_ID)
+    rng = random.Random(seed)
+    now = datetime.datetime.utcnow()
+    utils.reset_db(connection)
+
+    fake = fake_ironic.FakeIronic(latency=latency, error_rate=error_rate,
+                                  seed=seed)
+    node_ids = [uuidutils.generate_uuid() for _ in range(nodes)]
+    for node_id in node_ids:
+        fake.add_node(node_id, dict(market.node_config(rng),
+                                    project_owner_id=market.PROJECT_ID))
+    use_fake_ironic(fake.start())
+
+    timings = {}
+    requests = {}
+    errors = {}
+
+    def phase(name, items, func):
+        before = fake.requests.copy()
+        timings[name], errors[name] = timed_each(items, func)
+        requests[name] = {'%s %s' % key: count for key, count
+                          in (fake.requests - before).items()}
+
+    try:
+        offer_ids = []
+
+        def create_offer(node_id):
+            offer_ids.append(offer.Offer.create(dict(
+                resource_id=node_id,
+                resource_type=resource_types.IRONIC_NODE,
+                status=statuses.AVAILABLE,
+                start_time=now - datetime.timedelta(days=1),
+                end_time=now + datetime.timedelta(days=30),
+                cost=1.0,
+            ), context).offer_id)
+
+        phase('offer_create', node_ids, create_offer)
+        contracts = create_contracts(context, offer_ids,
+                                     offers_per_contract, now)
+        phase('contract_fulfill', contracts,
+              lambda c: c.fulfill(context))
+        phase('contract_expire', contracts,
+              lambda c: c.expire(context))
+    finally:
+        fake.stop()
+
+    return timings, requests, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--nodes', type=int, action='append',
+                        help='nodes in the fake Ironic, may be repeated '
+                             '(default: 100)')
+    parser.add_argument('--offers-per-contract', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='milliseconds the fake Ironic waits before '
+                             'answering each request')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='fraction of node requests that fail')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_ironic.json',
+                        help='where to write the JSON results')
+    parser.add_argument('--compare',
+                        help='JSON results of an earlier run to compare '
+                             'the median timings with')
+    args = parser.parse_args(argv)
+
+    utils.prepare()
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        connection = 'sqlite:///' + os.path.join(tmpdir, 'market.sqlite')
+        for nodes in args.nodes or [100]:
+            timings, requests, errors = run(
+                connection, nodes, args.offers_per_contract,
+                args.latency / 1000.0, args.error_rate, args.seed)
+            results.append(dict(nodes=nodes,
+                                offers_per_contract=args.offers_per_contract,
+                                latency_ms=args.latency,
+                                error_rate=args.error_rate,
+                                timings=timings,
+                                ironic_requests=requests,
+                                errors=errors))
+            for name in sorted(timings):
+                print('%6d nodes %-16s median %.4fs total %.4fs '
+                      '%5d ironic requests %4d errors' % (
+                          nodes, name, timings[name]['median'],
+                          timings[name]['total'],
+                          sum(requests[name].values()), errors[name]))
+
+    doc = utils.write_results(args.output, 'ironic', results,
+                              seed=args.seed)
+    if args.compare:
+        utils.compare(args.compare, doc,
+                      ['nodes', 'offers_per_contract', 'latency_ms',
+                       'error_rate'], 'median')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
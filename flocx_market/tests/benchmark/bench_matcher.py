@@ -0,0 +1,143 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Time the matcher against synthetic markets.
+
+Example:
+
+    python -m flocx_market.tests.benchmark.bench_matcher \\
+        --scale 1000:100:200 --output before.json
+    python -m flocx_market.tests.benchmark.bench_matcher \\
+        --scale 1000:100:200 --output after.json --compare before.json
+"""
+
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+
+from oslo_context import context as ctx
+
+from flocx_market.common import statuses
+from flocx_market.matcher import match_engine
+from flocx_market.matcher import matcher
+from flocx_market.objects import contract
+from flocx_market.objects import offer
+from flocx_market.resource_objects import resource_types
+from flocx_market.tests.benchmark import market
+from flocx_market.tests.benchmark import utils
+
+DEFAULT_SCALES = ['100:10:10', '1000:100:100', '5000:500:500']
+
+
+def parse_scale(value):
+    try:
+        offers, bids, contracts = (int(v) for v in value.split(':'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "scale must be OFFERS:BIDS:CONTRACTS, got %r" % value)
+    return offers, bids, contracts
+
+
+def fulfill_all(context):
+    for c in contract.Contract.get_all_by_status(context,
+                                                 statuses.AVAILABLE):
+        c.fulfill(context)
+
+
+def run_scale(connection, fleet, offers, bids, contracts, repeat, seed):
+    context = ctx.RequestContext(is_admin=True,
+                                 project_id=market.PROJECT_ID)
+    utils.reset_db(connection)
+    utils.reset_fleet(fleet)
+    now = datetime.datetime.utcnow()
+    rng = market.generate_market(
+        offers, bids, contracts, seed=seed, now=now,
+        resource_type=resource_types.SIMULATED_NODE)
+
+    start_time = now + datetime.timedelta(days=1)
+    end_time = now + datetime.timedelta(days=2)
+    sample_specs = [market.bid_specs(rng) for _ in range(repeat)]
+    specs_iter = iter(sample_specs * 2)
+
+    timings = {}
+    timings['get_available_status_contract'] = utils.time_call(
+        lambda: offer.Offer.get_available_status_contract(
+            context, start_time, end_time),
+        repeat=repeat)
+    timings['get_all_matching_offers'] = utils.time_call(
+        lambda: matcher.get_all_matching_offers(
+            context, next(specs_iter),
+            start_time=start_time, end_time=end_time),
+        repeat=repeat)
+    # matching creates contracts, so it is timed once and last
+    timings['match'] = utils.time_call(
+        lambda: match_engine.match(context))
+    # claims the simulated node behind every offer of every contract
+    timings['fulfill'] = utils.time_call(lambda: fulfill_all(context))
+
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', action='append', type=parse_scale,
+                        help='OFFERS:BIDS:CONTRACTS, may be repeated '
+                             '(default: %s)' % ' '.join(DEFAULT_SCALES))
+    parser.add_argument('--db', action='append',
+                        choices=['memory', 'file'],
+                        help='database backends to run against, may be '
+                             'repeated (default: both)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='runs of each read-only benchmark')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_matcher.json',
+                        help='where to write the JSON results')
+    parser.add_argument('--compare',
+                        help='JSON results of an earlier run to compare '
+                             'the median timings with')
+    args = parser.parse_args(argv)
+
+    scales = args.scale or [parse_scale(s) for s in DEFAULT_SCALES]
+    backends = args.db or ['memory', 'file']
+    utils.prepare()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        connections = {
+            'memory': 'sqlite:///:memory:',
+            'file': 'sqlite:///' + os.path.join(tmpdir, 'market.sqlite'),
+        }
+        for backend in backends:
+            for offers, bids, contracts in scales:
+                timings = run_scale(connections[backend],
+                                    os.path.join(tmpdir, 'fleet.sqlite'),
+                                    offers, bids, contracts, args.repeat,
+                                    args.seed)
+                results.append(dict(db=backend, offers=offers, bids=bids,
+                                    contracts=contracts, timings=timings))
+                print('%-6s %6d offers %6d bids %6d contracts: %s' % (
+                    backend, offers, bids, contracts,
+                    ', '.join('%s %.4fs' % (name, t['median'])
+                              for name, t in sorted(timings.items()))))
+
+    doc = utils.write_results(args.output, 'matcher', results,
+                              seed=args.seed, repeat=args.repeat)
+    if args.compare:
+        utils.compare(args.compare, doc,
+                      ['db', 'offers', 'bids', 'contracts'], 'median')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
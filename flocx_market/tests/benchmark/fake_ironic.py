@@ -0,0 +1,187 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""A stand-in for the Ironic API, served on localhost.
+
+It implements just enough of the node API for the real ironicclient to
+get, list and patch nodes, with optional latency and error injection.
+
+    fake = fake_ironic.FakeIronic(latency=0.005, error_rate=0.01)
+    fake.add_node(uuid, {'cpus': 16, 'project_owner_id': project_id})
+    endpoint = fake.start()
+    ...
+    fake.stop()
+
+Point the market at it with auth_type = none and endpoint_override set
+to the returned endpoint in the [ironic] section.
+"""
+
+import collections
+from http import server
+import json
+import random
+import re
+import threading
+import time
+
+MIN_VERSION = '1.1'
+MAX_VERSION = '1.80'
+
+_NODE_PATH = re.compile(r'^/v1/nodes/(?!detail$)([^/]+)$')
+
+
+class FakeIronic(object):
+
+    def __init__(self, latency=0.0, error_rate=0.0, error_status=500,
+                 seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.nodes = {}
+        self.requests = collections.Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def add_node(self, uuid, properties=None):
+        self.nodes[uuid] = {
+            'uuid': uuid,
+            'name': None,
+            'provision_state': 'available',
+            'maintenance': False,
+            'properties': dict(properties or {}),
+        }
+
+    def start(self, host='127.0.0.1', port=0):
+        """Serve in a background thread and return the endpoint URL."""
+        handler = type('Handler', (_Handler,), {'fake': self})
+        self._server = server.ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return 'http://%s:%d' % self._server.server_address[:2]
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def _should_fail(self):
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+    def _patch(self, node, patches):
+        with self._lock:
+            for patch in patches:
+                parts = patch['path'].strip('/').split('/')
+                target = node
+                for part in parts[:-1]:
+                    target = target.setdefault(part, {})
+                if patch['op'] in ('add', 'replace'):
+                    target[parts[-1]] = patch['value']
+                elif patch['op'] == 'remove':
+                    if parts[-1] not in target:
+                        return False
+                    del target[parts[-1]]
+                else:
+                    return False
+        return True
+
+
+def _links(path):
+    return [{'href': path, 'rel': 'self'}]
+
+
+class _Handler(server.BaseHTTPRequestHandler):
+
+    fake = None
+    protocol_version = 'HTTP/1.1'
+    # send headers and body in one segment, otherwise delayed ACKs add
+    # tens of milliseconds to every keep-alive request
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=None):
+        data = json.dumps(body).encode('utf-8') if body is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('X-OpenStack-Ironic-API-Minimum-Version',
+                         MIN_VERSION)
+        self.send_header('X-OpenStack-Ironic-API-Maximum-Version',
+                         MAX_VERSION)
+        self.send_header('X-OpenStack-Ironic-API-Version',
+                         self.headers.get('X-OpenStack-Ironic-API-Version',
+                                          MIN_VERSION))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status, message):
+        # ironic wraps its error in a JSON string
+        self._send(status, {'error_message': json.dumps(
+            {'faultstring': message, 'faultcode': 'Client'})})
+
+    def _handle(self, method):
+        path = self.path.split('?', 1)[0].rstrip('/') or '/'
+        route = _NODE_PATH.sub('/v1/nodes/{uuid}', path)
+        self.fake.requests[(method, route)] += 1
+
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+
+        if self.fake.latency:
+            time.sleep(self.fake.latency)
+        if path.startswith('/v1/') and self.fake._should_fail():
+            return self._error(self.fake.error_status, 'Injected error')
+
+        if method == 'GET' and path == '/':
+            version = {'id': 'v1', 'status': 'CURRENT',
+                       'version': MAX_VERSION, 'min_version': MIN_VERSION,
+                       'links': _links('/v1')}
+            return self._send(200, {'versions': [version],
+                                    'default_version': version})
+        if method == 'GET' and path == '/v1':
+            return self._send(200, {'id': 'v1', 'links': _links('/v1')})
+        if method == 'GET' and path in ('/v1/nodes', '/v1/nodes/detail'):
+            nodes = list(self.fake.nodes.values())
+            if path == '/v1/nodes':
+                nodes = [{'uuid': n['uuid'], 'name': n['name']}
+                         for n in nodes]
+            return self._send(200, {'nodes': nodes})
+
+        match = _NODE_PATH.match(path)
+        if match is None:
+            return self._error(404, 'Not found: %s' % path)
+        node = self.fake.nodes.get(match.group(1))
+        if node is None:
+            return self._error(404, 'Node %s could not be found.'
+                               % match.group(1))
+        if method == 'GET':
+            return self._send(200, node)
+        if method == 'PATCH':
+            if not self.fake._patch(node, body or []):
+                return self._error(400, 'Invalid patch')
+            return self._send(200, node)
+        return self._error(405, 'Method not allowed')
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_PATCH(self):
+        self._handle('PATCH')
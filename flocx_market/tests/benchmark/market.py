@@ -0,0 +1,174 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Synthetic market generator used by the benchmarks.
+
+Rows are inserted straight through the models so that generating a large
+market does not go through the resource objects (and thus Ironic).
+"""
+
+import datetime
+import random
+
+from oslo_utils import uuidutils
+
+from flocx_market.common import statuses
+from flocx_market.db.sqlalchemy import api as db_api
+from flocx_market.db.sqlalchemy import models
+from flocx_market.resource_objects import resource_types
+from flocx_market.resource_objects import simulated_node
+
+PROJECT_ID = 'benchmark-project'
+
+CPU_ARCHES = ['x86_64', 'x86_64', 'x86_64', 'aarch64', 'ppc64le']
+PRODUCTS = ['PowerEdge R640', 'PowerEdge M620', 'ProLiant DL360',
+            'ThinkSystem SR650']
+BOOT_MODES = ['bios', 'uefi']
+
+
+def node_config(rng):
+    """Return a config shaped like the properties of an inspected Ironic
+    node."""
+    cpus = rng.choice([8, 16, 32, 48, 64])
+    memory_mb = rng.choice([32768, 65536, 131072, 262144])
+    boot_mode = rng.choice(BOOT_MODES)
+    return {
+        'cpus': cpus,
+        'memory_mb': memory_mb,
+        'local_gb': rng.choice([240, 480, 960, 1920]),
+        'cpu_arch': rng.choice(CPU_ARCHES),
+        'capabilities': 'boot_mode:%s,cpu_vt:true' % boot_mode,
+        'root_device': {'rotational': rng.random() < 0.3},
+        'inventory': {
+            'boot': {'current_boot_mode': boot_mode},
+            'system_vendor': {'product_name': rng.choice(PRODUCTS)},
+            'memory': {'physical_mb': memory_mb},
+            'interfaces': ['eth%d' % i for i in range(rng.randint(1, 4))],
+        },
+    }
+
+
+def bid_specs(rng):
+    """Return match specs mixing the operators bids use in practice."""
+    choices = [
+        [['memory_mb', '>=', rng.choice([32768, 65536, 131072])]],
+        [['cpu_arch', 'eq', 'x86_64'],
+         ['cpus', '>=', rng.choice([16, 32])]],
+        [['cpu_arch', 'in', ['x86_64', 'aarch64']],
+         ['local_gb', '>', 400]],
+        [['capabilities', 'matches', 'boot_mode:uefi']],
+        [['inventory.system_vendor.product_name', 'startswith',
+          'PowerEdge'],
+         ['inventory.memory.physical_mb', '>=', 65536]],
+        [['inventory.interfaces', 'contains', 'eth1'],
+         ['cpus', '!=', 8]],
+    ]
+    return rng.choice(choices)
+
+
+def generate_market(offers, bids, contracts, seed=0, now=None,
+                    resource_type=resource_types.DUMMY_NODE):
+    """Populate the database with a synthetic market.
+
+    Offers are available for the next 30 days. Bids ask for one to three
+    nodes for one to three days starting within the next week, so their
+    windows overlap each other and the existing contracts. Each of the
+    `contracts` existing contracts holds one offer and comes with the
+    claimed bid it was made for.
+
+    For simulated nodes, the node behind each offer is created as well so
+    that contracts can be fulfilled.
+    """
+    rng = random.Random(seed)
+    now = now or datetime.datetime.utcnow()
+    session = db_api.get_session()
+
+    offer_refs = []
+    with session.begin():
+        for _ in range(offers):
+            offer_ref = models.Offer()
+            offer_ref.update(dict(
+                offer_id=uuidutils.generate_uuid(),
+                project_id=PROJECT_ID,
+                status=statuses.AVAILABLE,
+                resource_id=uuidutils.generate_uuid(),
+                resource_type=resource_type,
+                start_time=now - datetime.timedelta(days=1),
+                end_time=now + datetime.timedelta(days=30),
+                config=node_config(rng),
+                cost=round(rng.uniform(0.5, 10.0), 2),
+            ))
+            session.add(offer_ref)
+            offer_refs.append(offer_ref)
+
+        for _ in range(bids):
+            start_time = now + datetime.timedelta(
+                hours=rng.randint(0, 7 * 24))
+            days = rng.randint(1, 3)
+            bid_ref = models.Bid()
+            bid_ref.update(dict(
+                bid_id=uuidutils.generate_uuid(),
+                project_id=PROJECT_ID,
+                quantity=rng.randint(1, 3),
+                start_time=start_time,
+                end_time=start_time + datetime.timedelta(days=days),
+                duration=days * 24 * 3600,
+                status=statuses.AVAILABLE,
+                config_query={'specs': bid_specs(rng)},
+                cost=round(rng.uniform(1.0, 30.0), 2),
+            ))
+            session.add(bid_ref)
+
+        for offer_ref in rng.sample(offer_refs, min(contracts, offers)):
+            start_time = now + datetime.timedelta(
+                hours=rng.randint(0, 7 * 24))
+            end_time = start_time + datetime.timedelta(days=2)
+            # the bid that was matched to create the contract
+            bid_ref = models.Bid()
+            bid_ref.update(dict(
+                bid_id=uuidutils.generate_uuid(),
+                project_id=PROJECT_ID,
+                quantity=1,
+                start_time=start_time,
+                end_time=end_time,
+                duration=2 * 24 * 3600,
+                status=statuses.CLAIMED,
+                config_query={'specs': []},
+                cost=offer_ref.cost,
+            ))
+            session.add(bid_ref)
+            contract_ref = models.Contract()
+            contract_ref.update(dict(
+                contract_id=uuidutils.generate_uuid(),
+                project_id=PROJECT_ID,
+                status=statuses.AVAILABLE,
+                start_time=start_time,
+                end_time=end_time,
+                cost=offer_ref.cost,
+                bid_id=bid_ref.bid_id,
+            ))
+            session.add(contract_ref)
+            ocr_ref = models.OfferContractRelationship()
+            ocr_ref.update(dict(
+                offer_contract_relationship_id=uuidutils.generate_uuid(),
+                offer_id=offer_ref.offer_id,
+                contract_id=contract_ref.contract_id,
+                status=statuses.AVAILABLE,
+            ))
+            session.add(ocr_ref)
+
+    if resource_type == resource_types.SIMULATED_NODE:
+        simulated_node.create_nodes(
+            dict(uuid=o.resource_id, server_config=o.config,
+                 project_owner_id=PROJECT_ID) for o in offer_refs)
+
+    return rng
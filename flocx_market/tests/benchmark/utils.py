@@ -0,0 +1,137 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import os
+import platform
+import subprocess
+import time
+
+from flocx_market.common import service as flocx_market_service
+from flocx_market.conf import CONF
+from flocx_market.db.sqlalchemy import api as db_api
+from flocx_market.db.sqlalchemy import models
+from flocx_market.resource_objects import simulated_node
+
+
+def prepare(argv0='flocx-market-benchmark'):
+    """Load the configuration without picking up any system config file."""
+    CONF.clear()
+    flocx_market_service.prepare_service([argv0], default_config_files=[])
+
+
+def reset_db(connection):
+    """Point the database API at a fresh, empty database."""
+    if connection.startswith('sqlite:///') and connection != \
+            'sqlite:///:memory:':
+        path = connection[len('sqlite:///'):]
+        if os.path.exists(path):
+            os.unlink(path)
+    CONF.set_override('connection', connection, group='database')
+    db_api.reset_facade()
+    if not connection.startswith('sqlite'):
+        models.Base.metadata.drop_all(db_api.get_facade().get_engine())
+    db_api.setup_db()
+
+
+def reset_fleet(path):
+    """Point the simulated nodes at a fresh, empty database."""
+    simulated_node.close()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.unlink(path + suffix)
+    CONF.set_override('db_path', path, group='simulated_node')
+    # measure the market rather than the disk
+    CONF.set_override('synchronous', False, group='simulated_node')
+
+
+def time_call(func, repeat=1):
+    """Call func `repeat` times and return timing stats in seconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1,
+                max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    return {
+        'runs': len(samples),
+        'min': min(samples),
+        'median': percentile(samples, 50),
+        'max': max(samples),
+        'total': sum(samples),
+    }
+
+
+def git_revision():
+    try:
+        out = subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                      stderr=subprocess.DEVNULL)
+        return out.decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path, benchmark, results, **extra):
+    doc = {
+        'benchmark': benchmark,
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'results': results,
+    }
+    doc.update(extra)
+    with open(path, 'w') as fd:
+        json.dump(doc, fd, indent=2, sort_keys=True)
+    return doc
+
+
+def compare(old_path, new_doc, key_fields, metric):
+    """Print how `metric` changed for every result found in both runs.
+
+    Results are paired up on the values of `key_fields`; every timing
+    dict in a result that has `metric` is compared.
+    """
+    with open(old_path) as fd:
+        old_doc = json.load(fd)
+
+    def index(doc):
+        # fields added to a benchmark after a run was recorded are None
+        return {tuple(r.get(k) for k in key_fields): r
+                for r in doc['results']}
+
+    old_results = index(old_doc)
+    print('%-50s %12s %12s %8s' % ('benchmark', 'old', 'new', 'ratio'))
+    for key, new in sorted(index(new_doc).items(), key=lambda i: str(i[0])):
+        old = old_results.get(key)
+        if old is None:
+            continue
+        for name, timing in sorted(new['timings'].items()):
+            old_timing = old['timings'].get(name)
+            if not old_timing or timing.get(metric) is None \
+                    or not old_timing.get(metric):
+                continue
+            label = '/'.join(str(k) for k in key) + ' ' + name
+            print('%-50s %12.6f %12.6f %8.2f' % (
+                label[:50], old_timing[metric], timing[metric],
+                timing[metric] / old_timing[metric]))
@@ -118,3 +118,33 @@ def test_update_bid_missing(mock_get, mock_save, client):
                      data=json.dumps(dict(status=statuses.EXPIRED)))
     assert res.status_code == 404
     assert mock_save.call_count == 0
+
+
+@mock.patch('flocx_market.objects.bid.Bid.get_all_archived')
+@mock.patch('flocx_market.objects.bid.Bid.get_all')
+def test_get_bids_history(mock_get_all, mock_get_all_archived, client):
+    mock_get_all.return_value = [test_bid_1]
+    mock_get_all_archived.return_value = [test_bid_2]
+
+    response = client.get("/bid", follow_redirects=True)
+    assert len(response.json) == 1
+    mock_get_all_archived.assert_not_called()
+
+    response = client.get("/bid?history=true", follow_redirects=True)
+    assert response.status_code == 200
+    assert [b['bid_id'] for b in response.json] == ['test_bid_1',
+                                                    'test_bid_2']
+
+
+@mock.patch('flocx_market.api.bid.watch.watch')
+def test_watch_bid(mock_watch, client):
+    mock_watch.return_value = test_bid_1
+    response = client.get('/bid/test_bid_1/watch')
+
+    assert response.status_code == 200
+    assert response.json['bid_id'] == 'test_bid_1'
+    assert mock_watch.call_args[0][:2] == (statuses.BID, 'test_bid_1')
+    assert client.get('/bid/test_bid_1/watch?timeout=x').status_code == 400
+
+    mock_watch.return_value = None
+    assert client.get('/bid/test_bid_1/watch').status_code == 204
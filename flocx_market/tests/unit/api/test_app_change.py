@@ -0,0 +1,41 @@
+import datetime
+from unittest import mock
+
+from flocx_market.objects import change
+
+now = datetime.datetime.utcnow()
+
+
+def _change(seq):
+    return change.Change(seq=seq, resource_type='bid',
+                         resource_id='bid-%d' % seq, action='create',
+                         status='available', project_id='5599',
+                         created_at=now, updated_at=None)
+
+
+@mock.patch('flocx_market.objects.change.Change.get_since')
+def test_get_changes(mock_get_since, client):
+    mock_get_since.return_value = [_change(4), _change(5)]
+    response = client.get('/changes?since=3&limit=2')
+
+    assert response.status_code == 200
+    assert [c['seq'] for c in response.json['changes']] == [4, 5]
+    assert response.json['changes'][0]['resource_id'] == 'bid-4'
+    assert response.json['next'] == 5
+    assert mock_get_since.call_args[0][1:] == (3, 2)
+
+
+@mock.patch('flocx_market.objects.change.Change.get_since')
+def test_get_changes_caught_up(mock_get_since, client):
+    mock_get_since.return_value = []
+    response = client.get('/changes?since=7')
+
+    assert response.status_code == 200
+    assert response.json == {'changes': [], 'next': 7}
+
+
+@mock.patch('flocx_market.objects.change.Change.get_since')
+def test_get_changes_invalid_since(mock_get_since, client):
+    assert client.get('/changes?since=abc').status_code == 400
+    assert client.get('/changes?since=-1').status_code == 400
+    mock_get_since.assert_not_called()
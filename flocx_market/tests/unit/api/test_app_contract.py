@@ -186,3 +186,34 @@ def test_update_contract_missing(mock_get, mock_save, client):
                      data=json.dumps(dict(status=statuses.FULFILLED)))
     assert res.status_code == 404
     assert mock_save.call_count == 0
+
+
+@mock.patch('flocx_market.api.contract.watch.watch')
+def test_watch_contract(mock_watch, client):
+    mock_watch.return_value = test_contract_1
+    response = client.get('/contract/test_contract_1/watch'
+                          '?status=available&timeout=5')
+
+    assert response.status_code == 200
+    assert response.json['contract_id'] == 'test_contract_1'
+    args, kwargs = mock_watch.call_args
+    assert args[:2] == (statuses.CONTRACT, 'test_contract_1')
+    assert kwargs == {'status': 'available', 'timeout': 5}
+
+
+@mock.patch('flocx_market.api.contract.watch.watch')
+def test_watch_contract_unchanged(mock_watch, client):
+    mock_watch.return_value = None
+    response = client.get('/contract/test_contract_1/watch')
+
+    assert response.status_code == 204
+    assert response.data == b''
+
+
+@mock.patch('flocx_market.api.contract.watch.watch')
+def test_watch_contract_missing(mock_watch, client):
+    mock_watch.side_effect = e.ResourceNotFound(resource_type='Contract',
+                                                resource_uuid='missing')
+    response = client.get('/contract/missing/watch')
+
+    assert response.status_code == 404
@@ -284,3 +284,12 @@ def test_update_offer_contract_relationship_missing(mock_get,
                      data=json.dumps(dict(status=statuses.FULFILLED)))
     assert res.status_code == 404
     assert mock_save.call_count == 0
+
+
+def test_get_offer_contract_relationships_unknown_status(client, db, session):
+    response = client.get('/offer_contract_relationship?status=busy')
+    assert response.status_code == 400
+
+    response = client.get('/offer_contract_relationship?status=busy'
+                          '&history=true')
+    assert response.status_code == 400
@@ -0,0 +1,131 @@
+import datetime
+import threading
+from unittest import mock
+
+from oslo_context import context as ctx
+import pytest
+
+from flocx_market.api import watch
+from flocx_market.common import exception
+from flocx_market.common import statuses
+import flocx_market.conf
+from flocx_market.db.sqlalchemy import api as db_api
+
+CONF = flocx_market.conf.CONF
+
+
+@pytest.fixture
+def hub():
+    hub = watch.ChangeHub(0.01)
+    hub._cursor = mock.Mock()
+    with mock.patch.object(hub, '_start'), \
+            mock.patch.object(watch, 'get_hub', return_value=hub):
+        yield hub
+
+
+def _record(status):
+    return mock.Mock(status=status)
+
+
+def _watch_in_thread(get, **kwargs):
+    result = {}
+
+    def run():
+        result['record'] = watch.watch(statuses.CONTRACT, 'c1', get,
+                                       **kwargs)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, result
+
+
+def _wait_for_watcher(hub):
+    for _ in range(500):
+        if hub._waiters:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("nobody is watching")
+
+
+def _wait_for_get(get, count):
+    for _ in range(500):
+        if get.call_count >= count:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("the watcher didn't read the record again")
+
+
+def test_watch_returns_when_status_differs(hub):
+    get = mock.Mock(return_value=_record(statuses.FULFILLED))
+
+    record = watch.watch(statuses.CONTRACT, 'c1', get,
+                         status=statuses.AVAILABLE, timeout=5)
+
+    assert record.status == statuses.FULFILLED
+    get.assert_called_once_with()
+    assert hub._waiters == {}
+    hub._cursor.skip_to_end.assert_called_once()
+
+
+def test_watch_wakes_on_change(hub):
+    get = mock.Mock(side_effect=[_record(statuses.AVAILABLE),
+                                 _record(statuses.AVAILABLE),
+                                 _record(statuses.FULFILLED)])
+    thread, result = _watch_in_thread(get, timeout=5)
+    _wait_for_watcher(hub)
+
+    # another record, then a write that left the status alone
+    hub.notify(statuses.CONTRACT, 'c2')
+    hub._cursor.read_all.return_value = [mock.Mock(
+        resource_type=statuses.CONTRACT, resource_id='c1')]
+    hub.poll()
+    _wait_for_get(get, 2)
+    hub.poll()
+    thread.join(5)
+
+    assert result['record'].status == statuses.FULFILLED
+    assert get.call_count == 3
+    assert not hub._active.is_set()
+
+
+def test_watch_times_out(hub):
+    get = mock.Mock(return_value=_record(statuses.AVAILABLE))
+
+    assert watch.watch(statuses.CONTRACT, 'c1', get, timeout=0) is None
+    assert hub._waiters == {}
+
+
+def test_watch_timeout_is_capped(hub):
+    CONF.set_override('watch_max_timeout', 1, group='api')
+    try:
+        with mock.patch.object(watch.time, 'monotonic',
+                               side_effect=[100.0, 101.0]):
+            assert watch.watch(statuses.CONTRACT, 'c1',
+                               mock.Mock(return_value=_record('available')),
+                               timeout=3600) is None
+    finally:
+        CONF.clear_override('watch_max_timeout', group='api')
+
+
+def test_watch_rejects_unknown_status(hub):
+    with pytest.raises(exception.InvalidStatus):
+        watch.watch(statuses.CONTRACT, 'c1', mock.Mock(), status='bogus')
+
+
+def test_hub_follows_change_log(app, db, session):
+    context = ctx.RequestContext(is_admin=False, project_id='5599')
+    now = datetime.datetime.utcnow()
+    bid = db_api.bid_create(dict(
+        quantity=1, start_time=now, end_time=now, duration=60,
+        status=statuses.AVAILABLE, config_query={}, cost=1.0), context)
+    hub = watch.ChangeHub(0.01)
+
+    with mock.patch.object(hub, '_start'):
+        with hub.watching(statuses.BID, bid.bid_id) as changed:
+            # the bid was created before the watch
+            hub.poll()
+            assert not changed.is_set()
+            db_api.bid_update(bid.bid_id, dict(status=statuses.EXPIRED),
+                              context)
+            hub.poll()
+            assert changed.is_set()
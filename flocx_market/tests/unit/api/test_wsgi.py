@@ -0,0 +1,80 @@
+import socket
+from unittest import mock
+
+import pytest
+
+from flocx_market.api import wsgi
+import flocx_market.conf
+
+CONF = flocx_market.conf.CONF
+
+
+@mock.patch('flocx_market.api.wsgi.flocx_market_service.prepare_service')
+def test_initialize_application(prepare, app):
+    application = wsgi.initialize_application()
+
+    prepare.assert_called_once_with([])
+    assert application.name == 'flocx-market'
+
+
+def test_listen():
+    sock = wsgi.listen('127.0.0.1', 0)
+    try:
+        assert sock.family == socket.AF_INET
+        host, port = sock.getsockname()
+        assert host == '127.0.0.1' and port > 0
+    finally:
+        sock.close()
+
+
+@mock.patch('flocx_market.api.wsgi.waitress.serve')
+def test_serve(serve):
+    CONF.set_override('threads', 4, group='api')
+    sock = mock.Mock()
+
+    wsgi.serve('app', sock)
+
+    serve.assert_called_once_with('app', sockets=[sock], threads=4,
+                                  connection_limit=100,
+                                  ident='flocx-market')
+    CONF.clear_override('threads', group='api')
+
+
+@mock.patch('flocx_market.api.wsgi.metrics.mark_process_dead')
+@mock.patch('flocx_market.api.wsgi.signal.signal')
+@mock.patch('flocx_market.api.wsgi.os.wait')
+@mock.patch('flocx_market.api.wsgi.os.fork')
+def test_run_workers(fork, wait, signal, dead):
+    fork.side_effect = [11, 12, 13]
+    wait.side_effect = [(12, 0), (11, 0), (13, 256)]
+
+    wsgi.run_workers('app', mock.Mock(), 3)
+
+    assert fork.call_count == 3
+    assert wait.call_count == 3
+    dead.assert_has_calls([mock.call(12), mock.call(11), mock.call(13)])
+
+
+@mock.patch('flocx_market.api.wsgi.run_workers')
+@mock.patch('flocx_market.api.wsgi.listen')
+@mock.patch('flocx_market.api.wsgi.flocx_market_service.prepare_service')
+def test_main(prepare, listen, run_workers, app):
+    CONF.set_override('api_workers', 3, group='api')
+
+    wsgi.main()
+
+    listen.assert_called_once_with(CONF.api.host_ip, CONF.api.port)
+    run_workers.assert_called_once_with(mock.ANY, listen.return_value, 3)
+    CONF.clear_override('api_workers', group='api')
+
+
+@mock.patch('flocx_market.api.wsgi.listen')
+@mock.patch('flocx_market.api.wsgi.flocx_market_service.prepare_service')
+def test_main_ssl(prepare, listen):
+    CONF.set_override('enable_ssl_api', True, group='api')
+
+    with pytest.raises(SystemExit):
+        wsgi.main()
+
+    listen.assert_not_called()
+    CONF.clear_override('enable_ssl_api', group='api')
@@ -0,0 +1,23 @@
+from oslo_context import context as ctx
+
+from flocx_market.common import statuses
+from flocx_market.matcher import matcher
+from flocx_market.tests.benchmark import market
+
+admin_context = ctx.RequestContext(is_admin=True)
+
+
+def test_generate_market(app, db, session):
+    market.generate_market(offers=20, bids=5, contracts=3, seed=1)
+
+    assert len(db.offer_get_all(admin_context)) == 20
+    assert len(db.bid_get_all_by_status(
+        statuses.AVAILABLE, admin_context)) == 5
+    assert len(db.contract_get_all(admin_context)) == 3
+    assert len(db.offer_contract_relationship_get_all(admin_context)) == 3
+
+
+def test_generated_specs_evaluate(app, db, session):
+    rng = market.generate_market(offers=20, bids=0, contracts=0, seed=2)
+    for _ in range(10):
+        matcher.get_all_matching_offers(admin_context, market.bid_specs(rng))
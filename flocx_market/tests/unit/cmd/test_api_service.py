@@ -1,5 +1,8 @@
 import flocx_market.conf
 from unittest import mock
+
+import pytest
+
 import flocx_market.cmd.api as main
 
 CONF = flocx_market.conf.CONF
@@ -17,3 +20,18 @@ def test_keystone_app(wait, launch, prepare):
 
     launch.assert_called_once()
     wait.assert_called_once()
+
+
+@mock.patch('flocx_market.cmd.api.os.execv', side_effect=SystemExit)
+@mock.patch('flocx_market.cmd.api.flocx_market_service.prepare_service')
+@mock.patch('flocx_market.cmd.api.service.ProcessLauncher.launch_service')
+def test_threaded_server(launch, prepare, execv):
+    CONF.set_override('server_mode', 'threaded', group='api')
+
+    with pytest.raises(SystemExit):
+        main.main()
+
+    args = execv.call_args[0][1]
+    assert args[1:3] == ['-m', 'flocx_market.api.wsgi']
+    launch.assert_not_called()
+    CONF.clear_override('server_mode', group='api')
@@ -0,0 +1,64 @@
+import datetime
+from unittest import mock
+
+import pytest
+
+import flocx_market.cmd.purge as main
+import flocx_market.conf
+
+CONF = flocx_market.conf.CONF
+
+
+@pytest.fixture
+def purge_opts():
+    CONF.register_cli_opts(main.purge_opts)
+    yield
+    for opt in ['archive', 'archive_after_days', 'archived_before_days',
+                'batch_size']:
+        CONF.clear_override(opt)
+    CONF.unregister_opts(main.purge_opts)
+
+
+@mock.patch('flocx_market.cmd.purge.db_api.purge_archive')
+@mock.patch('flocx_market.cmd.purge.db_api.archive_expired')
+@mock.patch('flocx_market.cmd.purge.flocx_market_service.prepare_service')
+def test_purge(prepare, archive_expired, purge_archive, purge_opts):
+    CONF.set_override('archive', True)
+    CONF.set_override('archived_before_days', 90)
+    CONF.set_override('batch_size', 10)
+    archive_expired.side_effect = [{'offers': 10}, {'offers': 2},
+                                   {'offers': 0}]
+    purge_archive.side_effect = [{'offers_archive': 0}]
+
+    main.main()
+
+    assert archive_expired.call_count == 3
+    assert archive_expired.call_args[0][2] == 10
+    purge_archive.assert_called_once()
+
+
+@mock.patch('flocx_market.cmd.purge.flocx_market_service.prepare_service')
+def test_purge_nothing_to_do(prepare, purge_opts):
+    with pytest.raises(SystemExit):
+        main.main()
+
+
+@mock.patch('flocx_market.cmd.purge.db_api.archive_expired')
+@mock.patch('flocx_market.cmd.purge.flocx_market_service.prepare_service')
+def test_purge_archiving_disabled(prepare, archive_expired, purge_opts):
+    CONF.set_override('archive', True)
+    CONF.set_override('archive_after_days', 0, group='manager')
+    archive_expired.return_value = {'offers': 0}
+    try:
+        with pytest.raises(SystemExit):
+            main.main()
+        archive_expired.assert_not_called()
+
+        CONF.set_override('archive_after_days', 3)
+        main.main()
+    finally:
+        CONF.clear_override('archive_after_days', group='manager')
+
+    before = archive_expired.call_args[0][1]
+    age = datetime.datetime.utcnow() - before
+    assert datetime.timedelta(days=3) <= age < datetime.timedelta(days=3.1)
@@ -0,0 +1,92 @@
+from unittest import mock
+
+import pytest
+import werkzeug.test
+
+from flocx_market.api import app as api_app
+from flocx_market.common import metrics
+import flocx_market.conf
+
+CONF = flocx_market.conf.CONF
+
+
+def sample(name, **labels):
+    return metrics.prometheus_client.REGISTRY.get_sample_value(name, labels)
+
+
+def test_timed():
+    @metrics.timed(metrics.TASK_DURATION, task='test_timed')
+    def task():
+        return 'done'
+
+    before = sample('flocx_market_manager_task_duration_seconds_count',
+                    task='test_timed') or 0
+    assert task() == 'done'
+    assert task.__name__ == 'task'
+    assert sample('flocx_market_manager_task_duration_seconds_count',
+                  task='test_timed') == before + 1
+
+
+def test_timed_exception():
+    @metrics.timed(metrics.TASK_DURATION, task='test_timed_exception')
+    def task():
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        task()
+    assert sample('flocx_market_manager_task_duration_seconds_count',
+                  task='test_timed_exception') == 1
+
+
+def test_timed_iter(monkeypatch):
+    clock = iter([0.0, 1.0, 5.0, 6.0])
+    monkeypatch.setattr(metrics.time, 'perf_counter', lambda: next(clock))
+
+    @metrics.timed_iter(metrics.TASK_DURATION, task='test_timed_iter')
+    def items():
+        return iter(['a', 'b'])
+
+    before = sample('flocx_market_manager_task_duration_seconds_sum',
+                    task='test_timed_iter') or 0
+    it = items()
+    assert next(it) == 'a'
+    # the four seconds the caller held the first item are not counted
+    assert next(it) == 'b'
+    it.close()
+    assert sample('flocx_market_manager_task_duration_seconds_sum',
+                  task='test_timed_iter') == before + 2.0
+
+
+def test_db_calls_timed(app, db, session):
+    before = sample('flocx_market_db_call_duration_seconds_count',
+                    function='offer_get_all') or 0
+    db.offer_get_all(None)
+    assert sample('flocx_market_db_call_duration_seconds_count',
+                  function='offer_get_all') == before + 1
+
+
+def test_metrics_endpoint(client, db, session):
+    client.get('/offer')
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.content_type == metrics.CONTENT_TYPE
+    assert (b'flocx_market_api_request_duration_seconds_count{'
+            b'method="GET",route="/offer",status="200"}') in response.data
+
+
+@mock.patch('flocx_market.api.app.auth_token.AuthProtocol')
+def test_metrics_endpoint_skips_auth(auth_protocol, app):
+    def deny(environ, start_response):
+        start_response('401 Unauthorized', [])
+        return [b'']
+    auth_protocol.return_value = deny
+    CONF.set_override('auth_enable', True, group='api')
+    try:
+        client = werkzeug.test.Client(api_app.create_app('test_auth'))
+    finally:
+        CONF.clear_override('auth_enable', group='api')
+
+    assert client.get('/metrics').status_code == 200
+    assert client.get('/offer').status_code == 401
+    assert client.get('/metrics/').status_code == 401
@@ -0,0 +1,26 @@
+from flocx_market.common import statuses
+
+
+def test_can_transition():
+    assert statuses.can_transition(statuses.BID, statuses.AVAILABLE,
+                                   statuses.CLAIMED)
+    assert statuses.can_transition(statuses.BID, statuses.CLAIMED,
+                                   statuses.CLAIMED)
+    assert not statuses.can_transition(statuses.BID, statuses.CLAIMED,
+                                       statuses.AVAILABLE)
+    assert not statuses.can_transition(statuses.OFFER, statuses.EXPIRED,
+                                       statuses.AVAILABLE)
+    assert not statuses.can_transition(statuses.OFFER, statuses.AVAILABLE,
+                                       statuses.FULFILLED)
+
+
+def test_sources():
+    assert statuses.sources(statuses.CONTRACT, statuses.EXPIRED) == (
+        statuses.AVAILABLE, statuses.FULFILLED, statuses.EXPIRED)
+    assert statuses.sources(statuses.CONTRACT, statuses.AVAILABLE) == (
+        statuses.AVAILABLE,)
+
+
+def test_codes_unique():
+    assert len(set(statuses.CODES.values())) == len(statuses.ALL)
+    assert statuses.EXPIRED not in statuses.ACTIVE
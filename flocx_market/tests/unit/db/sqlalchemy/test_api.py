@@ -6,6 +6,7 @@ from oslo_db.exception import DBError
 from oslo_context import context as ctx
 
 from flocx_market.db.sqlalchemy import api
+from flocx_market.db.sqlalchemy import models
 from flocx_market.common import exception as e
 from flocx_market.common import statuses
 from flocx_market.resource_objects import resource_types
@@ -272,6 +273,57 @@ def test_offer_update_admin_valid(is_resource_admin, app, db, session):
     assert check.status == statuses.EXPIRED
 
 
+@mock.patch('flocx_market.resource_objects.ironic_node'
+            '.IronicNode.is_resource_admin')
+def test_offer_config_columns(is_resource_admin, app, db, session):
+    is_resource_admin.return_value = True
+    data = dict(test_offer_data)
+    data['config'] = {'memory_mb': '2048', 'cpus': 4, 'cpu_arch': 'x86_64',
+                      'local_gb': 'unknown'}
+    offer = api.offer_create(data, scoped_context)
+    check = api.offer_get(offer.offer_id, scoped_context)
+
+    assert check.config_memory_mb == 2048
+    assert check.config_cpus == 4
+    assert check.config_cpu_arch == 'x86_64'
+    assert check.config_local_gb is None
+
+    offer = api.offer_update(offer.offer_id,
+                             dict(config={'cpus': 8}),
+                             scoped_context)
+    assert offer.config_cpus == 8
+    assert offer.config_memory_mb is None
+
+    assert len(api.offer_get_all_by_status(
+        statuses.AVAILABLE, scoped_context,
+        specs=[['cpus', '>=', 8], ['name', 'eq', 'ignored']])) == 1
+    assert len(api.offer_get_all_by_status(
+        statuses.AVAILABLE, scoped_context,
+        specs=[['cpus', '<', 8]])) == 0
+
+
+@mock.patch('flocx_market.resource_objects.ironic_node'
+            '.IronicNode.is_resource_admin')
+def test_offer_config_string_column_rejects_other_types(
+        is_resource_admin, app, db, session):
+    is_resource_admin.return_value = True
+    data = dict(test_offer_data, config={'cpu_arch': 64})
+
+    # SQL would see NULL where the matcher compares str(64)
+    with pytest.raises(e.InvalidParameter):
+        api.offer_create(data, scoped_context)
+    assert api.offer_get_all(scoped_context) == []
+
+    offer = api.offer_create(dict(test_offer_data, config={'cpus': 4}),
+                             scoped_context)
+    with pytest.raises(e.InvalidParameter):
+        api.offer_update(offer.offer_id,
+                         dict(config={'cpu_arch': ['x86_64']}),
+                         scoped_context)
+    assert api.offer_get(offer.offer_id,
+                         scoped_context).config_cpu_arch is None
+
+
 @mock.patch('flocx_market.resource_objects.ironic_node'
             '.IronicNode.is_resource_admin')
 def test_offer_update_scoped_valid(is_resource_admin, app, db, session):
@@ -707,6 +759,38 @@ def test_offer_contract_relationship_get_all_unexpired(app, db, session):
         admin_context)) == 0
 
 
+def test_offer_contract_relationship_get_all_with_offers(app, db, session):
+    contract_data, offer_test_id = create_test_contract_data_for_ocr()
+    contract = api.contract_create(contract_data, admin_context)
+
+    ocrs = api.offer_contract_relationship_get_all_with_offers(
+        admin_context, contract.contract_id)
+    assert len(ocrs) == 1
+    assert 'offer' in ocrs[0].__dict__
+    assert ocrs[0].offer.offer_id == offer_test_id
+
+
+def test_offer_contract_relationship_update_status(app, db, session):
+    contract_data, offer_test_id = create_test_contract_data_for_ocr()
+    contract = api.contract_create(contract_data, admin_context)
+    ocrs = api.offer_contract_relationship_get_all(
+        admin_context, {'contract_id': contract.contract_id})
+
+    ocr_ids = [o.offer_contract_relationship_id for o in ocrs]
+    assert api.offer_contract_relationship_update_status(
+        admin_context, ocr_ids, statuses.FULFILLED) == ocr_ids
+    assert api.offer_contract_relationship_update_status(
+        admin_context, [], statuses.FULFILLED) == []
+    # expired relationships can't be fulfilled again
+    assert api.offer_contract_relationship_update_status(
+        admin_context, ocr_ids, statuses.EXPIRED) == ocr_ids
+    assert api.offer_contract_relationship_update_status(
+        admin_context, ocr_ids, statuses.FULFILLED) == []
+    assert api.offer_contract_relationship_get(
+        admin_context,
+        ocrs[0].offer_contract_relationship_id).status == statuses.EXPIRED
+
+
 def test_offer_contract_relationship_update_invalid_nonexistent(
         app, db, session):
     with pytest.raises(e.ResourceNotFound) as excinfo:
@@ -715,3 +799,236 @@ def test_offer_contract_relationship_update_invalid_nonexistent(
             values=dict(status=statuses.EXPIRED),
             context=admin_context)
     assert (excinfo.value.code == 404)
+
+
+def create_expired_contract(expired_at):
+    contract_data = create_test_contract_data()
+    contract = api.contract_create(contract_data, admin_context)
+    ocr = api.offer_contract_relationship_get_all(
+        admin_context, {'contract_id': contract.contract_id})[0]
+    for model in [models.OfferContractRelationship, models.Contract,
+                  models.Offer, models.Bid]:
+        api.get_session().query(model).update(
+            {'status': statuses.EXPIRED, 'updated_at': expired_at},
+            synchronize_session=False)
+    return contract, ocr
+
+
+def test_market_watermark(app, db, session):
+    empty = api.market_watermark(admin_context)
+    assert empty == (None,) * 6
+
+    bid = api.bid_create(dict(test_bid_data_2), scoped_context)
+    created = api.market_watermark(admin_context)
+    assert created != empty
+    assert api.market_watermark(admin_context) == created
+
+    api.bid_update(bid.bid_id, dict(status=statuses.EXPIRED),
+                   scoped_context)
+    assert api.market_watermark(admin_context) != created
+
+
+def test_deadlines_get(app, db, session):
+    contract = api.contract_create(create_test_contract_data(),
+                                   admin_context)
+    bid_id = contract.bid_id
+    offer_id = api.contract_get_offers(admin_context,
+                                       contract.contract_id)[0].offer_id
+
+    deadlines = dict(api.deadlines_get(admin_context))
+    assert deadlines == {
+        ('expire', 'offer', offer_id): test_offer_data['end_time'],
+        ('expire', 'bid', bid_id): test_bid_data_1['end_time'],
+        ('expire', 'contract', contract.contract_id): contract.end_time,
+        ('fulfill', 'contract', contract.contract_id): contract.start_time,
+    }
+
+    later = datetime.utcnow() + timedelta(seconds=1)
+    assert api.deadlines_get(admin_context, later) == []
+
+    api.get_session().query(models.Bid).update(
+        {'updated_at': later}, synchronize_session=False)
+    api.get_session().query(models.Contract).update(
+        {'status': statuses.FULFILLED, 'updated_at': later},
+        synchronize_session=False)
+    assert sorted(key for key, when in
+                  api.deadlines_get(admin_context, later)) == [
+        ('expire', 'bid', bid_id),
+        ('expire', 'contract', contract.contract_id)]
+
+
+def _changes():
+    return [(c.resource_type, c.action, c.status)
+            for c in api.change_get_since(admin_context)]
+
+
+def test_writes_are_logged(app, db, session):
+    bid = api.bid_create(dict(test_bid_data_2), scoped_context)
+    api.bid_update(bid.bid_id, dict(status=statuses.EXPIRED), scoped_context)
+    api.bid_destroy(bid.bid_id, scoped_context)
+    contract = api.contract_create(create_test_contract_data(),
+                                   admin_context)
+    ocr = api.offer_contract_relationship_get_all(
+        admin_context, {'contract_id': contract.contract_id})[0]
+    api.offer_contract_relationship_update_status(
+        admin_context, [ocr.offer_contract_relationship_id],
+        statuses.FULFILLED)
+
+    assert _changes() == [
+        ('bid', 'create', statuses.AVAILABLE),
+        ('bid', 'update', statuses.EXPIRED),
+        ('bid', 'delete', statuses.EXPIRED),
+        ('bid', 'create', statuses.AVAILABLE),
+        ('offer', 'create', statuses.AVAILABLE),
+        ('contract', 'create', statuses.AVAILABLE),
+        ('offer_contract_relationship', 'create', statuses.AVAILABLE),
+        ('offer_contract_relationship', 'update', statuses.FULFILLED),
+    ]
+    seqs = [c.seq for c in api.change_get_since(admin_context)]
+    assert seqs == sorted(seqs)
+    assert [c.seq for c in api.change_get_since(admin_context,
+                                                seqs[5], 2)] == seqs[6:]
+
+
+def test_change_is_written_with_the_record(app, db, session):
+    with mock.patch.object(api, '_record_changes',
+                           side_effect=RuntimeError()):
+        with pytest.raises(RuntimeError):
+            api.bid_create(dict(test_bid_data_2), scoped_context)
+
+    assert api.bid_get_all(admin_context) == []
+    assert _changes() == []
+
+
+def test_change_get_since_waits_for_gaps(app, db, session):
+    table = models.Change.__table__
+    old = now - timedelta(days=1)
+    for seq, created_at in [(1, old), (3, old), (4, old),
+                            (6, datetime.utcnow())]:
+        api.get_session().execute(table.insert().values(
+            seq=seq, resource_type='bid', resource_id='b', action='update',
+            created_at=created_at))
+
+    # 2 and 5 are missing; 2 is long settled, 5 may still be committing
+    assert [c.seq for c in api.change_get_since(admin_context, 1)] == [3, 4]
+    assert [c.seq for c in api.change_get_since(admin_context, 4)] == []
+    # a new reader starts wherever the log does
+    assert [c.seq for c in api.change_get_since(admin_context, 0, 1)] == [1]
+    with pytest.raises(e.RequiresAdmin):
+        api.change_get_since(scoped_context)
+
+
+def test_change_compact(app, db, session):
+    for i in range(3):
+        api.bid_create(dict(test_bid_data_2), scoped_context)
+    later = datetime.utcnow() + timedelta(seconds=1)
+
+    assert api.change_compact(admin_context, later, 1) == 1
+    assert api.change_compact(admin_context, later, 10) == 1
+    # the latest entry stays
+    assert api.change_compact(admin_context, later, 10) == 0
+    assert len(api.change_get_since(admin_context)) == 1
+
+    bid = api.bid_create(dict(test_bid_data_2), scoped_context)
+    kept, new = api.change_get_since(admin_context)
+    assert new.seq == kept.seq + 1
+    assert new.resource_id == bid.bid_id
+
+
+def test_archive_expired(app, db, session):
+    contract, ocr = create_expired_contract(now - timedelta(days=10))
+
+    # not expired long enough
+    archived = api.archive_expired(admin_context,
+                                   now - timedelta(days=20), 100)
+    assert not any(archived.values())
+
+    archived = api.archive_expired(admin_context,
+                                   now - timedelta(days=5), 100)
+    assert archived == {'offer_contract_relationship': 1,
+                        'contracts': 1,
+                        'offers': 1,
+                        'bids': 1}
+    assert api.contract_get_all(admin_context) == []
+    assert api.offer_get_all(admin_context) == []
+    archived_contracts = api.contract_get_all_archived(admin_context)
+    assert [c.contract_id for c in archived_contracts] == \
+        [contract.contract_id]
+    assert archived_contracts[0].archived_at is not None
+    archived_ocrs = api.offer_contract_relationship_get_all_archived(
+        admin_context, {'contract_id': contract.contract_id})
+    assert [o.offer_contract_relationship_id for o in archived_ocrs] == \
+        [ocr.offer_contract_relationship_id]
+
+    logged = [c for c in api.change_get_since(admin_context, limit=1000)
+              if c.action == 'archive']
+    assert sorted((c.resource_type, c.resource_id) for c in logged) == \
+        sorted([(statuses.OFFER_CONTRACT_RELATIONSHIP,
+                 ocr.offer_contract_relationship_id),
+                (statuses.CONTRACT, contract.contract_id),
+                (statuses.OFFER, ocr.offer_id),
+                (statuses.BID, contract.bid_id)])
+    assert all(c.status == statuses.EXPIRED for c in logged)
+    contract_change = [c for c in logged
+                       if c.resource_type == statuses.CONTRACT][0]
+    assert contract_change.project_id == contract.project_id
+
+
+def test_archive_expired_keeps_referenced_rows(app, db, session):
+    contract, ocr = create_expired_contract(now - timedelta(days=10))
+    api.get_session().query(models.OfferContractRelationship).update(
+        {'updated_at': now}, synchronize_session=False)
+
+    archived = api.archive_expired(admin_context,
+                                   now - timedelta(days=5), 100)
+    # the recently expired relationship still points to the contract and
+    # the offer, and the contract to the bid
+    assert not any(archived.values())
+
+
+def test_archive_expired_batch_size(app, db, session):
+    create_expired_contract(now - timedelta(days=10))
+    create_expired_contract(now - timedelta(days=10))
+
+    archived = api.archive_expired(admin_context,
+                                   now - timedelta(days=5), 1)
+    assert archived['offers'] == 1
+    assert len(api.offer_get_all(admin_context)) == 1
+
+
+def test_purge_archive(app, db, session):
+    create_expired_contract(now - timedelta(days=10))
+    api.archive_expired(admin_context, now - timedelta(days=5), 100)
+
+    purged = api.purge_archive(admin_context, now - timedelta(days=1), 100)
+    assert not any(purged.values())
+
+    purged = api.purge_archive(admin_context, now + timedelta(days=1), 100)
+    assert purged == {'offer_contract_relationship_archive': 1,
+                      'contracts_archive': 1,
+                      'offers_archive': 1,
+                      'bids_archive': 1}
+    assert api.offer_get_all_archived(admin_context) == []
+
+
+def test_status_stored_as_code(app, db, session):
+    create_test_contract_data()
+    stored = api.get_session().execute(
+        'SELECT status FROM offers').scalar()
+    assert stored == statuses.CODES[statuses.AVAILABLE]
+
+
+def test_status_transitions(app, db, session):
+    contract_data = create_test_contract_data()
+    contract = api.contract_create(contract_data, admin_context)
+
+    with pytest.raises(e.InvalidStatus):
+        api.contract_update(contract.contract_id, dict(status='busy'),
+                            admin_context)
+
+    api.contract_update(contract.contract_id,
+                        dict(status=statuses.EXPIRED), admin_context)
+    with pytest.raises(e.InvalidStatusTransition):
+        api.contract_update(contract.contract_id,
+                            dict(status=statuses.AVAILABLE), admin_context)
+    assert api.contract_get_all_unexpired(admin_context) == []
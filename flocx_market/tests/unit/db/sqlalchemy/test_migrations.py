@@ -0,0 +1,79 @@
+import json
+
+from alembic import autogenerate
+from alembic import migration
+import pytest
+import sqlalchemy as sa
+
+from flocx_market.db.sqlalchemy import api
+from flocx_market.db.sqlalchemy import models
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = sa.create_engine('sqlite:///%s' % (tmp_path / 'market.db'))
+    yield engine
+    engine.dispose()
+
+
+def _insert_offer(engine, offer_id, config, status='available'):
+    engine.execute(
+        "INSERT INTO offers (offer_id, project_id, status, resource_id, "
+        "resource_type, start_time, config, cost) VALUES "
+        "(?, 'p', ?, 'r', 'dummy_node', '2020-01-01 00:00:00', ?, 1.0)",
+        (offer_id, status, json.dumps(config)))
+
+
+def test_upgrade_backfills_offer_config_columns(engine):
+    api.upgrade('001', engine=engine)
+    _insert_offer(engine, 'o1', {'cpus': 16, 'memory_mb': '4096',
+                                 'cpu_arch': 'x86_64', 'local_gb': 'big'})
+    _insert_offer(engine, 'o2', {})
+
+    api.upgrade('002', engine=engine)
+
+    rows = dict((r[0], r[1:]) for r in engine.execute(
+        'SELECT offer_id, config_cpus, config_memory_mb, config_local_gb, '
+        'config_cpu_arch FROM offers'))
+    assert rows['o1'] == (16.0, 4096.0, None, 'x86_64')
+    assert rows['o2'] == (None, None, None, None)
+
+
+def test_upgrade_converts_statuses(engine):
+    api.upgrade('004', engine=engine)
+    _insert_offer(engine, 'o1', {}, status='available')
+    _insert_offer(engine, 'o2', {}, status='expired')
+    engine.execute(
+        "INSERT INTO bids (bid_id, project_id, quantity, start_time, "
+        "end_time, duration, status, config_query, cost) VALUES "
+        "('b1', 'p', 1, '2020-01-01', '2020-01-02', 60, 'busy', '{}', 1)")
+
+    api.upgrade(engine=engine)
+
+    assert sorted(engine.execute('SELECT offer_id, status FROM offers')) \
+        == [('o1', 1), ('o2', 4)]
+    assert list(engine.execute('SELECT status FROM bids')) == [(2,)]
+    indexes = [i['name'] for i in sa.inspect(engine).get_indexes('offers')]
+    assert 'offers_active_idx' in indexes
+
+
+def test_upgrade_rejects_unknown_status(engine):
+    api.upgrade('004', engine=engine)
+    _insert_offer(engine, 'o1', {}, status='bogus')
+
+    with pytest.raises(RuntimeError):
+        api.upgrade(engine=engine)
+
+
+def test_migrated_schema_matches_models(engine):
+    api.upgrade(engine=engine)
+
+    def include_object(obj, name, type_, reflected, compare_to):
+        # SQLite's own bookkeeping for AUTOINCREMENT columns
+        return name != 'sqlite_sequence'
+
+    with engine.connect() as connection:
+        context = migration.MigrationContext.configure(
+            connection, opts={'include_object': include_object})
+        diff = autogenerate.compare_metadata(context, models.Base.metadata)
+    assert diff == []
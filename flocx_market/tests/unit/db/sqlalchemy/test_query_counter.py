@@ -0,0 +1,105 @@
+import pytest
+import unittest.mock as mock
+
+from oslo_context import context as ctx
+
+from flocx_market.api.app import create_app
+import flocx_market.conf
+from flocx_market.db.sqlalchemy import api
+from flocx_market.db.sqlalchemy import query_counter
+
+CONF = flocx_market.conf.CONF
+
+admin_context = ctx.RequestContext(is_admin=True, project_id='1234')
+
+
+def test_statement_shape():
+    assert (query_counter.statement_shape(
+        'SELECT a FROM t\n  WHERE t.id IN (?, ?, ?)') ==
+        query_counter.statement_shape('SELECT a FROM t WHERE t.id IN (?)'))
+
+
+def test_record(app, db, session):
+    with query_counter.record() as recorder:
+        api.offer_get_all(admin_context)
+        api.bid_get_all(admin_context)
+
+    assert recorder.count == 2
+    assert recorder.duration >= 0
+
+    # nothing is recorded once the block is left
+    api.offer_get_all(admin_context)
+    assert recorder.count == 2
+
+
+def test_record_nested(app, db, session):
+    with query_counter.record() as outer:
+        api.offer_get_all(admin_context)
+        with query_counter.record() as inner:
+            api.bid_get_all(admin_context)
+
+    assert inner.count == 1
+    assert outer.count == 2
+
+
+def test_repeated(app, db, session):
+    with query_counter.record() as recorder:
+        for resource_id in ['1', '2', '3']:
+            api.offer_get_all_by_resource_id(admin_context, resource_id)
+
+    repeated = recorder.repeated(3)
+    assert len(repeated) == 1
+    assert repeated[0][1] == 3
+    assert recorder.repeated(4) == []
+
+
+@mock.patch.object(query_counter, 'LOG')
+def test_report_repeated(log, app, db, session):
+    with query_counter.record('test') as recorder:
+        for _ in range(2):
+            api.offer_get_all(admin_context)
+    recorder.report(threshold=2)
+
+    assert log.warning.call_count == 1
+
+
+def test_assert_max_queries(app, db, session):
+    with query_counter.assert_max_queries(1):
+        api.offer_get_all(admin_context)
+
+    with pytest.raises(AssertionError):
+        with query_counter.assert_max_queries(1):
+            api.offer_get_all(admin_context)
+            api.offer_get_all(admin_context)
+
+
+def test_counted(app, db, session):
+    @query_counter.counted('task')
+    def task():
+        api.offer_get_all(admin_context)
+        return 'done'
+
+    CONF.set_override('count_queries', True, group='profiling')
+    try:
+        with mock.patch.object(query_counter.QueryRecorder,
+                               'report') as report:
+            assert task() == 'done'
+    finally:
+        CONF.clear_override('count_queries', group='profiling')
+    assert report.call_count == 1
+
+
+def test_api_query_headers(app, db, session):
+    CONF.set_override('auth_enable', False, group='api')
+    CONF.set_override('count_queries', True, group='profiling')
+    try:
+        counting_app = create_app('testing')
+    finally:
+        CONF.clear_override('count_queries', group='profiling')
+
+    with counting_app.app_context():
+        response = counting_app.test_client().get('/offer')
+
+    assert response.status_code == 200
+    assert response.headers['X-Query-Count'] == '1'
+    assert float(response.headers['X-Query-Time']) >= 0
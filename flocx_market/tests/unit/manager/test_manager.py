@@ -1,5 +1,12 @@
+import datetime
+
+from oslo_context import context as ctx
+
+from flocx_market.common import statuses
 import flocx_market.conf as conf
+from flocx_market.db.sqlalchemy import api as db_api
 import flocx_market.manager.service as manager
+from flocx_market.manager import scheduler
 import flocx_market.cmd.manager as main
 
 from unittest import mock
@@ -20,11 +27,101 @@ def test_launch_service_manager(wait, startmock, prepare, managermock, base):
     managermock.assert_called()
 
 
+@mock.patch('flocx_market.manager.service.resource_object_factory'
+            '.load_drivers')
 @mock.patch('flocx_market.manager.service.threadgroup.ThreadGroup.'
-            'add_dynamic_timer')
-def test_start_manager(timer):
+            'add_thread')
+def test_start_manager(add_thread, load_drivers):
     m = manager.ManagerService()
-    m.tasks.run_periodic_tasks(None)
     m.start()
 
-    timer.assert_called()
+    assert [c[0][0].__self__.name for c in add_thread.call_args_list] == [
+        'deadlines', 'matcher', 'archive_expired', 'compact_changes']
+    load_drivers.assert_called_once_with()
+
+
+def test_schedules_share_locks():
+    schedules = {task.name: task for task in manager.Manager(CONF).schedules()}
+
+    assert schedules['matcher'].locks == ('bids', 'offers')
+    assert schedules['deadlines'].locks == ('bids', 'offers')
+    assert isinstance(schedules['deadlines'], scheduler.DeadlineTask)
+    assert schedules['archive_expired'].locks == ()
+    assert len({id(task.lockset) for task in schedules.values()}) == 1
+    assert schedules['matcher'].interval == CONF.manager.matcher_frequency
+    assert isinstance(schedules['matcher'], scheduler.AdaptiveTask)
+    assert schedules['matcher'].min_interval == \
+        CONF.manager.matcher_min_interval
+
+
+@mock.patch('flocx_market.manager.service.db_api.archive_expired')
+def test_archive_expired(archive_expired):
+    archive_expired.side_effect = [{'offers': 2, 'bids': 1},
+                                   {'offers': 0, 'bids': 0}]
+    m = manager.Manager(CONF)
+    m.archive_expired(None)
+
+    assert archive_expired.call_count == 2
+
+
+@mock.patch('flocx_market.manager.service.db_api.archive_expired')
+def test_archive_expired_disabled(archive_expired):
+    CONF.set_override('archive_after_days', 0, group='manager')
+    try:
+        manager.Manager(CONF).archive_expired(None)
+    finally:
+        CONF.clear_override('archive_after_days', group='manager')
+
+    archive_expired.assert_not_called()
+
+
+def test_handle_deadline_expires_bid(app, db, session):
+    context = ctx.RequestContext(is_admin=True)
+    past = datetime.datetime.utcnow() - datetime.timedelta(seconds=1)
+    bid = db_api.bid_create(dict(
+        quantity=1, start_time=past - datetime.timedelta(days=1),
+        end_time=past, duration=3600, status=statuses.AVAILABLE,
+        config_query={}, cost=1.0),
+        ctx.RequestContext(is_admin=False, project_id='1234'))
+    m = manager.Manager(CONF)
+
+    assert m.handle_deadline(context, ('expire', 'bid', bid.bid_id))
+    assert db_api.bid_get(bid.bid_id, context).status == statuses.EXPIRED
+    # the record no longer has the deadline
+    assert not m.handle_deadline(context, ('expire', 'bid', bid.bid_id))
+    assert not m.handle_deadline(context, ('expire', 'bid', 'missing'))
+
+
+@mock.patch('flocx_market.manager.service.Contract.get')
+def test_handle_deadline_contract(get):
+    now = datetime.datetime.utcnow()
+    contract = mock.Mock(status=statuses.AVAILABLE,
+                         start_time=now - datetime.timedelta(seconds=1),
+                         end_time=now + datetime.timedelta(hours=1))
+    get.return_value = contract
+    m = manager.Manager(CONF)
+
+    # the expiry deadline is an hour away
+    assert not m.handle_deadline(None, ('expire', 'contract', 'c'))
+    assert m.handle_deadline(None, ('fulfill', 'contract', 'c'))
+    contract.fulfill.assert_called_once_with(None)
+    contract.expire.assert_not_called()
+
+    contract.end_time = now - datetime.timedelta(seconds=1)
+    assert m.handle_deadline(None, ('fulfill', 'contract', 'c'))
+    contract.expire.assert_called_once_with(None)
+
+    contract.start_time = now + datetime.timedelta(hours=1)
+    contract.end_time = now + datetime.timedelta(hours=2)
+    assert not m.handle_deadline(None, ('fulfill', 'contract', 'c'))
+
+
+@mock.patch('flocx_market.manager.service.db_api.change_compact')
+def test_compact_changes(change_compact):
+    change_compact.side_effect = [1000, 10, 0]
+    manager.Manager(CONF).compact_changes(None)
+
+    assert change_compact.call_count == 3
+    before = change_compact.call_args[0][1]
+    assert before < datetime.datetime.utcnow() - datetime.timedelta(
+        days=CONF.manager.change_log_keep_days - 1)
@@ -0,0 +1,75 @@
+import os
+import pstats
+import signal
+
+import flocx_market.conf as conf
+from flocx_market.manager import profiler
+
+CONF = conf.CONF
+
+
+def busy():
+    return sum(i * i for i in range(200000))
+
+
+def test_profiled_not_armed(tmpdir):
+    CONF.set_override('profile_dir', str(tmpdir), group='profiling')
+    try:
+        task = profiler.profiled('task')(busy)
+        assert task() == busy()
+    finally:
+        CONF.clear_override('profile_dir', group='profiling')
+    assert os.listdir(str(tmpdir)) == []
+
+
+def test_profiled_cprofile(tmpdir):
+    CONF.set_override('profile_dir', str(tmpdir), group='profiling')
+    try:
+        task = profiler.profiled('task')(busy)
+        profiler.arm(1)
+        task()
+        task()
+    finally:
+        CONF.clear_override('profile_dir', group='profiling')
+
+    profiles = os.listdir(str(tmpdir))
+    assert len(profiles) == 1
+    assert profiles[0].startswith('task-')
+    assert profiles[0].endswith('.pstats')
+    pstats.Stats(os.path.join(str(tmpdir), profiles[0]))
+
+
+def test_profiled_sampling(tmpdir):
+    CONF.set_override('profile_dir', str(tmpdir), group='profiling')
+    CONF.set_override('profiler', 'sampling', group='profiling')
+    CONF.set_override('sampling_interval', 0.001, group='profiling')
+    try:
+        task = profiler.profiled('task')(busy)
+        profiler.arm(1)
+        for _ in range(5):
+            task()
+    finally:
+        CONF.clear_override('profile_dir', group='profiling')
+        CONF.clear_override('profiler', group='profiling')
+        CONF.clear_override('sampling_interval', group='profiling')
+
+    profiles = os.listdir(str(tmpdir))
+    assert len(profiles) == 1
+    assert profiles[0].endswith('.collapsed')
+    with open(os.path.join(str(tmpdir), profiles[0])) as f:
+        lines = f.read().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(' ', 1)
+    assert 'busy' in stack
+    assert int(count) > 0
+
+
+def test_signal_arms_profiling():
+    previous = signal.getsignal(signal.SIGUSR2)
+    try:
+        profiler.install_signal_handler()
+        os.kill(os.getpid(), signal.SIGUSR2)
+        assert profiler._remaining_runs == CONF.profiling.profile_runs
+    finally:
+        signal.signal(signal.SIGUSR2, previous)
+        profiler._remaining_runs = 0
@@ -0,0 +1,236 @@
+import datetime
+import threading
+import unittest.mock as mock
+
+from flocx_market.common import metrics
+from flocx_market.manager import scheduler
+
+
+def _skipped(task):
+    return metrics.prometheus_client.REGISTRY.get_sample_value(
+        'flocx_market_manager_task_skipped_runs_total', {'task': task}) or 0
+
+
+def test_run_skips_overlapping_runs():
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow(context):
+        started.set()
+        release.wait(5)
+
+    task = scheduler.ScheduledTask('test_overlap', slow, 60)
+    thread = threading.Thread(target=task.run, args=(None,))
+    thread.start()
+    started.wait(5)
+    before = _skipped('test_overlap')
+
+    assert not task.run(None)
+    assert _skipped('test_overlap') == before + 1
+    release.set()
+    thread.join()
+    assert task.run(None)
+
+
+def test_shared_locks_exclude_each_other():
+    lockset = scheduler.LockSet()
+    inside = []
+    overlapped = []
+
+    def work(context):
+        inside.append(1)
+        if len(inside) > 1:
+            overlapped.append(1)
+        threading.Event().wait(0.01)
+        inside.pop()
+
+    tasks = [scheduler.ScheduledTask('t%d' % i, work, 60,
+                                     locks=locks, lockset=lockset)
+             for i, locks in enumerate([('bids', 'offers'), ('offers',),
+                                        ('offers', 'bids')])]
+    threads = [threading.Thread(target=t.run, args=(None,)) for t in tasks]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert overlapped == []
+
+
+def test_failed_run_keeps_schedule():
+    task = scheduler.ScheduledTask('test_failed', mock.Mock(
+        side_effect=ValueError()), 60)
+
+    assert task.run(None)
+    assert task.run(None)
+    assert not task._running.locked()
+
+
+def test_jitter():
+    task = scheduler.ScheduledTask('test_jitter', None, 100, jitter=0.1)
+    delays = [task.next_delay() for _ in range(100)]
+
+    assert all(90 <= d <= 110 for d in delays)
+    assert len(set(delays)) > 1
+    assert scheduler.ScheduledTask('t', None, 100).next_delay() == 100
+
+
+def test_loop_trigger_and_stop():
+    ran = threading.Event()
+    func = mock.Mock(side_effect=lambda context: ran.set())
+    task = scheduler.ScheduledTask('test_loop', func, 3600)
+    thread = threading.Thread(target=task.loop, args=('ctx',))
+    thread.start()
+
+    assert not ran.wait(0.05)
+    task.trigger()
+    assert ran.wait(5)
+    task.stop()
+    thread.join(5)
+
+    assert not thread.is_alive()
+    func.assert_called_once_with('ctx')
+
+
+def _adaptive(name, func, watermark, **kwargs):
+    return scheduler.AdaptiveTask(name, func, 60, watermark,
+                                  min_interval=1, **kwargs)
+
+
+def test_adaptive_backs_off_while_unchanged():
+    func = mock.Mock(return_value=0)
+    task = _adaptive('test_backoff', func, lambda context: 'mark')
+
+    assert task.run(None)
+    assert task.next_delay() == 1
+    delays = []
+    for _ in range(7):
+        assert not task.run(None)
+        delays.append(task.next_delay())
+
+    assert delays == [2, 4, 8, 16, 32, 60, 60]
+    func.assert_called_once_with(None)
+
+
+def test_adaptive_runs_again_after_progress_or_change():
+    marks = iter(['a', 'a', 'a', 'b'])
+    func = mock.Mock(side_effect=[3, 0, 0])
+    task = _adaptive('test_progress', func, lambda context: next(marks))
+
+    # contracts were created: the same watermark does not hold it back
+    assert task.run(None)
+    assert task.next_delay() == 1
+    assert task.run(None)
+    assert not task.run(None)
+    assert task.next_delay() == 2
+    # the market moved
+    assert task.run(None)
+    assert task.next_delay() == 1
+    assert func.call_count == 3
+
+
+def test_adaptive_backs_off_after_failures():
+    func = mock.Mock(side_effect=[3, RuntimeError(), RuntimeError()])
+    task = _adaptive('test_fails', func, lambda context: 'mark')
+
+    assert task.run(None)
+    assert task.last_result == 3
+    # a failed run made no progress, whatever the run before it did
+    assert task.run(None)
+    assert task.last_result is None
+    assert task.next_delay() == 1
+    delays = []
+    for _ in range(3):
+        assert not task.run(None)
+        delays.append(task.next_delay())
+
+    assert delays == [2, 4, 8]
+    assert func.call_count == 2
+
+
+def test_adaptive_watermark_failure_runs_task():
+    func = mock.Mock(return_value=0)
+    task = _adaptive('test_mark_fails', func,
+                     mock.Mock(side_effect=RuntimeError()))
+
+    assert task.run(None)
+    assert task.run(None)
+    assert func.call_count == 2
+
+
+def test_adaptive_duty_cycle():
+    task = _adaptive('test_duty', mock.Mock(return_value=1),
+                     lambda context: None, max_duty_cycle=0.25)
+
+    with mock.patch.object(scheduler.time, 'monotonic',
+                           side_effect=[100.0, 104.0]):
+        assert task.run(None)
+
+    assert task.next_delay() == 12
+
+
+def test_loop_sets_interval_gauge():
+    task = scheduler.ScheduledTask('test_gauge', mock.Mock(), 3600)
+    thread = threading.Thread(target=task.loop, args=(None,))
+    thread.start()
+    task.stop()
+    thread.join(5)
+
+    assert metrics.prometheus_client.REGISTRY.get_sample_value(
+        'flocx_market_manager_task_interval_seconds',
+        {'task': 'test_gauge'}) == 3600
+
+
+def test_deadline_queue():
+    queue = scheduler.DeadlineQueue()
+    queue.push('b', 20)
+    queue.push('a', 10)
+    queue.push('c', 30)
+    # moving a deadline replaces the earlier one
+    queue.push('a', 25)
+
+    assert len(queue) == 3
+    assert queue.next_deadline() == 20
+    assert queue.pop_due(5) == []
+    assert queue.pop_due(25) == ['b', 'a']
+    assert queue.next_deadline() == 30
+    assert queue.pop_due(100) == ['c']
+    assert queue.next_deadline() is None
+
+
+def test_deadline_task_refreshes_changes_and_wakes_at_deadline():
+    now = datetime.datetime.utcnow()
+    deadlines = mock.Mock(side_effect=[
+        [(('expire', 'bid', 'due'), now - datetime.timedelta(seconds=1)),
+         (('expire', 'bid', 'soon'), now + datetime.timedelta(seconds=30))],
+        [(('expire', 'bid', 'new'), now)],
+    ])
+    handler = mock.Mock(return_value=True)
+    task = scheduler.DeadlineTask('test_deadlines', handler, 60, deadlines)
+
+    assert task.next_delay() == 0
+    assert task.run('ctx')
+    assert task.last_result == 1
+    handler.assert_called_once_with('ctx', ('expire', 'bid', 'due'))
+    deadlines.assert_called_once_with('ctx', None)
+    assert 25 < task.next_delay() <= 30
+
+    # the next refresh only reads what changed since the first
+    task._next_refresh = now
+    assert task.run('ctx')
+    since = deadlines.call_args[0][1]
+    assert since < now and since > now - 2 * task.OVERLAP
+    handler.assert_called_with('ctx', ('expire', 'bid', 'new'))
+
+
+def test_deadline_task_retries_failed_keys():
+    past = datetime.datetime.utcnow() - datetime.timedelta(seconds=1)
+    handler = mock.Mock(side_effect=[RuntimeError(), True])
+    task = scheduler.DeadlineTask(
+        'test_deadline_retry', handler, 60,
+        mock.Mock(return_value=[('key', past)]))
+
+    assert task.run(None)
+    assert task.last_result == 0
+    assert len(task.queue) == 1
+    assert 55 < task.next_delay() <= 60
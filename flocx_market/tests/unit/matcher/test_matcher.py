@@ -250,3 +250,70 @@ def test_2_match(is_resource_admin, app, db, session):
     assert len(get_all_matching_offers(
         scoped_context,
         [["memory", ">", 202]])) == 2
+
+
+test_offer_3 = dict(
+        offer_id='test_offer_3',
+        creator_id='3456',
+        date_created=now,
+        status=statuses.AVAILABLE,
+        resource_id='458',
+        resource_type=resource_types.IRONIC_NODE,
+        start_time=now,
+        end_time=now,
+        config={'memory_mb': '4096', 'cpus': 8, 'cpu_arch': 'x86_64',
+                'name': 'node-3'},
+        cost=0.0,
+        contract_id=None,
+        project_id='5599'
+        )
+
+test_offer_4 = dict(
+        offer_id='test_offer_4',
+        creator_id='3456',
+        date_created=now,
+        status=statuses.AVAILABLE,
+        resource_id='459',
+        resource_type=resource_types.IRONIC_NODE,
+        start_time=now,
+        end_time=now,
+        config={'memory_mb': 2048, 'cpus': 16, 'cpu_arch': 'aarch64',
+                'name': 'node-4'},
+        cost=0.0,
+        contract_id=None,
+        project_id='5599'
+        )
+
+
+def test_split_specs():
+    sql_specs, python_specs = offer.Offer.split_specs([
+        ["memory_mb", ">=", 1024],
+        ["cpu_arch", "in", ["x86_64", "aarch64"]],
+        ["cpu_arch", "matches", "x86.*"],
+        ["cpus", "!=", 4],
+        ["inventory.memory.physical_mb", "==", 65536],
+    ])
+    assert sql_specs == [["memory_mb", ">=", 1024],
+                         ["cpu_arch", "in", ["x86_64", "aarch64"]]]
+    assert len(python_specs) == 3
+
+
+@mock.patch('flocx_market.resource_objects.ironic_node'
+            '.IronicNode.is_resource_admin')
+def test_indexed_config_match(is_resource_admin, app, db, session):
+    is_resource_admin.return_vale = True
+    offer.Offer.create(test_offer_3, scoped_context)
+    offer.Offer.create(test_offer_4, scoped_context)
+
+    matches = get_all_matching_offers(
+        scoped_context, [["memory_mb", ">=", 4096]])
+    assert [o.resource_id for o in matches] == ['458']
+
+    matches = get_all_matching_offers(
+        scoped_context, [["cpu_arch", "eq", "aarch64"], ["cpus", ">", 8]])
+    assert [o.resource_id for o in matches] == ['459']
+
+    matches = get_all_matching_offers(
+        scoped_context, [["cpu_arch", "in", ["x86_64", "aarch64"]],
+                         ["name", "endswith", "-3"]])
+    assert [o.resource_id for o in matches] == ['458']
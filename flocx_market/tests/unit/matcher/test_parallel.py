@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+import pytest
+import unittest.mock as mock
+
+from oslo_context import context as ctx
+
+from flocx_market.common import statuses
+import flocx_market.conf
+from flocx_market.matcher import match_engine
+from flocx_market.matcher import parallel
+from flocx_market.objects import bid
+from flocx_market.objects import contract
+from flocx_market.objects import offer
+from flocx_market.resource_objects import resource_types
+
+CONF = flocx_market.conf.CONF
+
+scoped_context = ctx.RequestContext(is_admin=True,
+                                    project_id='5599')
+
+now = datetime.utcnow()
+
+
+def test_find_feasible_offers():
+    offers = [offer.Offer(offer_id='small', config={'cpus': 4}),
+              offer.Offer(offer_id='big', config={'cpus': 32})]
+    bids = [bid.Bid(bid_id='any', config_query={'specs': []}),
+            bid.Bid(bid_id='big_only',
+                    config_query={'specs': [['cpus', '>', 8]]}),
+            bid.Bid(bid_id='none',
+                    config_query={'specs': [['cpus', '>', 64]]})]
+
+    feasible = parallel.find_feasible_offers(bids, offers, 2)
+    assert feasible == {'any': ['small', 'big'],
+                        'big_only': ['big'],
+                        'none': []}
+
+
+def test_find_feasible_offers_worker_error():
+    offers = [offer.Offer(offer_id='small', config={'cpus': 4})]
+    bids = [bid.Bid(bid_id='bad',
+                    config_query={'specs': [['cpus', 'xyz', 1]]})]
+
+    with pytest.raises(ValueError):
+        parallel.find_feasible_offers(bids, offers, 2)
+
+
+def test_worker_pool_persists():
+    offers = [offer.Offer(offer_id='small', config={'cpus': 4})]
+    bids = [bid.Bid(bid_id='any', config_query={'specs': []}),
+            bid.Bid(bid_id='other', config_query={'specs': []})]
+    pool = parallel.get_pool(2)
+    pool.shutdown()
+
+    parallel.find_feasible_offers(bids, offers, 2)
+    pids = sorted(w[0].pid for w in pool._workers)
+    parallel.find_feasible_offers(bids, offers, 2)
+
+    assert parallel.get_pool(2) is pool
+    assert sorted(w[0].pid for w in pool._workers) == pids
+    assert len(pids) == 2
+
+
+def test_worker_pool_replaces_dead_workers():
+    offers = [offer.Offer(offer_id='small', config={'cpus': 4})]
+    bids = [bid.Bid(bid_id='any', config_query={'specs': []})]
+    pool = parallel.WorkerPool(1)
+    try:
+        assert pool.map('[]', [[('any', [])]]) == {'any': []}
+        proc = pool._workers[0][0]
+        proc.kill()
+        proc.join()
+
+        with mock.patch.object(parallel, '_pool', pool):
+            feasible = parallel.find_feasible_offers(bids, offers, 1)
+        assert feasible == {'any': ['small']}
+        assert pool._workers[0][0].pid != proc.pid
+    finally:
+        pool.shutdown()
+
+
+def test_worker_pool_waits_in_the_hub():
+    pool = parallel.WorkerPool(1)
+    try:
+        with mock.patch.object(parallel.hubs, 'trampoline') as trampoline:
+            pool.map('[]', [[('any', [])]])
+        replies = pool._workers[0][2]
+        trampoline.assert_called_once_with(replies.fileno(), read=True)
+    finally:
+        pool.shutdown()
+
+
+test_offer = dict(
+    status=statuses.AVAILABLE,
+    resource_type=resource_types.IRONIC_NODE,
+    start_time=now - timedelta(days=2),
+    end_time=now + timedelta(days=2),
+    project_id='5599',
+    )
+
+test_bid = dict(
+    quantity=1,
+    start_time=now - timedelta(days=1),
+    end_time=now + timedelta(days=1),
+    duration=16400,
+    status=statuses.AVAILABLE,
+    project_id='5599',
+    cost=11.5)
+
+
+@mock.patch('flocx_market.resource_objects.ironic_node'
+            '.IronicNode.is_resource_admin')
+def test_match_parallel(is_resource_admin, app, db, session):
+    is_resource_admin.return_value = True
+    CONF.set_override('matcher_workers', 2, group='manager')
+    for resource_id, cost in [('1', 2.0), ('2', 1.0), ('3', 3.0)]:
+        offer.Offer.create(dict(test_offer, resource_id=resource_id,
+                                config={'cpus': 4}, cost=cost),
+                           scoped_context)
+    for _ in range(3):
+        bid.Bid.create(dict(test_bid,
+                            config_query={'specs': [['cpus', '>=', 4]]}),
+                       scoped_context)
+    bid.Bid.create(dict(test_bid, config_query={'specs': [['cpus', '>', 4]]}),
+                   scoped_context)
+
+    try:
+        match_engine.match(scoped_context)
+    finally:
+        CONF.clear_override('matcher_workers', group='manager')
+
+    # each offer can only be handed out once for overlapping bids
+    assert len(contract.Contract.get_all(scoped_context)) == 3
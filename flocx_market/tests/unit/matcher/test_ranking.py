@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+import pytest
+import unittest.mock as mock
+
+from oslo_context import context as ctx
+
+from flocx_market.common import statuses
+from flocx_market.matcher import match_engine
+from flocx_market.matcher import ranking
+from flocx_market.objects import bid
+from flocx_market.objects import contract
+from flocx_market.objects import offer
+from flocx_market.objects import offer_contract_relationship as ocr
+from flocx_market.resource_objects import resource_types
+
+scoped_context = ctx.RequestContext(is_admin=True,
+                                    project_id='5599')
+
+now = datetime.utcnow()
+
+
+def make_offer(offer_id, cost, start_time=now, config=None):
+    return offer.Offer(offer_id=offer_id,
+                       cost=cost,
+                       start_time=start_time,
+                       config=config or {})
+
+
+def test_cost_policy_orders_in_sql():
+    policy = ranking.get_policy(ranking.COST)
+    offers = iter([make_offer('a', 1.0), make_offer('b', 2.0),
+                   make_offer('c', 3.0)])
+
+    assert [o.offer_id for o in policy.select(offers, 2)] == ['a', 'b']
+    # selection stops once enough offers have been produced
+    assert next(offers).offer_id == 'c'
+
+
+def test_best_fit_policy():
+    policy = ranking.get_policy(ranking.BEST_FIT)
+    offers = [make_offer('big', 1.0, config={'memory_mb': 8192}),
+              make_offer('exact', 5.0, config={'memory_mb': 4096}),
+              make_offer('tie', 5.0, config={'memory_mb': 4096})]
+    specs = [['memory_mb', '>=', 4096]]
+
+    selected = policy.select(iter(offers), 2, specs)
+    assert [o.offer_id for o in selected] == ['exact', 'tie']
+
+
+def test_register_custom_policy():
+    ranking.register_policy('latest',
+                            lambda o, specs: -o.start_time.timestamp())
+    policy = ranking.get_policy('latest')
+    offers = [make_offer('old', 1.0, start_time=now - timedelta(days=1)),
+              make_offer('new', 1.0, start_time=now)]
+
+    assert policy.select(iter(offers), 1)[0].offer_id == 'new'
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        ranking.get_policy('bogus')
+
+
+test_offer = dict(
+    status=statuses.AVAILABLE,
+    resource_type=resource_types.IRONIC_NODE,
+    start_time=now - timedelta(days=2),
+    end_time=now + timedelta(days=2),
+    config={'cpu': 4},
+    project_id='5599',
+    )
+
+test_bid = dict(
+    quantity=1,
+    start_time=now - timedelta(days=1),
+    end_time=now + timedelta(days=1),
+    duration=16400,
+    status=statuses.AVAILABLE,
+    config_query={'specs': [['cpu', '==', 4]]},
+    project_id='5599',
+    cost=11.5)
+
+
+@mock.patch('flocx_market.resource_objects.ironic_node'
+            '.IronicNode.is_resource_admin')
+def test_match_uses_cheapest_offers(is_resource_admin, app, db, session):
+    is_resource_admin.return_value = True
+    for resource_id, cost in [('1', 3.0), ('2', 1.0), ('3', 2.0)]:
+        offer.Offer.create(dict(test_offer, resource_id=resource_id,
+                                cost=cost),
+                           scoped_context)
+    bid.Bid.create(test_bid, scoped_context)
+    match_engine.match(scoped_context)
+
+    contracts = contract.Contract.get_all(scoped_context)
+    assert len(contracts) == 1
+    ocrs = ocr.OfferContractRelationship.get_all(
+        scoped_context, {'contract_id': contracts[0].contract_id})
+    assert len(ocrs) == 1
+    assert ocrs[0].offer(scoped_context).resource_id == '2'
+
+
+@mock.patch('flocx_market.matcher.matcher.match_specs')
+@mock.patch('flocx_market.resource_objects.ironic_node'
+            '.IronicNode.is_resource_admin')
+def test_match_stops_after_quantity(is_resource_admin, match_specs,
+                                    app, db, session):
+    is_resource_admin.return_value = True
+    match_specs.return_value = True
+    for resource_id in ['1', '2', '3', '4']:
+        offer.Offer.create(dict(test_offer, resource_id=resource_id,
+                                cost=1.0),
+                           scoped_context)
+    bid.Bid.create(test_bid, scoped_context)
+    match_engine.match(scoped_context)
+
+    assert len(contract.Contract.get_all(scoped_context)) == 1
+    assert match_specs.call_count == 1
@@ -2,7 +2,9 @@ import datetime
 import unittest.mock as mock
 
 from oslo_context import context as ctx
+import pytest
 
+from flocx_market.common import exception
 from flocx_market.common import statuses
 from flocx_market.objects import bid
 
@@ -50,6 +52,20 @@ def test_create(bid_create):
     bid_create.assert_called_once()
 
 
+def test_create_parses_timestamps(app, db, session):
+    data = dict(test_bid_1, start_time='2026-10-19T12:00:00+02:00',
+                end_time='2026-10-20T10:00:00')
+    b = bid.Bid.create(data, scoped_context)
+    assert b.start_time == datetime.datetime(2026, 10, 19, 10, 0)
+    assert b.end_time == datetime.datetime(2026, 10, 20, 10, 0)
+
+
+def test_create_invalid_timestamp():
+    data = dict(test_bid_1, start_time='tomorrow')
+    with pytest.raises(exception.InvalidTimestamp):
+        bid.Bid.create(data, scoped_context)
+
+
 @mock.patch('flocx_market.db.sqlalchemy.api.bid_get')
 def test_get(bid_get):
     bid_get.return_value = test_bid_2
@@ -0,0 +1,23 @@
+from unittest import mock
+
+from flocx_market.objects import change
+
+
+def _entries(*seqs):
+    return [dict(seq=seq, resource_type='bid', resource_id='b%d' % seq,
+                 action='update', status='expired', project_id=None,
+                 created_at=None, updated_at=None) for seq in seqs]
+
+
+@mock.patch('flocx_market.objects.change.db.change_get_since')
+def test_cursor_reads_on_from_last_change(change_get_since):
+    change_get_since.side_effect = [_entries(3, 4), _entries(6), []]
+    cursor = change.ChangeCursor(since=2, limit=2)
+
+    assert [c.seq for c in cursor.read_all(None)] == [3, 4, 6]
+    assert cursor.since == 6
+    assert [call[0][1:] for call in change_get_since.call_args_list] == [
+        (2, 2), (4, 2)]
+
+    assert cursor.read(None) == []
+    assert cursor.since == 6
@@ -4,8 +4,11 @@ import unittest.mock as mock
 from oslo_context import context as ctx
 
 from flocx_market.common import statuses
+from flocx_market.db.sqlalchemy import models
+from flocx_market.db.sqlalchemy import query_counter
 from flocx_market.objects import contract
 from flocx_market.objects import offer_contract_relationship as ocr
+from flocx_market.resource_objects import resource_types
 
 now = datetime.utcnow()
 
@@ -107,30 +110,102 @@ def test_update_to_expire(get_all, _from_db_object_list):
 
 
 @mock.patch('flocx_market.objects.offer_contract_relationship'
-            '.OfferContractRelationship.fulfill')
+            '.OfferContractRelationship.offer')
+@mock.patch('flocx_market.resource_objects.resource_object_factory'
+            '.ResourceObjectFactory.set_contracts')
 @mock.patch('flocx_market.objects.offer_contract_relationship'
-            '.OfferContractRelationship.get_all')
+            '.db.offer_contract_relationship_update_status')
+@mock.patch('flocx_market.objects.offer_contract_relationship'
+            '.OfferContractRelationship.get_all_for_contract')
 @mock.patch('flocx_market.objects.contract.Contract.save')
-def test_fulfill(save, ocr_get_all, ocr_fulfill):
-    ocr_get_all.return_value = [ocr.OfferContractRelationship(**test_ocr_dict)]
-
+def test_fulfill(save, ocr_get_all, update_status, set_contracts, offer):
     c = contract.Contract(**test_contract_dict_1)
+    o = ocr.OfferContractRelationship(**test_ocr_dict)
+    o._contract = c
+    ocr_get_all.return_value = [o]
+    offer.return_value.resource_type = resource_types.IRONIC_NODE
+    offer.return_value.resource_id = 'node'
+
     c.fulfill(scoped_context)
 
-    ocr_fulfill.assert_called_once()
+    set_contracts.assert_called_once_with(resource_types.IRONIC_NODE,
+                                          [('node', c)])
+    update_status.assert_called_once_with(
+        scoped_context, ['test_offer_contract_relationship_id'],
+        statuses.FULFILLED)
     save.assert_called_once()
 
 
 @mock.patch('flocx_market.objects.offer_contract_relationship'
-            '.OfferContractRelationship.expire')
+            '.OfferContractRelationship.offer')
+@mock.patch('flocx_market.resource_objects.resource_object_factory'
+            '.ResourceObjectFactory.release_contracts')
+@mock.patch('flocx_market.objects.offer_contract_relationship'
+            '.db.offer_contract_relationship_update_status')
 @mock.patch('flocx_market.objects.offer_contract_relationship'
-            '.OfferContractRelationship.get_all')
+            '.OfferContractRelationship.get_all_for_contract')
 @mock.patch('flocx_market.objects.contract.Contract.save')
-def test_expire(save, ocr_get_all, ocr_expire):
-    ocr_get_all.return_value = [ocr.OfferContractRelationship(**test_ocr_dict)]
-
+def test_expire(save, ocr_get_all, update_status, release_contracts, offer):
     c = contract.Contract(**test_contract_dict_1)
+    o = ocr.OfferContractRelationship(**test_ocr_dict)
+    o._contract = c
+    ocr_get_all.return_value = [o]
+    offer.return_value.resource_type = resource_types.IRONIC_NODE
+    offer.return_value.resource_id = 'node'
+
     c.expire(scoped_context)
 
-    ocr_expire.assert_called_once()
+    release_contracts.assert_called_once_with(resource_types.IRONIC_NODE,
+                                              [('node', c)])
+    update_status.assert_called_once_with(
+        scoped_context, ['test_offer_contract_relationship_id'],
+        statuses.EXPIRED)
     save.assert_called_once()
+
+
+@mock.patch('flocx_market.resource_objects.ironic_node'
+            '.IronicNodeDriver.release_contract_many')
+def test_expire_query_count(release_contract_many, app, db, session):
+    admin_context = ctx.RequestContext(is_admin=True, project_id='5599')
+    offer_ids = []
+    for i in range(5):
+        o = models.Offer(offer_id='offer-%d' % i,
+                         project_id='5599',
+                         status=statuses.AVAILABLE,
+                         resource_id=str(i),
+                         resource_type=resource_types.IRONIC_NODE,
+                         start_time=now - timedelta(days=2),
+                         end_time=now + timedelta(days=2),
+                         config={},
+                         cost=0.0)
+        o.save(session)
+        offer_ids.append(o.offer_id)
+    b = models.Bid(bid_id='bid',
+                   project_id='5599',
+                   quantity=5,
+                   start_time=now - timedelta(days=1),
+                   end_time=now + timedelta(days=1),
+                   duration=3600,
+                   status=statuses.CLAIMED,
+                   config_query={'specs': []},
+                   cost=0.0)
+    b.save(session)
+    c = contract.Contract.create(dict(status=statuses.AVAILABLE,
+                                      start_time=now,
+                                      end_time=now + timedelta(days=1),
+                                      cost=0.0,
+                                      bid_id=b.bid_id,
+                                      offers=offer_ids,
+                                      project_id='5599'), admin_context)
+    # one query loads the relationships and offers, one transaction
+    # updates them all and logs the changes, and saving the contract
+    # takes the rest, whatever the offer count
+    with query_counter.assert_max_queries(8):
+        c.expire(admin_context)
+
+    assert len(release_contract_many.call_args[0][0]) == 5
+    ocrs = ocr.OfferContractRelationship.get_all(
+        admin_context, {'contract_id': c.contract_id})
+    assert [o.status for o in ocrs] == [statuses.EXPIRED] * 5
+    assert contract.Contract.get(c.contract_id,
+                                 admin_context).status == statuses.EXPIRED
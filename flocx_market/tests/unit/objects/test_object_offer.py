@@ -76,15 +76,12 @@ def test_get_all_by_project_id(offer_get_all):
     offer_get_all.assert_called_once()
 
 
-@mock.patch('flocx_market.objects.offer_contract_relationship'
-            '.OfferContractRelationship.get_all')
-def test_related_contracts(ocr_get_all):
+@mock.patch('flocx_market.db.sqlalchemy.api.offer_get_related_contracts')
+def test_related_contracts(get_related_contracts):
     o = offer.Offer(**test_offer_1)
     o.related_contracts(scoped_context)
-    ocr_get_all.assert_called_once_with(
-        scoped_context,
-        {'offer_id': o.offer_id}
-    )
+    get_related_contracts.assert_called_once_with(
+        scoped_context, o.offer_id)
 
 
 @mock.patch('flocx_market.resource_objects.resource_object_factory'
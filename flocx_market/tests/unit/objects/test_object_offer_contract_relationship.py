@@ -172,3 +172,38 @@ def test_expire(save, offer, contract, get_contract_uuid):
     oc.expire(scoped_context)
 
     save.assert_called_once()
+
+
+@mock.patch('flocx_market.resource_objects.resource_object_factory'
+            '.ResourceObjectFactory.set_contracts')
+@mock.patch('flocx_market.objects.offer_contract_relationship'
+            '.db.offer_contract_relationship_update_status')
+@mock.patch('flocx_market.objects.offer_contract_relationship'
+            '.OfferContractRelationship.contract')
+@mock.patch('flocx_market.objects.offer_contract_relationship'
+            '.OfferContractRelationship.offer')
+def test_fulfill_all_skips_unchanged(offer, contract, update_status,
+                                     set_contracts):
+    offer.return_value = offer_obj.Offer(**test_offer_dict)
+    c = contract_obj.Contract(**test_contract_dict)
+    contract.return_value = c
+    expired = ocr.OfferContractRelationship(
+        **dict(test_ocr_dict, offer_contract_relationship_id='expired',
+               status=statuses.EXPIRED))
+    available = ocr.OfferContractRelationship(**test_ocr_dict)
+    raced = ocr.OfferContractRelationship(
+        **dict(test_ocr_dict, offer_contract_relationship_id='raced'))
+    # another process expired 'raced' after it was read
+    update_status.return_value = ['test_offer_contract_relationship_id']
+
+    saved = ocr.OfferContractRelationship.fulfill_all(
+        scoped_context, [expired, available, raced])
+
+    set_contracts.assert_called_once_with(
+        resource_types.IRONIC_NODE, [('4567', c), ('4567', c)])
+    update_status.assert_called_once_with(
+        scoped_context, ['test_offer_contract_relationship_id', 'raced'],
+        statuses.FULFILLED)
+    assert saved == [available]
+    assert [o.status for o in (expired, available, raced)] == [
+        statuses.EXPIRED, statuses.FULFILLED, statuses.AVAILABLE]
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+
+from oslo_context import context as ctx
+
+from flocx_market.common import statuses
+from flocx_market.db.sqlalchemy import models
+from flocx_market.db.sqlalchemy import query_counter
+from flocx_market.objects import bid
+from flocx_market.objects import contract
+from flocx_market.objects import offer
+from flocx_market.objects import offer_contract_relationship as ocr
+from flocx_market.resource_objects import resource_types
+
+now = datetime.utcnow()
+
+admin_context = ctx.RequestContext(is_admin=True, project_id='5599')
+
+
+def create_market(session, offers=3, contracts=2):
+    """Create a bid and contracts that each use every offer."""
+    offer_ids = []
+    for i in range(offers):
+        o = models.Offer(offer_id='offer-%d' % i,
+                         project_id='5599',
+                         status=statuses.AVAILABLE,
+                         resource_id=str(i),
+                         resource_type=resource_types.IRONIC_NODE,
+                         start_time=now - timedelta(days=10),
+                         end_time=now + timedelta(days=10),
+                         config={},
+                         cost=0.0)
+        o.save(session)
+        offer_ids.append(o.offer_id)
+
+    b = models.Bid(bid_id='bid',
+                   project_id='5599',
+                   quantity=offers,
+                   start_time=now,
+                   end_time=now + timedelta(days=1),
+                   duration=3600,
+                   status=statuses.CLAIMED,
+                   config_query={'specs': []},
+                   cost=0.0)
+    b.save(session)
+
+    for i in range(contracts):
+        contract.Contract.create(dict(status=statuses.AVAILABLE,
+                                      start_time=now + timedelta(days=i),
+                                      end_time=now + timedelta(days=i + 1),
+                                      cost=0.0,
+                                      bid_id=b.bid_id,
+                                      offers=list(offer_ids),
+                                      project_id='5599'), admin_context)
+    return offer_ids, b.bid_id
+
+
+def test_offer_related_contracts(app, db, session):
+    offer_ids, _ = create_market(session)
+    o = offer.Offer.get(offer_ids[0], admin_context)
+
+    with query_counter.assert_max_queries(1):
+        contracts = o.related_contracts(admin_context)
+    assert len(contracts) == 2
+
+
+def test_offer_available_between(app, db, session):
+    offer_ids, _ = create_market(session)
+    o = offer.Offer.get(offer_ids[0], admin_context)
+
+    with query_counter.assert_max_queries(1):
+        assert not o.available_between(admin_context,
+                                       now + timedelta(hours=1),
+                                       now + timedelta(hours=2))
+    with query_counter.assert_max_queries(1):
+        assert o.available_between(admin_context,
+                                   now + timedelta(days=3),
+                                   now + timedelta(days=4))
+
+
+def test_bid_contracts(app, db, session):
+    _, bid_id = create_market(session)
+    b = bid.Bid.get(bid_id, admin_context)
+
+    with query_counter.assert_max_queries(1):
+        contracts = b.contracts(admin_context)
+    assert len(contracts) == 2
+
+
+def test_contract_offers(app, db, session):
+    offer_ids, _ = create_market(session, offers=5)
+    c = contract.Contract.get_all(admin_context)[0]
+
+    with query_counter.assert_max_queries(1):
+        offers = c.offers(admin_context)
+    assert sorted(o.offer_id for o in offers) == offer_ids
+
+
+def test_ocr_offer_and_contract_preloaded(app, db, session):
+    create_market(session)
+
+    with query_counter.assert_max_queries(1):
+        ocrs = ocr.OfferContractRelationship.get_all(admin_context)
+        for o in ocrs:
+            assert o.offer(admin_context).offer_id == o.offer_id
+            assert o.contract(admin_context).contract_id == o.contract_id
+    assert len(ocrs) == 6
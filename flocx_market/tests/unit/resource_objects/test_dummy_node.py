@@ -0,0 +1,114 @@
+import json
+import os
+import unittest.mock as mock
+
+import pytest
+
+import flocx_market.conf
+from flocx_market.resource_objects import dummy_node
+
+CONF = flocx_market.conf.CONF
+
+
+@pytest.fixture
+def node_dir(tmp_path):
+    CONF.set_override('dummy_node_dir', str(tmp_path), group='dummy_node')
+    dummy_node.STORE.clear()
+    yield tmp_path
+    CONF.clear_override('dummy_node_dir', group='dummy_node')
+    dummy_node.STORE.clear()
+
+
+def _write_node(node_dir, uuid, **node):
+    with open(os.path.join(str(node_dir), uuid), 'w') as node_file:
+        json.dump(node, node_file)
+
+
+def test_dummy_node_reads_file_once(node_dir):
+    _write_node(node_dir, 'n1', server_config={'cpus': 4},
+                project_owner_id='5599')
+    node = dummy_node.DummyNode('n1')
+
+    with mock.patch('builtins.open', wraps=open) as opened:
+        assert node.get_node_config() == {'cpus': 4}
+        assert node.is_resource_admin('5599')
+        assert node.get_contract_uuid() is None
+
+    assert opened.call_count == 1
+
+
+def test_dummy_node_sees_external_changes(node_dir):
+    _write_node(node_dir, 'n1', server_config={'cpus': 4})
+    node = dummy_node.DummyNode('n1')
+    assert node.get_node_config() == {'cpus': 4}
+
+    # another process rewrites the file the way NodeStore.write does
+    tmp = os.path.join(str(node_dir), '.n1.tmp')
+    with open(tmp, 'w') as node_file:
+        json.dump({'server_config': {'cpus': 8}}, node_file)
+    os.replace(tmp, os.path.join(str(node_dir), 'n1'))
+
+    assert node.get_node_config() == {'cpus': 8}
+
+
+def test_dummy_node_set_contract(node_dir):
+    _write_node(node_dir, 'n1', server_config={'cpus': 4})
+    node = dummy_node.DummyNode('n1')
+    contract = mock.Mock(contract_id='c1', project_id='1234')
+
+    node.set_contract(contract)
+
+    with open(os.path.join(str(node_dir), 'n1')) as node_file:
+        on_disk = json.load(node_file)
+    assert on_disk['contract_uuid'] == 'c1'
+    assert on_disk['project_id'] == '1234'
+    assert node.get_contract_uuid() == 'c1'
+    assert os.listdir(str(node_dir)) == ['n1']
+
+    node.set_contract(None)
+    assert node.get_contract_uuid() is None
+    assert node.get_project_id() is None
+
+
+def test_dummy_node_set_contract_keeps_mode(node_dir):
+    _write_node(node_dir, 'n1', server_config={'cpus': 4})
+    path = os.path.join(str(node_dir), 'n1')
+    os.chmod(path, 0o644)
+
+    dummy_node.DummyNode('n1').set_contract(
+        mock.Mock(contract_id='c1', project_id='1234'))
+
+    assert os.stat(path).st_mode & 0o777 == 0o644
+
+
+def test_dummy_node_snapshot_config_is_a_copy(node_dir):
+    _write_node(node_dir, 'n1', server_config={'cpus': 4})
+    node = dummy_node.DummyNode('n1')
+
+    node.get_node_config()['cpus'] = 8
+
+    assert node.get_node_config() == {'cpus': 4}
+
+
+def test_dummy_node_failed_write_keeps_file(node_dir):
+    _write_node(node_dir, 'n1', server_config={'cpus': 4})
+    node = dummy_node.DummyNode('n1')
+    contract = mock.Mock(contract_id=object(), project_id='1234')
+
+    with pytest.raises(TypeError):
+        node.set_contract(contract)
+
+    assert node.get_node_config() == {'cpus': 4}
+    assert os.listdir(str(node_dir)) == ['n1']
+
+
+def test_preload(node_dir):
+    for uuid in ('n1', 'n2', 'n3'):
+        _write_node(node_dir, uuid, server_config={'cpus': 4})
+    (node_dir / 'broken').write_text('{')
+
+    assert dummy_node.preload() == 3
+
+    with mock.patch('builtins.open', wraps=open) as opened:
+        dummy_node.DummyNode('n2').get_node_config()
+    opened.assert_not_called()
@@ -0,0 +1,158 @@
+import threading
+import unittest.mock as mock
+
+from ironicclient.common.apiclient import exceptions as ironic_exc
+import pytest
+
+from flocx_market.common import metrics
+import flocx_market.conf
+from flocx_market.resource_objects import ironic_node
+from flocx_market.resource_objects import snapshot
+from flocx_market.tests.benchmark import fake_ironic
+
+CONF = flocx_market.conf.CONF
+
+
+@pytest.fixture
+def fake():
+    fake = fake_ironic.FakeIronic()
+    fake.add_node('n1', {'cpus': 4, 'project_owner_id': '5599'})
+    CONF.set_override('auth_type', 'none', group='ironic')
+    CONF.set_override('endpoint_override', fake.start(), group='ironic')
+    ironic_node._cached_ironic_client = None
+    snapshot.CACHE.clear()
+    yield fake
+    fake.stop()
+    ironic_node._cached_ironic_client = None
+    CONF.clear_override('auth_type', group='ironic')
+    CONF.clear_override('endpoint_override', group='ironic')
+
+
+def test_ironic_node(fake):
+    node = ironic_node.IronicNode('n1')
+
+    assert node.get_node_config() == {'cpus': 4}
+    assert node.is_resource_admin('5599')
+
+    node.set_contract(mock.Mock(contract_id='c1', project_id='1234'))
+    assert fake.nodes['n1']['properties'] == {
+        'cpus': 4, 'project_owner_id': '5599',
+        'contract_uuid': 'c1', 'project_id': '1234'}
+    assert node.get_contract_uuid() == 'c1'
+
+    gets = fake.requests[('GET', '/v1/nodes/{uuid}')]
+    node.set_contract(None)
+    assert fake.nodes['n1']['properties'] == {
+        'cpus': 4, 'project_owner_id': '5599'}
+    assert fake.requests[('PATCH', '/v1/nodes/{uuid}')] == 2
+    # clearing reads the node once
+    assert fake.requests[('GET', '/v1/nodes/{uuid}')] == gets + 1
+
+
+def test_ironic_driver_batches(fake):
+    fake.add_node('n2', {'cpus': 8, 'project_owner_id': '5599'})
+    fake.add_node('n3', {'cpus': 2})
+    driver = ironic_node.IronicNodeDriver()
+    c1 = mock.Mock(contract_id='c1', project_id='1234')
+    c2 = mock.Mock(contract_id='c2', project_id='1234')
+
+    snapshots = driver.get_many(['n1', 'n2', 'missing'])
+    assert sorted(snapshots) == ['n1', 'n2']
+    assert snapshots['n2'].get_node_config() == {'cpus': 8}
+
+    driver.set_contract_many([('n1', c1), ('n2', c1), ('n3', c2)])
+    driver.release_contract_many([('n1', c1), ('n2', c1), ('n3', c1),
+                                  ('missing', c1)])
+    assert fake.nodes['n1']['properties'] == {
+        'cpus': 4, 'project_owner_id': '5599'}
+    assert fake.nodes['n3']['properties']['contract_uuid'] == 'c2'
+
+    driver.set_contract_many([('n3', None)])
+    assert fake.nodes['n3']['properties'] == {'cpus': 2}
+    assert driver.get_many(['missing']) == {}
+
+    # small batches are fetched node by node rather than listing the fleet
+    assert fake.requests[('GET', '/v1/nodes/{uuid}')] == 9
+    assert fake.requests[('GET', '/v1/nodes/detail')] == 0
+    assert fake.requests[('PATCH', '/v1/nodes/{uuid}')] == 6
+
+
+def test_ironic_driver_lists_large_batches(fake):
+    fake.add_node('n2', {'cpus': 8})
+    CONF.set_override('list_threshold', 3, group='ironic')
+    driver = ironic_node.IronicNodeDriver()
+
+    snapshots = driver.get_many(['n1', 'n2', 'missing'])
+    assert sorted(snapshots) == ['n1', 'n2']
+    assert sorted(driver.get_many(['n1', 'n2'])) == ['n1', 'n2']
+
+    assert fake.requests[('GET', '/v1/nodes/detail')] == 1
+    assert fake.requests[('GET', '/v1/nodes/{uuid}')] == 2
+    CONF.clear_override('list_threshold', group='ironic')
+
+
+def test_ironic_node_not_found(fake):
+    with pytest.raises(ironic_exc.NotFound):
+        ironic_node.IronicNode('missing').get_node_config()
+
+
+def test_ironic_node_injected_error(fake):
+    fake.error_rate = 1.0
+    with pytest.raises(ironic_exc.InternalServerError):
+        ironic_node.IronicNode('n1').get_node_config()
+
+
+@mock.patch.object(ironic_node, '_cached_ironic_client', None)
+@mock.patch.object(ironic_node, '_build_ironic_client')
+def test_get_ironic_client_built_once(build):
+    def locked_build():
+        assert ironic_node._client_lock.locked()
+        return object()
+    build.side_effect = locked_build
+    clients = []
+    threads = [threading.Thread(
+        target=lambda: clients.append(ironic_node.get_ironic_client()))
+        for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    build.assert_called_once()
+    assert len(set(map(id, clients))) == 1
+
+
+def test_http_session_pool():
+    CONF.set_override('connection_pool_size', 7, group='ironic')
+    try:
+        http = ironic_node._http_session()
+    finally:
+        CONF.clear_override('connection_pool_size', group='ironic')
+
+    adapter = http.get_adapter('https://ironic.example.com')
+    assert adapter._pool_maxsize == 7
+    # keystone's and ironic's host pools must not evict each other
+    assert adapter._pool_connections > 1
+    assert isinstance(adapter, ironic_node.ks_session.TCPKeepAliveAdapter)
+
+
+def _sample(name):
+    return metrics.prometheus_client.REGISTRY.get_sample_value(name) or 0
+
+
+def test_instrument_auth():
+    auth_plugin = mock.Mock()
+    ironic_node._instrument_auth(auth_plugin)
+    requests = _sample('flocx_market_ironic_authenticated_requests_total')
+    fetches = _sample(
+        'flocx_market_ironic_token_fetch_duration_seconds_count')
+
+    auth_plugin.get_auth_ref('session')
+    auth_plugin.get_headers('session')
+    auth_plugin.get_headers('session')
+
+    assert _sample('flocx_market_ironic_authenticated_requests_total') == \
+        requests + 2
+    assert _sample(
+        'flocx_market_ironic_token_fetch_duration_seconds_count') == \
+        fetches + 1
@@ -31,3 +31,62 @@ def test_resource_object_factory_bad_type():
                 'BAD-NODE-TYPE',
                 '1234'
             )
+
+
+def test_drivers_loaded_once():
+    assert resource_object_factory.get_driver(resource_types.DUMMY_NODE) \
+        is resource_object_factory.get_driver(resource_types.DUMMY_NODE)
+
+
+@mock.patch.object(resource_object_factory, '_drivers', None)
+@mock.patch('stevedore.extension.ExtensionManager')
+def test_plugin_driver(extension_manager):
+    plugin = mock.Mock()
+    plugin.name = 'switch_port'
+    extension_manager.return_value = [plugin]
+
+    ro = resource_object_factory.ResourceObjectFactory.get_resource_object(
+        'switch_port', 'port-1')
+
+    extension_manager.assert_called_once_with(
+        resource_object_factory.DRIVER_NAMESPACE,
+        invoke_on_load=True,
+        on_load_failure_callback=mock.ANY)
+    plugin.obj.get.assert_called_once_with('port-1')
+    assert ro is plugin.obj.get.return_value
+    # built-in drivers are still there
+    assert resource_object_factory.get_driver(resource_types.IRONIC_NODE)
+
+
+@mock.patch.object(resource_object_factory, '_drivers', None)
+@mock.patch('stevedore.extension.ExtensionManager')
+def test_plugin_driver_cannot_replace_builtin(extension_manager):
+    plugin = mock.Mock()
+    plugin.name = resource_types.IRONIC_NODE
+    extension_manager.return_value = [plugin]
+
+    with mock.patch.object(resource_object_factory.LOG, 'error') as error:
+        driver = resource_object_factory.get_driver(
+            resource_types.IRONIC_NODE)
+
+    assert driver is not plugin.obj
+    error.assert_called_once()
+
+
+def test_driver_batch_defaults():
+    driver = resource_object_factory.get_driver(resource_types.DUMMY_NODE)
+    held = mock.Mock(contract_id='c1')
+    other = mock.Mock(contract_id='c2')
+    nodes = {'n0': mock.Mock(), 'n1': mock.Mock()}
+    nodes['n0'].get_contract_uuid.return_value = 'c1'
+    nodes['n1'].get_contract_uuid.return_value = 'c2'
+
+    with mock.patch.object(driver, 'get', side_effect=nodes.get):
+        snapshots = driver.get_many(['n0', 'n1'])
+        driver.release_contract_many([('n0', held), ('n1', held)])
+        driver.set_contract_many([('n1', other)])
+
+    assert snapshots == {'n0': nodes['n0'].snapshot.return_value,
+                         'n1': nodes['n1'].snapshot.return_value}
+    nodes['n0'].set_contract.assert_called_once_with(None)
+    nodes['n1'].set_contract.assert_called_once_with(other)
@@ -0,0 +1,101 @@
+import threading
+import unittest.mock as mock
+
+import pytest
+
+from flocx_market.common import exception
+import flocx_market.conf
+from flocx_market.resource_objects import resource_object_factory
+from flocx_market.resource_objects import resource_types
+from flocx_market.resource_objects import simulated_node
+
+CONF = flocx_market.conf.CONF
+
+
+@pytest.fixture
+def fleet(tmp_path):
+    CONF.set_override('db_path', str(tmp_path / 'fleet.sqlite'),
+                      group='simulated_node')
+    simulated_node.create_nodes(
+        [dict(uuid='n%d' % i, server_config={'cpus': i},
+              project_owner_id='5599') for i in range(3)])
+    yield
+    simulated_node.close()
+    CONF.clear_override('db_path', group='simulated_node')
+
+
+def test_simulated_node(fleet):
+    node = resource_object_factory.ResourceObjectFactory \
+        .get_resource_object(resource_types.SIMULATED_NODE, 'n1')
+
+    assert node.get_node_config() == {'cpus': 1}
+    assert node.is_resource_admin('5599')
+    assert node.get_contract_uuid() is None
+
+    node.set_contract(mock.Mock(contract_id='c1', project_id='1234'))
+    assert node.get_contract_uuid() == 'c1'
+    assert node.get_project_id() == '1234'
+
+
+def test_simulated_node_not_found(fleet):
+    with pytest.raises(exception.ResourceNotFound):
+        simulated_node.SimulatedNode('missing').get_node_config()
+
+
+def test_get_snapshots(fleet):
+    snapshots = simulated_node.get_snapshots(['n0', 'n2', 'missing'])
+
+    assert sorted(snapshots) == ['n0', 'n2']
+    assert snapshots['n2'].get_node_config() == {'cpus': 2}
+
+
+def test_set_and_release_contracts(fleet):
+    factory = resource_object_factory.ResourceObjectFactory
+    c1 = mock.Mock(contract_id='c1', project_id='1234')
+    c2 = mock.Mock(contract_id='c2', project_id='1234')
+
+    factory.set_contracts(resource_types.SIMULATED_NODE,
+                          [('n0', c1), ('n1', c1), ('n2', c2)])
+    # n2 is held by another contract and must be left alone
+    factory.release_contracts(resource_types.SIMULATED_NODE,
+                              [('n0', c1), ('n1', c1), ('n2', c1)])
+
+    snapshots = simulated_node.get_snapshots(['n0', 'n1', 'n2'])
+    assert snapshots['n0'].get_contract_uuid() is None
+    assert snapshots['n1'].get_project_id() is None
+    assert snapshots['n2'].get_contract_uuid() == 'c2'
+
+
+def test_connection_shared_between_threads(fleet):
+    simulated_node.close()
+    with mock.patch.object(simulated_node, '_open',
+                           wraps=simulated_node._open) as opened:
+        threads = [threading.Thread(
+            target=simulated_node.get_snapshots, args=(['n0'],))
+            for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        simulated_node.SimulatedNode('n1').get_node_config()
+
+    opened.assert_called_once()
+
+
+def test_failed_transaction_releases_connection(fleet):
+    with pytest.raises(ValueError):
+        with simulated_node._transaction() as conn:
+            conn.execute("UPDATE nodes SET project_id = 'x'")
+            raise ValueError()
+
+    assert simulated_node.get_snapshots(['n0'])['n0'].get_project_id() \
+        is None
+
+
+@mock.patch('flocx_market.resource_objects.ironic_node._node_update')
+def test_set_contracts_per_resource(node_update):
+    c = mock.Mock(contract_id='c1')
+    resource_object_factory.ResourceObjectFactory.set_contracts(
+        resource_types.IRONIC_NODE, [('n0', c), ('n1', c)])
+
+    assert node_update.call_count == 2
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+import unittest.mock as mock
+
+from oslo_context import context as ctx
+
+import flocx_market.conf
+from flocx_market.objects import offer
+from flocx_market.resource_objects import ironic_node
+from flocx_market.resource_objects import resource_object_factory
+from flocx_market.resource_objects import resource_types
+from flocx_market.resource_objects import snapshot
+
+CONF = flocx_market.conf.CONF
+
+scoped_context = ctx.RequestContext(is_admin=False,
+                                    project_id='5599')
+
+
+def _node(**properties):
+    node = mock.Mock()
+    node.properties = dict(properties)
+    return node
+
+
+def setup_function():
+    snapshot.CACHE.clear()
+
+
+@mock.patch('flocx_market.resource_objects.ironic_node._node_get')
+def test_ironic_snapshot(node_get):
+    node_get.return_value = _node(cpus=4, project_owner_id='5599',
+                                  project_id='1234', contract_uuid='c1')
+    s = ironic_node.IronicNode('n1').snapshot()
+
+    assert s.get_node_config() == {'cpus': 4}
+    assert s.get_project_id() == '1234'
+    assert s.get_contract_uuid() == 'c1'
+    assert s.is_resource_admin('5599')
+    assert not s.is_resource_admin('1234')
+    node_get.assert_called_once_with('n1')
+
+
+@mock.patch('flocx_market.resource_objects.ironic_node._node_get')
+def test_get_resource_snapshot_cached(node_get):
+    node_get.return_value = _node(cpus=4)
+    factory = resource_object_factory.ResourceObjectFactory
+    CONF.set_override('snapshot_cache_ttl', 60, group='resource')
+    try:
+        first = factory.get_resource_snapshot(resource_types.IRONIC_NODE,
+                                              'n1')
+        second = factory.get_resource_snapshot(resource_types.IRONIC_NODE,
+                                               'n1')
+    finally:
+        CONF.clear_override('snapshot_cache_ttl', group='resource')
+
+    assert first is second
+    node_get.assert_called_once_with('n1')
+
+
+@mock.patch('flocx_market.resource_objects.ironic_node._node_get')
+def test_get_resource_snapshot_cache_disabled(node_get):
+    node_get.return_value = _node(cpus=4)
+    factory = resource_object_factory.ResourceObjectFactory
+    factory.get_resource_snapshot(resource_types.IRONIC_NODE, 'n1')
+    factory.get_resource_snapshot(resource_types.IRONIC_NODE, 'n1')
+
+    assert node_get.call_count == 2
+
+
+def test_snapshot_cache_expires():
+    cache = snapshot.SnapshotCache()
+    s = snapshot.ResourceSnapshot('n1', {})
+    with mock.patch('time.monotonic', return_value=100.0):
+        cache.put(resource_types.IRONIC_NODE, s)
+    with mock.patch('time.monotonic', return_value=130.0):
+        assert cache.get(resource_types.IRONIC_NODE, 'n1', 60) is s
+    with mock.patch('time.monotonic', return_value=161.0):
+        assert cache.get(resource_types.IRONIC_NODE, 'n1', 60) is None
+
+
+def test_snapshot_cache_keyed_by_type():
+    cache = snapshot.SnapshotCache()
+    s = snapshot.ResourceSnapshot('n1', {})
+    cache.put(resource_types.IRONIC_NODE, s)
+
+    assert cache.get(resource_types.DUMMY_NODE, 'n1', 60) is None
+    cache.invalidate(resource_types.DUMMY_NODE, 'n1')
+    assert cache.get(resource_types.IRONIC_NODE, 'n1', 60) is s
+
+
+@mock.patch('flocx_market.resource_objects.ironic_node._node_update')
+@mock.patch('flocx_market.resource_objects.ironic_node._node_get')
+def test_set_contract_invalidates_snapshot(node_get, node_update):
+    node_get.return_value = _node(cpus=4)
+    snapshot.CACHE.put(resource_types.IRONIC_NODE,
+                       ironic_node.IronicNode('n1').snapshot())
+
+    contract = mock.Mock(contract_id='c1', project_id='1234')
+    ironic_node.IronicNode('n1').set_contract(contract)
+
+    assert snapshot.CACHE.get(resource_types.IRONIC_NODE, 'n1', 60) is None
+
+
+@mock.patch('flocx_market.resource_objects.ironic_node._node_get')
+def test_offer_create_fetches_node_once(node_get, app, db, session):
+    node_get.return_value = _node(cpus=4, project_owner_id='5599')
+    o = offer.Offer.create(dict(resource_id='n1',
+                                resource_type=resource_types.IRONIC_NODE,
+                                status='available',
+                                start_time=datetime.utcnow(),
+                                end_time=datetime.utcnow() + timedelta(days=1),
+                                cost=1.0),
+                           scoped_context)
+
+    assert o.config == {'cpus': 4}
+    node_get.assert_called_once_with('n1')